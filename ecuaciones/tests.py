@@ -0,0 +1,67 @@
+import math
+import numpy as np
+from django.test import TestCase, SimpleTestCase, override_settings
+from symboesfm.metodos import ecuacion_diferencial
+
+SIN_MANIFIESTO = override_settings(STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage')
+
+
+class EcuacionDiferencialTests(SimpleTestCase):
+    def test_crecimiento_exponencial(self):
+        for metodo, pasos, lugares in (('euler', 2000, 2), ('heun', 200, 4), ('rk4', 20, 6)):
+            x, y = getattr(ecuacion_diferencial('y', [0, 1], 1), metodo)(pasos)
+            self.assertEqual(y.shape, (pasos + 1, 1))
+            self.assertAlmostEqual(x[-1], 1)
+            self.assertAlmostEqual(y[-1, 0], math.e, places = lugares)
+
+    def test_orden_de_convergencia(self):
+        def error(metodo, pasos):
+            _, y = getattr(ecuacion_diferencial('y', [0, 1], 1), metodo)(pasos)
+            return abs(y[-1, 0] - math.e)
+        for metodo, orden in (('euler', 1), ('heun', 2), ('rk4', 4)):
+            self.assertAlmostEqual(math.log2(error(metodo, 20)/error(metodo, 40)), orden, delta = 0.15)
+
+    def test_varias_condiciones_y_parametro(self):
+        ecuacion = ecuacion_diferencial('k*y', [0, 1], [1, 2], parametro = 'k', valores = [1, -1])
+        _, y = ecuacion.rk45(1e-9)
+        np.testing.assert_allclose(y[-1], [math.e, 2/math.e], rtol = 1e-7)
+
+    def test_error_estimado(self):
+        ecuacion = ecuacion_diferencial('x + y', [0, 1], 0)
+        _, y = ecuacion.rk4(10)
+        verdadero = abs(y[-1, 0] - (math.e - 2))
+        estimado = ecuacion.errores().loc['Estimado', 'Valor']
+        self.assertLess(abs(estimado - verdadero), 0.1*verdadero)
+
+    def test_detalle_acotado(self):
+        ecuacion = ecuacion_diferencial('y', [0, 1], 1)
+        ecuacion.euler(1000)
+        self.assertEqual(len(ecuacion.pasos), ecuacion.PASOS_DETALLE + 2)
+
+
+@SIN_MANIFIESTO
+class EdoVistaTests(TestCase):
+    problema = {'eq': 'x+y', 'x0': '0', 'xf': '1', 'condiciones': '0, 1', 'metodo': '3', 'pasos': '10'}
+
+    def enviar(self, **cambios):
+        return self.client.post('/ecuaciones/submit/', dict(self.problema, **cambios))
+
+    def test_resuelve(self):
+        self.assertRedirects(self.enviar(), '/ecuaciones/view/')
+        respuesta = self.client.get('/ecuaciones/view/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['metodo'], 'Runge-Kutta 4')
+        self.assertEqual(respuesta.context['nodos'], 11)
+
+    def test_rechaza_datos_invalidos(self):
+        for cambios in ({'eq': 'k y'}, {'eq': 't\\cdot y'}, {'metodo': '9'}, {'metodo': '12'},
+                        {'pasos': '0'}, {'pasos': str(ecuacion_diferencial.MAX_PASOS + 1)}, {'xf': '-1'}):
+            with self.subTest(**cambios):
+                self.assertRedirects(self.enviar(**cambios), '/ecuaciones/')
+                self.assertNotIn('edo', self.client.session)
+
+    def test_sesion_no_evaluable(self):
+        sesion = self.client.session
+        sesion['edo'] = dict(eq = 't*y', x0 = 0.0, xf = 1.0, condiciones = [1.0], metodo = '1', pasos = 10, tolerancia = 1e-6)
+        sesion.save()
+        self.assertRedirects(self.client.get('/ecuaciones/view/'), '/ecuaciones/')
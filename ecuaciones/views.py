@@ -0,0 +1,71 @@
+import numpy as np
+from django.shortcuts import render, redirect
+from django.contrib import messages
+from sympy import parse_expr, latex, symbols
+from symboesfm.metodos import ecuacion_diferencial
+from symboesfm.lector_latex import latex_a_texto, ErrorLatex
+
+# Renglones de la tabla de resultados; con más pasos se muestran nodos espaciados.
+FILAS_MAXIMAS = 50
+
+def edo(request):
+    return render(request, 'ecuaciones/edo.html')
+
+def view(request):
+    datos = request.session.get('edo')
+    if datos is None:
+        return redirect('edo')
+
+    nombres = {'1':'Euler',
+               '2':'Heun',
+               '3':'Runge-Kutta 4',
+               '4':'Dormand-Prince 5(4) adaptivo'}
+
+    try:
+        ecuacion = ecuacion_diferencial(datos['eq'], [datos['x0'], datos['xf']], datos['condiciones'])
+        metodos = {'1':ecuacion.euler,
+                   '2':ecuacion.heun,
+                   '3':ecuacion.rk4}
+        if datos['metodo'] == '4':
+            x, y = ecuacion.rk45(datos['tolerancia'])
+        else:
+            x, y = metodos[datos['metodo']](datos['pasos'])
+    except (ValueError, TypeError) as e:
+        messages.error(request, str(e))
+        return redirect('edo')
+
+    indices = np.unique(np.linspace(0, len(x) - 1, min(len(x), FILAS_MAXIMAS)).round().astype(int))
+    filas = [[float(x[i])] + [float(v) for v in y[i]] for i in indices]
+    errores = ecuacion.errores().reset_index().to_dict('records')
+    return render(request, 'ecuaciones/view.html', {'equation': latex(parse_expr(datos['eq'])), 'metodo': nombres[datos['metodo']],
+                                                    'condiciones': datos['condiciones'], 'filas': filas, 'nodos': len(x),
+                                                    'errores': errores, 'pasos': ecuacion.pasos})
+
+def submit(request):
+    if request.method != 'POST':
+        return redirect('edo')
+
+    try:
+        eq = latex_a_texto(request.POST['eq'])
+    except ErrorLatex as e:
+        messages.error(request, str(e))
+        return redirect('edo')
+    if not parse_expr(eq).free_symbols <= set(symbols('x y')):
+        messages.error(request, 'La ecuación solo puede depender de x y de y.')
+        return redirect('edo')
+
+    try:
+        condiciones = [float(c) for c in request.POST['condiciones'].replace(',', ' ').split()]
+        assert condiciones
+        datos = {'eq': eq, 'x0': float(request.POST['x0']), 'xf': float(request.POST['xf']), 'condiciones': condiciones,
+                 'metodo': request.POST['metodo'], 'pasos': int(request.POST.get('pasos') or 10),
+                 'tolerancia': float(request.POST.get('tolerancia') or 1e-6)}
+        assert datos['metodo'] in ('1', '2', '3', '4')
+        assert datos['xf'] > datos['x0'] and 0 < datos['pasos'] <= ecuacion_diferencial.MAX_PASOS and datos['tolerancia'] > 0
+    except (KeyError, ValueError, AssertionError):
+        messages.error(request, 'Revisa los datos: elige un método, xf debe ser mayor que x0, las condiciones iniciales separadas por comas, '
+                                'pasos entre 1 y ' + str(ecuacion_diferencial.MAX_PASOS) + ' y tolerancia positiva.')
+        return redirect('edo')
+
+    request.session['edo'] = datos
+    return redirect('edo_view')
@@ -0,0 +1,15 @@
+# Configuración de gunicorn; se carga sola desde el directorio de trabajo.
+import os
+
+# Además del límite de RSS, cada proceso se reinicia tras un número de
+# peticiones (con algo de azar para que no se reinicien todos juntos).
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+
+def post_request(worker, req, environ, resp):
+    # Se importa aquí porque Django ya está configurado en el proceso hijo.
+    from symboesfm.memoria import debe_reciclarse
+    if debe_reciclarse():
+        # El proceso termina la petición actual y el maestro levanta otro.
+        worker.alive = False
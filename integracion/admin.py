@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import Resultado
 
-# Register your models here.
+@admin.register(Resultado)
+class ResultadoAdmin(admin.ModelAdmin):
+    list_display = ('tipo', '__str__', 'aproximacion', 'usos', 'tiempo', 'version', 'usado')
+    list_filter = ('tipo', 'version')
+    search_fields = ('hash', 'aproximacion')
+    readonly_fields = ('hash', 'creado', 'usado')
+    exclude = ('pasos_comprimidos',)
@@ -0,0 +1,50 @@
+import json
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+from integracion.models import Resultado, VERSION_METODOS
+from integracion.views import entrada_canonica, obtener_resultado
+
+
+class Command(BaseCommand):
+    help = ('Mantenimiento de la tabla de resultados: precalcula los problemas más '
+            'pedidos (o los de un archivo JSON) y borra las filas que ya no se usan.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--frecuentes', type = int, default = 0, metavar = 'N',
+                            help = 'Recalcula los N problemas más usados que se guardaron con otra versión de los métodos.')
+        parser.add_argument('--archivo', metavar = 'RUTA',
+                            help = 'JSON con una lista de problemas (tipo, eq, a, b, metodo, particiones, ...) para precalcular.')
+        parser.add_argument('--podar', action = 'store_true',
+                            help = 'Borra los resultados viejos (ver --dias y --min-usos) y los de otras versiones.')
+        parser.add_argument('--dias', type = int, default = 90,
+                            help = 'Días sin usarse para considerar viejo un resultado (90 por defecto).')
+        parser.add_argument('--min-usos', type = int, default = 5,
+                            help = 'Los resultados con al menos estos usos no se podan por antigüedad (5 por defecto).')
+
+    def handle(self, *args, **opciones):
+        if not (opciones['frecuentes'] or opciones['archivo'] or opciones['podar']):
+            raise CommandError('Indica --frecuentes, --archivo o --podar.')
+
+        problemas = []
+        if opciones['frecuentes']:
+            viejos = Resultado.objects.exclude(version = VERSION_METODOS).order_by('-usos')[:opciones['frecuentes']]
+            problemas += [r.entrada for r in viejos]
+        if opciones['archivo']:
+            with open(opciones['archivo'], encoding = 'utf-8') as f:
+                problemas += [entrada_canonica(p) for p in json.load(f)]
+
+        for entrada in problemas:
+            try:
+                contexto = obtener_resultado(entrada)
+            except Exception as e:
+                self.stderr.write('No se pudo calcular ' + json.dumps(entrada) + ': ' + str(e))
+            else:
+                self.stdout.write(entrada['tipo'] + ' ' + entrada['eq'] + ' = ' + str(contexto['aproximacion']))
+
+        if opciones['podar']:
+            limite = timezone.now() - timedelta(days = opciones['dias'])
+            borrados, _ = Resultado.objects.filter(Q(usado__lt = limite, usos__lt = opciones['min_usos'])
+                                                   | ~Q(version = VERSION_METODOS)).delete()
+            self.stdout.write('Se borraron ' + str(borrados) + ' resultados.')
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Resultado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.CharField(max_length=64, unique=True)),
+                ('tipo', models.CharField(max_length=20)),
+                ('entrada', models.JSONField()),
+                ('aproximacion', models.TextField()),
+                ('errores', models.JSONField(null=True)),
+                ('contexto', models.JSONField(default=dict)),
+                ('pasos_comprimidos', models.BinaryField()),
+                ('tiempo', models.FloatField()),
+                ('version', models.PositiveSmallIntegerField()),
+                ('usos', models.PositiveIntegerField(default=1)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('usado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-usos'],
+            },
+        ),
+    ]
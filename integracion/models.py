@@ -1,3 +1,73 @@
+import json
+import zlib
+import hashlib
 from django.db import models
 
-# Create your models here.
+# Se incrementa cuando un cambio en symboesfm.metodos altera los resultados o
+# los pasos; las filas con otra versión se recalculan en lugar de reutilizarse.
+VERSION_METODOS = 4
+
+
+def hash_problema(entrada):
+    """
+        Hash canónico de un problema: el mismo diccionario (sin importar el
+        orden de las llaves) siempre da el mismo hash.
+    """
+    texto = json.dumps(entrada, sort_keys = True, default = str)
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+class Resultado(models.Model):
+    """
+        Resultado ya calculado de una integral, identificado por el hash de su
+        entrada (tipo, función, límites, método y particiones).
+
+        Atributos
+        -----------------------
+        hash: str
+            hash_problema(entrada), único.
+        entrada: dict
+            Entrada canónica con la que se calculó.
+        aproximacion: str
+            Aproximación tal como se muestra en la página.
+        errores: list
+            Tabla de errores, un diccionario por renglón.
+        contexto: dict
+            Resto de las variables de la plantilla (nombre del método, límites en LaTeX, ...).
+        pasos_comprimidos: bytes
+            Lista de pasos en JSON comprimida con zlib.
+        tiempo: float
+            Segundos que tomó el cálculo.
+        version: int
+            VERSION_METODOS con la que se calculó.
+        usos: int
+            Veces que se ha pedido este problema.
+    """
+    hash = models.CharField(max_length = 64, unique = True)
+    tipo = models.CharField(max_length = 20)
+    entrada = models.JSONField()
+    aproximacion = models.TextField()
+    errores = models.JSONField(null = True)
+    contexto = models.JSONField(default = dict)
+    pasos_comprimidos = models.BinaryField()
+    tiempo = models.FloatField()
+    # Sin default: el que guarda siempre la da, así subir VERSION_METODOS no
+    # requiere una migración.
+    version = models.PositiveSmallIntegerField()
+    usos = models.PositiveIntegerField(default = 1)
+    creado = models.DateTimeField(auto_now_add = True)
+    usado = models.DateTimeField(auto_now = True)
+
+    class Meta:
+        ordering = ['-usos']
+
+    def __str__(self):
+        return self.tipo + ': ' + str(self.entrada.get('eq'))
+
+    @property
+    def pasos(self):
+        return json.loads(zlib.decompress(bytes(self.pasos_comprimidos)))
+
+    @staticmethod
+    def comprimir(pasos):
+        return zlib.compress(json.dumps(pasos, default = str).encode(), 6)
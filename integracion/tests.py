@@ -1,3 +1,604 @@
-from django.test import TestCase
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+import warnings
+import numpy as np
+from fractions import Fraction
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.utils import timezone
+from django.test import SimpleTestCase, TestCase, override_settings
+import sympy
+from symboesfm import metodos
+from symboesfm.metodos import integracion_numerica, integracion_tabular, pesos_newton_cotes, pesos_clenshaw_curtis, niveles_clenshaw_curtis, subintervalos_comunes, reducir_lttb, serie_grafica, grafica_integral
+from symboesfm import lector_latex
+from symboesfm.cache import CacheLocMemAcotada
+from symboesfm.costo import analizar, ExpresionCostosa
+from symboesfm.vuelo import VueloUnico
+from integracion import views
+from integracion.models import Resultado, VERSION_METODOS
+from symboesfm.lector_latex import latex_a_expresion, normalizar, ErrorLatex
 
-# Create your tests here.
+
+class TanhSinhTests(SimpleTestCase):
+    def integrar(self, limites, funcion):
+        integral = integracion_numerica(limites, funcion)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            valor = float(integral.tanh_sinh())
+            errores = integral.errores()['Valor']
+        return valor, errores
+
+    def test_singularidad_en_ambos_extremos(self):
+        # 1 - (s - 1)^2 se redondea a 0 en la cola; antes daba oo.
+        valor, errores = self.integrar([-1, 1], '1/sqrt(1-x**2)')
+        self.assertAlmostEqual(valor, math.pi, places = 6)
+        self.assertTrue(math.isfinite(errores['Aproximado']))
+        self.assertAlmostEqual(float(errores['Verdadero']), 0, places = 6)
+
+    def test_singularidad_en_un_extremo(self):
+        valor, errores = self.integrar([0, 1], '1/sqrt(1-x**2)')
+        self.assertAlmostEqual(valor, math.pi/2, places = 6)
+        self.assertTrue(math.isfinite(errores['Aproximado']))
+
+    def test_distancia_al_extremo(self):
+        self.assertAlmostEqual(self.integrar([0, 1], '1/sqrt(x)')[0], 2, places = 12)
+        self.assertAlmostEqual(self.integrar([-3, 1], '1/sqrt(1-x)')[0], 4, places = 12)
+
+    def test_limites_infinitos(self):
+        self.assertAlmostEqual(self.integrar([0, 'oo'], 'exp(-x)')[0], 1, places = 12)
+        self.assertAlmostEqual(self.integrar(['-oo', 'oo'], 'exp(-x**2)')[0], math.sqrt(math.pi), places = 12)
+
+
+class NewtonCotesTests(SimpleTestCase):
+    def test_pesos_cerrados(self):
+        self.assertEqual(pesos_newton_cotes(1), (Fraction(1, 2), Fraction(1, 2)))
+        self.assertEqual(pesos_newton_cotes(2), (Fraction(1, 3), Fraction(4, 3), Fraction(1, 3)))
+        self.assertEqual(pesos_newton_cotes(3), (Fraction(3, 8), Fraction(9, 8), Fraction(9, 8), Fraction(3, 8)))
+        self.assertEqual(pesos_newton_cotes(4), tuple(Fraction(w, 45) for w in (14, 64, 24, 64, 14)))
+
+    def test_pesos_abiertos(self):
+        self.assertEqual(pesos_newton_cotes(0, abierta = True), (Fraction(2),))
+        self.assertEqual(pesos_newton_cotes(1, abierta = True), (Fraction(3, 2), Fraction(3, 2)))
+
+    def test_reglas_clasicas(self):
+        self.assertAlmostEqual(float(integracion_numerica([0, 2], 'x**2').trapezoidal_compuesto(4)), 2.75, places = 12)
+        self.assertAlmostEqual(float(integracion_numerica([0, 2], 'x**3').simpson1_3_compuesto(2, errores = False)), 4, places = 12)
+        self.assertAlmostEqual(float(integracion_numerica([0, 2], 'x**3').simpson3_8_compuesto(2)), 4, places = 12)
+
+    def test_pasos_de_simpson1_3(self):
+        # R_t se deriva después de calcular los puntos de soporte, como antes de _newton_cotes.
+        integral = integracion_numerica([0, 2], 'x**5+3*x')
+        integral.simpson1_3_compuesto(2)
+        titulos = [paso['titulo'] for paso in integral.pasos]
+        self.assertEqual(titulos[:3], ['Calcular h', 'Calcular puntos de soporte', 'Derivar 4 veces \\( \\ f(x) \\)'])
+        self.assertEqual(titulos[-1], 'Calcular la aproximación con la fórmula')
+
+
+class ClenshawCurtisTests(SimpleTestCase):
+    def test_integrales_conocidas(self):
+        self.assertAlmostEqual(float(integracion_numerica([0, 1], 'exp(x)').clenshaw_curtis(16)), math.e - 1, places = 12)
+        self.assertAlmostEqual(float(integracion_numerica([0, math.pi], 'sin(x)').clenshaw_curtis(32)), 2, places = 12)
+
+    def test_pesos(self):
+        nodos, pesos = pesos_clenshaw_curtis(8)
+        self.assertEqual(len(nodos), 9)
+        self.assertAlmostEqual(pesos.sum(), 2, places = 14)
+        # Exacta para polinomios de grado n: integral de t^k en [-1, 1].
+        for k in range(9):
+            self.assertAlmostEqual(np.dot(pesos, nodos**k), (1 + (-1)**k)/(k + 1), places = 13)
+
+    def test_niveles_anidados(self):
+        self.assertEqual(niveles_clenshaw_curtis(10), [2, 4, 8, 16])
+        self.assertEqual(niveles_clenshaw_curtis(1), [2, 4])
+        with self.assertRaises(ValueError):
+            niveles_clenshaw_curtis(10**9)
+        integral = integracion_numerica([0, 1], 'exp(x)')
+        with mock.patch.object(integral, '_evaluar', wraps = integral._evaluar) as evaluar:
+            integral.clenshaw_curtis(16)
+        # Cada nivel solo evalúa los nodos nuevos: 17 evaluaciones en total.
+        self.assertEqual(sum(len(llamada.args[0]) for llamada in evaluar.call_args_list), 17)
+        self.assertLess(float(integral.errores().loc['Aproximado', 'Valor']), 1e-10)
+
+    def test_doble(self):
+        self.assertAlmostEqual(float(integracion_numerica([0, 1], 'x*y').clenshaw_curtis_doble([0, 2], 8)), 1, places = 12)
+        self.assertAlmostEqual(float(integracion_numerica(['0', 'x'], 'x*y').clenshaw_curtis_doble([0, 1], 8)), 0.125, places = 12)
+
+
+class LectorLatexTests(SimpleTestCase):
+    def convertir(self, texto):
+        # Regresa la expresión y qué ruta la interpretó.
+        antes = lector_latex._estadisticas.copy()
+        expresion = latex_a_expresion(texto)
+        ruta, = (lector_latex._estadisticas - antes).keys() or ['cache']
+        return expresion, ruta
+
+    def test_ruta_rapida_como_antlr(self):
+        for texto in ['\\frac{1}{\\sqrt{1-x^2}}', 'e^{x}\\sin\\left(x\\right)', '2x^2+3x', '\\cos^2x',
+                      '\\sin^{-1}\\left(x\\right)']:
+            lector_latex._convertir.cache_clear()
+            expresion, ruta = self.convertir(texto)
+            self.assertEqual(ruta, 'rapido', texto)
+            # ANTLR deja E como símbolo; las vistas pasan el texto a sympify, que la vuelve la constante.
+            antlr = sympy.sympify(str(lector_latex._antlr(normalizar(texto))))
+            self.assertEqual(sympy.simplify(expresion - antlr), 0, texto)
+
+    def test_logaritmo_natural(self):
+        x = sympy.Symbol('x')
+        self.assertEqual(latex_a_expresion('\\log\\left(x\\right)'), sympy.log(x))
+        self.assertEqual(latex_a_expresion('\\ln\\left(x\\right)'), sympy.log(x))
+
+    def test_ruta_antlr(self):
+        lector_latex._convertir.cache_clear()
+        x, theta = sympy.symbols('x theta')
+        expresion, ruta = self.convertir('\\log_{2}x')
+        self.assertEqual(ruta, 'antlr')
+        self.assertEqual(sympy.simplify(expresion - sympy.log(x)/sympy.log(2)), 0)
+        # Solo la e suelta es la constante; la de \theta no.
+        self.assertEqual(sympy.sympify(str(self.convertir('\\theta+e')[0])), theta + sympy.E)
+
+    def test_cache_por_forma_normal(self):
+        self.assertEqual(normalizar('\\left( x \\right) \\cdot 2'), normalizar('(x)\\cdot2'))
+        latex_a_expresion('\\left( x \\right) \\cdot 2')
+        self.assertEqual(self.convertir('(x)\\cdot2')[1], 'cache')
+
+    def test_errores(self):
+        for texto in ['', '\\frac{', '#', '10^{10^{9}}', '\\left(10^{7}\\right)!']:
+            with self.assertRaises(ErrorLatex, msg = texto):
+                latex_a_expresion(texto)
+
+
+class IntegracionTabularTests(SimpleTestCase):
+    datos = '\n'.join(str(k/10) + ',' + str((k/10)**2) for k in range(11))
+
+    def test_trapezoidal(self):
+        # h = 0.1: 1/3 + h^2/6
+        self.assertAlmostEqual(integracion_tabular(io.StringIO(self.datos), 'csv').trapezoidal(), 0.335, places = 12)
+
+    def test_simpson1_3(self):
+        self.assertAlmostEqual(integracion_tabular(io.StringIO(self.datos), 'csv').simpson1_3(), 1/3, places = 12)
+
+    def test_no_uniforme_por_bloques(self):
+        # Simpson 1/3 no uniforme es exacta para x^2 aunque los bloques corten los paneles.
+        x = np.array([0, 0.1, 0.3, 0.4, 0.7, 0.8, 1.0])
+        datos = 'x,f\n' + '\n'.join(str(a) + ',' + str(a**2) for a in x)
+        for tamano in (2, 3, 100000):
+            integral = integracion_tabular(io.StringIO(datos), 'csv')
+            integral.TAMANO_BLOQUE = tamano
+            self.assertAlmostEqual(integral.simpson1_3(), 1/3, places = 12)
+
+    def test_npy(self):
+        archivo = io.BytesIO()
+        np.save(archivo, np.vstack([np.linspace(0, 1, 11), np.linspace(0, 1, 11)**2]))
+        archivo.seek(0)
+        self.assertAlmostEqual(integracion_tabular(archivo, 'npy').simpson1_3(), 1/3, places = 12)
+
+    def test_valores_no_numericos(self):
+        with self.assertRaises(ValueError):
+            integracion_tabular(io.StringIO('0,1\n1,a\n'), 'csv').trapezoidal()
+
+
+class SumaPorBloquesTests(SimpleTestCase):
+    def aproximar(self, **atributos):
+        integral = integracion_numerica([0, 1], 'exp(x)')
+        for nombre, valor in atributos.items():
+            setattr(integral, nombre, valor)
+        return float(integral.simpson3_8_compuesto(40)), integral.pasos
+
+    def test_igual_que_detallada(self):
+        detallada, _ = self.aproximar()
+        self.assertAlmostEqual(detallada, math.e - 1, places = 9)
+        por_bloques, pasos = self.aproximar(LIMITE_DETALLE = 10, TAMANO_BLOQUE = 7)
+        self.assertEqual(por_bloques, detallada)
+        # 40 paneles de 3 subintervalos: S_1 y S_2 con 40 puntos, S_3 con 39, en bloques de 7.
+        bloques = [paso for paso in pasos if paso['titulo'].startswith('Evaluar y sumar')]
+        self.assertEqual(len(bloques), 3)
+        self.assertIn('en 6 bloque(s) de hasta 7 puntos', bloques[0]['procedimiento'])
+        self.assertNotIn('Calcular puntos de soporte', [paso['titulo'] for paso in pasos])
+
+    def test_en_paralelo(self):
+        serie, _ = self.aproximar(LIMITE_DETALLE = 10, TAMANO_BLOQUE = 7)
+        for ejecutor in ('hilos', 'procesos'):
+            paralelo, pasos = self.aproximar(LIMITE_DETALLE = 10, TAMANO_BLOQUE = 7, UMBRAL_PARALELO = 1,
+                                             PARALELISMO = 2, EJECUTOR = ejecutor)
+            self.assertEqual(paralelo, serie, ejecutor)
+            self.assertIn('repartidos entre 2 ' + ejecutor, pasos[1]['procedimiento'])
+        # El pool se crea una vez y se reutiliza.
+        self.assertIs(metodos._ejecutor('hilos', 2), metodos._ejecutor('hilos', 2))
+
+
+# Sin collectstatic no hay manifiesto de los archivos estáticos.
+SIN_MANIFIESTO = override_settings(STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage')
+
+
+@SIN_MANIFIESTO
+class PaginaEnCacheTests(TestCase):
+    problema = {'eq': 'x^2+\\sin\\left(x\\right)', 'a': '0', 'b': '1', 'metodo': '1', 'particiones': '4', 'tipo': 'simple'}
+
+    def setUp(self):
+        cache.clear()
+
+    def enviar(self, **cambios):
+        self.client.post('/integracion/submit/', dict(self.problema, **cambios), HTTP_REFERER = 'http://x/integracion/simple/')
+
+    def test_etag_y_304(self):
+        self.enviar()
+        respuesta = self.client.get('/integracion/view/')
+        self.assertEqual(respuesta.status_code, 200)
+        etag = respuesta['ETag']
+        with mock.patch.object(views, '_resolver', side_effect = AssertionError('recalculó')):
+            self.assertEqual(self.client.get('/integracion/view/').content, respuesta.content)
+            self.assertEqual(self.client.get('/integracion/view/', HTTP_IF_NONE_MATCH = etag).status_code, 304)
+        self.enviar(particiones = '6')
+        otra = self.client.get('/integracion/view/', HTTP_IF_NONE_MATCH = etag)
+        self.assertEqual(otra.status_code, 200)
+        self.assertNotEqual(otra['ETag'], etag)
+
+    def test_version_de_metodos(self):
+        self.enviar()
+        etag = self.client.get('/integracion/view/')['ETag']
+        grafica = self.client.get('/integracion/grafica/')['ETag']
+        with mock.patch.object(views, 'VERSION_METODOS', views.VERSION_METODOS + 1):
+            respuesta = self.client.get('/integracion/view/', HTTP_IF_NONE_MATCH = etag)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertNotEqual(respuesta['ETag'], etag)
+            self.assertNotEqual(self.client.get('/integracion/grafica/', HTTP_IF_NONE_MATCH = grafica).status_code, 304)
+
+
+class CacheLocMemAcotadaTests(SimpleTestCase):
+    def test_limite_de_bytes(self):
+        memoria = CacheLocMemAcotada('pruebas', {'OPTIONS': {'MAX_BYTES': 1000, 'MAX_ENTRIES': 100}})
+        memoria.clear()
+        memoria.set('a', 'x'*300)
+        memoria.set('b', 'x'*300)
+        ocupado = memoria.ocupado
+        memoria.set('a', 'x'*100)
+        self.assertLess(memoria.ocupado, ocupado)
+        memoria.get('a')
+        # No cabe: se desaloja b, la usada hace más tiempo.
+        memoria.set('c', 'x'*700)
+        self.assertIsNone(memoria.get('b'))
+        self.assertIsNotNone(memoria.get('a'))
+        self.assertLessEqual(memoria.ocupado, 1000)
+        memoria.delete('c')
+        memoria.set('z', 'x'*5000)
+        self.assertIsNone(memoria.get('z'))
+        self.assertEqual(memoria.ocupado, sum(memoria._tamanos.values()))
+        memoria.clear()
+        self.assertEqual(memoria.ocupado, 0)
+
+
+class ResultadoTests(TestCase):
+    problema = {'tipo': 'simple', 'eq': 'x**2', 'a': '0', 'b': '1', 'metodo': '2', 'particiones': '4'}
+
+    def test_se_guarda_y_reutiliza(self):
+        contexto = views.obtener_resultado(views.entrada_canonica(self.problema))
+        fila = Resultado.objects.get()
+        self.assertEqual((fila.tipo, fila.usos, fila.version), ('simple', 1, VERSION_METODOS))
+        self.assertEqual(fila.pasos, json.loads(json.dumps(contexto['pasos'], default = str)))
+        # Entradas equivalentes dan el mismo hash y no se recalculan.
+        equivalente = dict(self.problema, eq = 'x*x', a = '0.0', particiones = 4)
+        with mock.patch.object(views, 'calcular', side_effect = AssertionError('recalculó')):
+            guardado = views.obtener_resultado(views.entrada_canonica(equivalente))
+        self.assertEqual(guardado['aproximacion'], contexto['aproximacion'])
+        self.assertEqual(Resultado.objects.get().usos, 2)
+
+    def test_otra_version_se_recalcula(self):
+        entrada = views.entrada_canonica(self.problema)
+        views.obtener_resultado(entrada)
+        Resultado.objects.update(version = 0)
+        with mock.patch.object(views, 'calcular', wraps = views.calcular) as calcular:
+            views.obtener_resultado(entrada)
+        calcular.assert_called_once()
+        self.assertEqual(Resultado.objects.get().version, VERSION_METODOS)
+
+    def test_comando_resultados(self):
+        with self.assertRaises(CommandError):
+            call_command('resultados')
+        with tempfile.NamedTemporaryFile('w', suffix = '.json', delete = False) as archivo:
+            json.dump([self.problema, dict(self.problema, eq = 'x**3')], archivo)
+        self.addCleanup(os.remove, archivo.name)
+        call_command('resultados', archivo = archivo.name, stdout = io.StringIO())
+        self.assertEqual(Resultado.objects.count(), 2)
+
+        viejo = Resultado.objects.get(entrada__eq = 'x**3')
+        Resultado.objects.filter(pk = viejo.pk).update(version = 0)
+        with mock.patch.object(views, 'calcular', wraps = views.calcular) as calcular:
+            call_command('resultados', frecuentes = 5, stdout = io.StringIO())
+        calcular.assert_called_once()
+        self.assertEqual(Resultado.objects.get(pk = viejo.pk).version, VERSION_METODOS)
+
+        Resultado.objects.filter(pk = viejo.pk).update(usado = timezone.now() - timedelta(days = 100))
+        Resultado.objects.exclude(pk = viejo.pk).update(version = 0)
+        call_command('resultados', podar = True, stdout = io.StringIO())
+        self.assertFalse(Resultado.objects.exists())
+
+
+class AnalisisTests(SimpleTestCase):
+    def test_niveles(self):
+        casos = {'x**2 + sin(x)': 'completo',
+                 ' + '.join(str(i) + '*x**' + str(i) for i in range(1, 35)): 'resumido',
+                 'gamma(x) + x': 'numerico',
+                 'x**2000': 'numerico',
+                 'exp(exp(exp(exp(x))))': 'numerico',
+                 'exp(sin(x**2))*cos(exp(x**3))': 'numerico',
+                 'x**(10**7)': 'rechazar',
+                 'sin('*70 + 'x' + ')'*70: 'rechazar'}
+        for expresion, nivel in casos.items():
+            with self.subTest(expresion[:30]):
+                self.assertEqual(analizar(expresion).nivel, nivel)
+
+    def test_metricas(self):
+        analisis = analizar('exp(sin(x**2)) + besselj(0, x)')
+        self.assertEqual(analisis.anidamiento, 2)
+        # exp(sin(x**2)) y sin(x**2); besselj(0, x) tiene argumento lineal.
+        self.assertEqual(analisis.compuestas, 2)
+        self.assertEqual(analisis.especiales, ['besselj'])
+        self.assertEqual(analisis.exponente, 2)
+
+    def test_verificar(self):
+        self.assertEqual(analizar('x').verificar().nivel, 'completo')
+        with self.assertRaises(ExpresionCostosa) as contexto:
+            analizar('x**(10**7)').verificar()
+        self.assertIn('exponente', contexto.exception.motivo)
+
+    def test_literales_gigantes(self):
+        for texto in ('10^{10^{9}}', '(10^{7})!', 'x+2^{100000}'):
+            with self.subTest(texto), self.assertRaises(ErrorLatex):
+                latex_a_expresion(texto)
+        self.assertEqual(latex_a_expresion('2^{10}+x'), sympy.Symbol('x') + 1024)
+
+
+@SIN_MANIFIESTO
+class NivelesEnVistaTests(TestCase):
+    def enviar(self, eq):
+        return self.client.post('/integracion/submit/', {'eq': eq, 'a': '0', 'b': '1', 'metodo': '2', 'particiones': '4', 'tipo': 'simple'},
+                                HTTP_REFERER = 'http://x/integracion/simple/')
+
+    def test_aviso_y_rechazo(self):
+        self.enviar('x^2')
+        self.assertIsNone(self.client.get('/integracion/view/').context['aviso'])
+        self.enviar('x^{2000}')
+        respuesta = self.client.get('/integracion/view/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('exponentes muy grandes', respuesta.context['aviso'])
+        rechazo = self.enviar('x^{10000000}')
+        self.assertEqual(rechazo['Location'], 'http://x/integracion/simple/')
+        self.assertEqual(self.client.session['eq'], 'x**2000')
+
+
+class VueloUnicoTests(SimpleTestCase):
+    llave = 'ab'*32
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+
+    def en_hilos(self, funcion, n = 8):
+        resultados, hilos = [None]*n, []
+        def correr(i):
+            try:
+                resultados[i] = funcion(i)
+            except Exception as e:
+                resultados[i] = e
+        for i in range(n):
+            hilos.append(threading.Thread(target = correr, args = (i,)))
+            hilos[-1].start()
+        for hilo in hilos:
+            hilo.join()
+        return resultados
+
+    def test_un_calculo_por_llave(self):
+        vuelos = VueloUnico(self.directorio)
+        llamadas = []
+        def calcular():
+            llamadas.append(1)
+            time.sleep(0.2)
+            return {'valor': 1}
+        resultados = self.en_hilos(lambda i: vuelos.ejecutar(self.llave, calcular))
+        self.assertEqual(len(llamadas), 1)
+        self.assertEqual(resultados, [{'valor': 1}]*8)
+        # Cada petición recibe su propia copia del contexto.
+        self.assertEqual(len({id(r) for r in resultados}), 8)
+        self.assertEqual(vuelos._vuelos, {})
+
+    def test_error_compartido(self):
+        vuelos = VueloUnico(self.directorio)
+        def calcular():
+            time.sleep(0.2)
+            raise ValueError('falló')
+        resultados = self.en_hilos(lambda i: vuelos.ejecutar(self.llave, calcular))
+        self.assertTrue(all(isinstance(r, ValueError) for r in resultados))
+        self.assertEqual(vuelos.ejecutar(self.llave, lambda: 2), 2)
+
+    def test_otro_proceso_ya_lo_guardo(self):
+        # Dos instancias no comparten _vuelos, como dos procesos; solo el
+        # candado de archivo y el almacén las coordinan.
+        almacen, llamadas = {}, []
+        def calcular():
+            llamadas.append(1)
+            time.sleep(0.2)
+            almacen[self.llave] = 'listo'
+            return 'listo'
+        instancias = [VueloUnico(self.directorio) for _ in range(4)]
+        resultados = self.en_hilos(lambda i: instancias[i].ejecutar(self.llave, calcular, lambda: almacen.get(self.llave)), n = 4)
+        self.assertEqual(resultados, ['listo']*4)
+        self.assertEqual(len(llamadas), 1)
+        with mock.patch.object(instancias[0], '_archivo', side_effect = AssertionError('tomó el candado')):
+            self.assertEqual(instancias[0].ejecutar(self.llave, calcular, lambda: almacen.get(self.llave)), 'listo')
+
+    def test_espera_acotada(self):
+        vuelos = VueloUnico(self.directorio, espera = 0.1)
+        with vuelos._archivo(self.llave), self.assertLogs('symboesfm.vuelo', 'WARNING'):
+            inicio = time.monotonic()
+            self.assertEqual(VueloUnico(self.directorio, espera = 0.1).ejecutar(self.llave, lambda: 3), 3)
+        self.assertLess(time.monotonic() - inicio, 5)
+
+
+class GraficaTests(SimpleTestCase):
+    def test_lttb(self):
+        x = np.linspace(0, 1, 10000)
+        y = np.sin(6*x)
+        y[3137] = 50
+        elegidos = reducir_lttb(x, y, 200)
+        self.assertEqual(len(elegidos), 200)
+        self.assertEqual((elegidos[0], elegidos[-1]), (0, 9999))
+        self.assertTrue(np.all(np.diff(elegidos) > 0))
+        # Un pico aislado no se pierde, como con tomar cada k-ésimo punto.
+        self.assertIn(3137, elegidos)
+        np.testing.assert_array_equal(reducir_lttb(x[:50], y[:50], 200), np.arange(50))
+
+    def test_serie_con_valores_no_finitos(self):
+        with np.errstate(divide = 'ignore'):
+            serie = serie_grafica(np.linspace(0, 1, 1000), 1/np.linspace(0, 1, 1000), 100)
+        self.assertEqual(len(serie), 100)
+        self.assertEqual(serie[0], [0.0, None])
+        self.assertEqual(serie[-1], [1.0, 1.0])
+        json.dumps(serie, allow_nan = False)
+
+    def test_paneles_de_simpson(self):
+        # particiones cuenta aplicaciones de la regla: dos parábolas.
+        datos = grafica_integral('x**2', [0, 1], '2', 2)
+        self.assertEqual(len(datos['funcion']), 200)
+        self.assertEqual([panel['x'] for panel in datos['paneles']], [[0.0, 0.5], [0.5, 1.0]])
+        # La parábola de Simpson es la misma x**2: en Bézier, puntos de control 0, 0, 0.25 y 0.25, 0.5, 1.
+        self.assertEqual([panel['y'] for panel in datos['paneles']], [[0.0, 0.0, 0.25], [0.25, 0.5, 1.0]])
+        self.assertNotIn('paneles', grafica_integral('x**2', [0, 1], '2', 1000))
+
+    def test_integral_doble(self):
+        datos = grafica_integral('x*y', ['0', 'x'], '1', 4, [0, 1])
+        self.assertEqual(datos['region'], 'variable')
+        rectangulo = grafica_integral('x*y', [0, 1], '1', 4, [0, 2])
+        self.assertEqual(rectangulo['nodos_y'], [0.0, 0.5, 1.0, 1.5, 2.0])
+
+
+@SIN_MANIFIESTO
+class GraficaVistaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def enviar(self, **cambios):
+        problema = dict({'eq': '\\sin\\left(x\\right)', 'a': '0', 'b': '3', 'metodo': '1', 'particiones': '6', 'tipo': 'simple'}, **cambios)
+        self.client.post('/integracion/submit/', problema, HTTP_REFERER = 'http://x/integracion/simple/')
+
+    def test_json_y_etag(self):
+        self.assertEqual(self.client.get('/integracion/grafica/').status_code, 404)
+        self.enviar()
+        respuesta = self.client.get('/integracion/grafica/')
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertEqual(len(datos['paneles']), 6)
+        self.assertLess(len(respuesta.content), 10000)
+        with mock.patch.object(views, 'grafica_integral', side_effect = AssertionError('recalculó')):
+            self.assertEqual(self.client.get('/integracion/grafica/', HTTP_IF_NONE_MATCH = respuesta['ETag']).status_code, 304)
+            self.assertEqual(self.client.get('/integracion/grafica/').json(), datos)
+
+    def test_limite_infinito(self):
+        self.enviar(eq = 'e^{-x}', b = 'oo', metodo = '5')
+        self.assertEqual(self.client.get('/integracion/grafica/').status_code, 422)
+
+
+class CompararTests(SimpleTestCase):
+    def test_malla_comun(self):
+        self.assertEqual(subintervalos_comunes(7, ['1', '2', '3']), 12)
+        self.assertEqual(subintervalos_comunes(7, ['1', '2']), 8)
+        self.assertEqual(subintervalos_comunes(7, ['1']), 7)
+        with self.assertRaises(ValueError):
+            subintervalos_comunes(7, ['4'])
+
+    def test_igual_que_cada_regla(self):
+        resultados = integracion_numerica([0, 2], 'exp(x)*sin(x)').comparar(10, errores = False)
+        self.assertEqual([(r['subintervalos'], r['particiones']) for r in resultados], [(12, 12), (12, 6), (12, 4)])
+        individuales = (integracion_numerica([0, 2], 'exp(x)*sin(x)').trapezoidal_compuesto(12, errores = False),
+                        integracion_numerica([0, 2], 'exp(x)*sin(x)').simpson1_3_compuesto(6, errores = False),
+                        integracion_numerica([0, 2], 'exp(x)*sin(x)').simpson3_8_compuesto(4, errores = False))
+        for resultado, individual in zip(resultados, individuales):
+            self.assertAlmostEqual(float(resultado['aproximacion']), float(individual), places = 12)
+
+    def test_una_sola_evaluacion(self):
+        integral = integracion_numerica([0, 1], 'cos(x)')
+        with mock.patch.object(integral, '_evaluar', wraps = integral._evaluar) as evaluar:
+            integral.comparar(60, errores = False)
+        evaluar.assert_called_once()
+        self.assertEqual(len(evaluar.call_args.args[0]), 61)
+
+    def test_funcion_sin_estado(self):
+        resultados = metodos.comparar(metodos.compilar('x**3'), [0, 1], 6, ['2', '3'])
+        self.assertEqual([r.metodo for r in resultados], ['Simpson 1/3 compuesto', 'Simpson 3/8 compuesto'])
+        for resultado in resultados:
+            self.assertAlmostEqual(float(resultado.valor), 0.25, places = 12)
+        self.assertIs(resultados[0].pasos, resultados[1].pasos)
+
+
+@SIN_MANIFIESTO
+class ComparacionVistaTests(TestCase):
+    def enviar(self, **cambios):
+        problema = dict({'eq': 'x^4', 'a': '0', 'b': '1', 'metodo': ['1', '3'], 'particiones': '5', 'tipo': 'comparacion'}, **cambios)
+        self.client.post('/integracion/submit/', problema, HTTP_REFERER = 'http://x/integracion/comparacion/')
+        return self.client.get('/integracion/view/')
+
+    def test_tabla(self):
+        respuesta = self.enviar()
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['subintervalos'], 6)
+        self.assertEqual([c['particiones'] for c in respuesta.context['resultados']], [6, 2])
+        self.assertEqual(len(respuesta.context['errores'][0]), 3)
+
+    def test_datos_invalidos(self):
+        self.assertRedirects(self.enviar(metodo = ['4']), '/integracion/comparacion/')
+        self.assertRedirects(self.enviar(b = 'oo'), '/integracion/comparacion/')
+        self.assertRedirects(self.enviar(eq = '\\frac{1}{x}'), '/integracion/comparacion/')
+
+
+class IntegrarTests(SimpleTestCase):
+    def test_igual_que_integracion_numerica(self):
+        resultado = metodos.integrar('exp(x)', [0, 1], 'simpson1_3_compuesto', 10)
+        integral = integracion_numerica([0, 1], 'exp(x)')
+        self.assertEqual(float(resultado.valor), float(integral.simpson1_3_compuesto(10)))
+        self.assertEqual(resultado.metodo, integral.metodo)
+        self.assertEqual([nombre for nombre, _ in resultado.errores], list(integral.errores().index))
+        self.assertEqual(metodos.integrar('exp(x)', [0, 1], 'romberg', n = 4, metodo = '1', tabla_errores = False).errores, ())
+
+    def test_resultado_inmutable(self):
+        resultado = metodos.integrar('x**2', [0, 1], 'trapezoidal_compuesto', 4)
+        self.assertIsInstance(resultado.pasos, tuple)
+        with self.assertRaises(TypeError):
+            resultado.pasos[0]['titulo'] = 'otro'
+        with self.assertRaises(AttributeError):
+            resultado.valor = 0
+        pasos = metodos.descongelar(resultado.pasos)
+        pasos[0]['titulo'] = 'otro'
+        self.assertNotEqual(resultado.pasos[0]['titulo'], 'otro')
+        json.dumps(pasos, default = str)
+
+    def test_integrando_compartido(self):
+        funcion = metodos.compilar('sin(x)')
+        self.assertIs(metodos.compilar('sin(x)'), funcion)
+        with self.assertRaises(AttributeError):
+            funcion.exp = sympy.Symbol('x')
+        exacta = funcion.exacta(0, 1)
+        with mock.patch.object(metodos, 'integrate', side_effect = AssertionError('integró otra vez')):
+            self.assertIs(funcion.exacta(0, 1), exacta)
+        for b in range(2, 2 + funcion.MAX_EXACTAS + 2):
+            funcion.exacta(0, b)
+        self.assertEqual(len(funcion._exactas), funcion.MAX_EXACTAS)
+
+    def test_metodo_desconocido(self):
+        for metodo in ('_evaluar', 'errores', 'no_existe'):
+            with self.subTest(metodo), self.assertRaises(ValueError):
+                metodos.integrar('x', [0, 1], metodo)
+
+    def test_en_varios_hilos(self):
+        funcion = metodos.compilar('exp(-x**2)')
+        esperados = {n: float(integracion_numerica([0, 2], 'exp(-x**2)').simpson3_8_compuesto(n)) for n in range(1, 9)}
+        with ThreadPoolExecutor(8) as hilos:
+            valores = dict(zip(esperados, hilos.map(lambda n: float(metodos.integrar(funcion, [0, 2], 'simpson3_8_compuesto', n).valor), esperados)))
+        self.assertEqual(valores, esperados)
@@ -0,0 +1,475 @@
+import json
+import math
+import time
+import hashlib
+import logging
+from functools import lru_cache
+from django.shortcuts import render, redirect
+from django.http import JsonResponse, HttpResponse
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import F
+from django.utils import timezone
+from django.template.loader import get_template
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from django.conf import settings
+from sympy import parse_expr, latex, integrate, symbols, sympify
+from symboesfm.metodos import (integracion_numerica, integracion_tabular, grafica_integral, niveles_clenshaw_curtis, compilar, integrar,
+                               comparar, extremo_singular, descongelar, subintervalos_comunes, REGLAS)
+from symboesfm.lector_latex import latex_a_texto, ErrorLatex
+from symboesfm.costo import analizar, ExpresionCostosa
+from symboesfm.vuelo import VueloUnico
+from .models import Resultado, hash_problema, VERSION_METODOS
+
+logger = logging.getLogger(__name__)
+
+# Peticiones simultáneas del mismo problema esperan a la primera (ver obtener_resultado).
+vuelos = VueloUnico(settings.VUELO_DIRECTORIO, settings.VUELO_ESPERA)
+
+# Plantillas que forman la página de resultados; si cambia alguna, cambia la
+# versión y las páginas guardadas en el cache dejan de usarse.
+PLANTILLAS_RESULTADO = ('base.html', 'navbar.html', 'integracion/view.html', 'integracion/view_convergencia.html',
+                        'integracion/view_comparacion.html')
+ENTRADAS = ('tipo', 'eq', 'a', 'b', 'c', 'd', 'metodo', 'particiones', 'archivo', 'aproximacion')
+
+@lru_cache(maxsize = None)
+def version_plantillas():
+    fuentes = ''.join(get_template(nombre).template.source for nombre in PLANTILLAS_RESULTADO)
+    return hashlib.sha256(fuentes.encode()).hexdigest()[:12]
+
+def version_resultados():
+    # Una página o gráfica guardada deja de servir si cambian las plantillas
+    # o los métodos (VERSION_METODOS, igual que en obtener_resultado).
+    return str(VERSION_METODOS) + '-' + version_plantillas()
+
+def hash_entrada(request):
+    """
+        Hash de los datos del problema guardados en la sesión (más el formato
+        pedido por GET). Dos sesiones con el mismo problema comparten el hash.
+    """
+    entrada = {clave: request.session.get(clave) for clave in ENTRADAS}
+    entrada['formato'] = request.GET.get('formato')
+    texto = json.dumps(entrada, sort_keys = True, default = str)
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+def _etag(request):
+    # Sin problema en la sesión o con mensajes pendientes no hay página que reutilizar.
+    if 'tipo' not in request.session or len(messages.get_messages(request)):
+        return None
+    return hash_entrada(request)[:32] + '-' + version_resultados()
+
+@condition(etag_func = _etag)
+def view(request):
+    """
+        Página de resultados. La página ya renderizada se guarda en el cache con
+        el hash de la entrada y la versión de las plantillas y los métodos, así
+        que recargarla no vuelve a ejecutar el método ni la plantilla. El ETag
+        es la misma clave, de modo que el navegador recibe 304 si ya tiene la
+        página.
+    """
+    etag = _etag(request)
+    clave = 'view:' + str(etag)
+    guardada = cache.get(clave) if etag else None
+    if guardada is not None:
+        response = HttpResponse(guardada['contenido'], content_type = guardada['tipo'])
+    else:
+        response = _resolver(request)
+        if etag and response.status_code == 200:
+            cache.set(clave, {'contenido': response.content, 'tipo': response['Content-Type']})
+    patch_cache_control(response, private = True, no_cache = True)
+    return response
+
+def entrada_canonica(datos):
+    """
+        Normaliza los datos de un problema (de la sesión o de un archivo de
+        problemas) para que entradas equivalentes den el mismo hash:
+        la función se reescribe con sympy, los límites numéricos se vuelven
+        float (los infinitos, 'oo' o '-oo') y las particiones int.
+    """
+    def limite(valor):
+        try:
+            valor = float(valor)
+        except (TypeError, ValueError):
+            return str(parse_expr(str(valor)))
+        return valor if math.isfinite(valor) else str(sympify(valor))
+
+    tipo = datos['tipo']
+    entrada = {'tipo': tipo, 'eq': str(parse_expr(datos['eq']))}
+    if tipo == 'indefinida':
+        return entrada
+    entrada.update({'a': limite(datos['a']), 'b': limite(datos['b']), 'metodo': str(datos['metodo'])})
+    entrada['particiones'] = int(datos['particiones'])
+    if tipo == 'doble':
+        entrada.update({'c': float(datos['c']), 'd': float(datos['d'])})
+    return entrada
+
+def _opciones(analisis):
+    # Según el costo estimado de la función (ver symboesfm.costo) se omiten las
+    # derivadas e integrales simbólicas y/o el detalle de cada punto de soporte.
+    opciones = {'simbolico': analisis.nivel != 'numerico'}
+    # Sin funciones especiales la función se compila con numpy y los pasos
+    # resumidos evalúan todos los puntos de una vez.
+    if analisis.nivel in ('numerico', 'resumido') and not analisis.especiales:
+        opciones['detalle'] = 0
+    return opciones
+
+def _latex_limite(valor):
+    valor = sympify(valor)
+    return '%g' % valor if valor.is_Float else latex(valor)
+
+def _tanh_sinh(funcion, entrada, nombres, opciones):
+    # Con un extremo singular o infinito las reglas de Newton-Cotes, Romberg y
+    # Clenshaw-Curtis evalúan zoo o nan; se usa tanh-sinh aunque se haya
+    # elegido otro método. Regresa el resultado y el aviso, o (None, None).
+    limites = [entrada['a'], entrada['b']]
+    extremo = extremo_singular(funcion, limites)
+    if entrada['metodo'] != '5' and extremo is None:
+        return None, None
+    resultado = integrar(funcion, limites, 'tanh_sinh', **opciones)
+    if entrada['metodo'] == '5':
+        return resultado, None
+    motivo = 'El intervalo es infinito' if extremo.is_infinite else 'La función no es finita en \\( x = ' + _latex_limite(extremo) + ' \\)'
+    return resultado, motivo + ', así que se usó tanh-sinh en lugar de ' + nombres[entrada['metodo']] + '.'
+
+def calcular(entrada):
+    """
+        Ejecuta el método indicado por entrada (ver entrada_canonica) y regresa
+        el contexto de integracion/view.html, sin pasos, junto con los pasos.
+        Todo el contexto se puede guardar como JSON.
+
+        La función compilada (ver compilar) se comparte entre peticiones y
+        cada cálculo usa integrar, que no tiene estado compartido.
+
+        Lanza ExpresionCostosa, antes de compilar la función, si es demasiado
+        costosa para el tipo de problema.
+    """
+    tipo = entrada['tipo']
+    analisis = analizar(entrada['eq']).verificar()
+    if tipo == 'indefinida' and analisis.nivel == 'numerico':
+        raise ExpresionCostosa(analisis.motivo.split(',')[0] + ' y no se puede integrar simbólicamente')
+    equation = latex(parse_expr(entrada['eq']))
+    if tipo == 'indefinida':
+        x = symbols('x')
+        aproximacion = integrate(parse_expr(entrada['eq']), x)
+        contexto = {'equation': equation, 'aproximacion': latex(aproximacion), 'metodo':None, 'tipo':'Indeinida', 'errores':None}
+        return contexto, []
+
+    funcion = compilar(entrada['eq'])
+    opciones = _opciones(analisis)
+    cambio = None
+    if tipo == 'simple':
+        metodos = {'1':'trapezoidal_compuesto',
+                   '2':'simpson1_3_compuesto',
+                   '3':'simpson3_8_compuesto',
+                   '4':'clenshaw_curtis'}
+
+        nombres = {'1':'Trapezoidal',
+                   '2':'Simpson 1/3',
+                   '3':'Simpson 3/8',
+                   '4':'Clenshaw-Curtis',
+                   '5':'Tanh-sinh'}
+
+        resultado, cambio = _tanh_sinh(funcion, entrada, nombres, opciones)
+        if resultado is None:
+            resultado = integrar(funcion, [entrada['a'], entrada['b']], metodos[entrada['metodo']], entrada['particiones'], **opciones)
+        contexto = {'equation': equation, 'metodo': resultado.metodo if cambio else nombres[entrada['metodo']], 'tipo':'simple'}
+        pasos = resultado.pasos
+
+    elif tipo == 'doble':
+        a = entrada['a']
+        b = entrada['b']
+        if isinstance(a, str) or isinstance(b, str):
+            tipo = 'doble2'
+            aa = latex(parse_expr(str(a))).replace('\\','*').replace('*',chr(92))
+            bb = latex(parse_expr(str(b))).replace('\\','*').replace('*',chr(92))
+        else:
+            tipo = 'doble1'
+            aa = None
+            bb = None
+
+        metodos = {'1':'trapecio_compuesto_doble',
+                   '2':'simpson1_3_compuesto_doble',
+                   '3':'simpson3_8_compuesto_doble',
+                   '4':'clenshaw_curtis_doble'}
+
+        nombres = {'1':'Trapezoidal Doble',
+                   '2':'Simpson 1/3 Doble',
+                   '3':'Simpson 3/8 Doble',
+                   '4':'Clenshaw-Curtis Doble'}
+
+        resultado = integrar(funcion, [a, b], metodos[entrada['metodo']], [entrada['c'], entrada['d']], entrada['particiones'], **opciones)
+        contexto = {'equation': equation, 'metodo': nombres[entrada['metodo']], 'tipo':tipo, 'aa':aa, 'bb':bb}
+        pasos = resultado.pasos
+
+    elif tipo == 'extrapolacion':
+        nombres = {'1':'Romberg con Trapezoidal',
+                   '2':'Romberg con Simpson 1/3',
+                   '3':'Romberg con Simpson 3/8',
+                   '4':'Clenshaw-Curtis',
+                   '5':'Tanh-sinh'}
+
+        limites = [entrada['a'], entrada['b']]
+        resultado, cambio = _tanh_sinh(funcion, entrada, nombres, opciones)
+        if resultado is not None:
+            # Como con Clenshaw-Curtis, los niveles sí se muestran.
+            pasos = resultado.pasos
+        elif entrada['metodo'] == '4':
+            # Los niveles anidados hacen el papel de la tabla de Romberg; sus pasos sí se muestran.
+            resultado = integrar(funcion, limites, 'clenshaw_curtis', entrada['particiones'], **opciones)
+            pasos = resultado.pasos
+        else:
+            resultado = integrar(funcion, limites, 'romberg', n = entrada['particiones'], metodo = entrada['metodo'], **opciones)
+            # La página de Romberg no muestra pasos.
+            pasos = ()
+        contexto = {'equation': equation, 'metodo': resultado.metodo if cambio else nombres[entrada['metodo']], 'tipo':'romberg'}
+
+    else:
+        raise ValueError('No se puede calcular el tipo ' + tipo)
+
+    avisos = [] if analisis.nivel == 'completo' else ['La función ' + analisis.motivo + '.']
+    if cambio:
+        avisos.append(cambio)
+    contexto['aviso'] = ' '.join(avisos) or None
+    # Los límites infinitos llegan como 'oo'; en la integral se muestran como \infty.
+    contexto['limites'] = [_latex_limite(entrada['a']), _latex_limite(entrada['b'])] if tipo in ('simple', 'extrapolacion') else None
+    contexto['niveles'] = niveles_clenshaw_curtis(entrada['particiones'])[-1] if resultado.metodo.startswith('Clenshaw-Curtis') else None
+    # Mismo texto que mostraría la plantilla, así el contexto se puede guardar.
+    contexto['aproximacion'] = str(resultado.valor)
+    contexto['errores'] = [{'Error': nombre, 'Valor': None if valor is None else str(valor)} for nombre, valor in resultado.errores]
+    return contexto, descongelar(pasos)
+
+def _guardado(llave):
+    try:
+        guardado = Resultado.objects.filter(hash = llave, version = VERSION_METODOS).first()
+        if guardado is not None:
+            Resultado.objects.filter(pk = guardado.pk).update(usos = F('usos') + 1, usado = timezone.now())
+            return dict(guardado.contexto, aproximacion = guardado.aproximacion, errores = guardado.errores, pasos = guardado.pasos)
+    except DatabaseError:
+        logger.exception('No se pudo consultar la tabla de resultados')
+    return None
+
+def _calcular_y_guardar(entrada, llave):
+    inicio = time.perf_counter()
+    contexto, pasos = calcular(entrada)
+    tiempo = time.perf_counter() - inicio
+
+    resto = {k: v for k, v in contexto.items() if k not in ('aproximacion', 'errores')}
+    try:
+        Resultado.objects.update_or_create(hash = llave, defaults = {
+            'tipo': entrada['tipo'], 'entrada': entrada, 'aproximacion': contexto['aproximacion'],
+            'errores': contexto['errores'], 'contexto': resto, 'pasos_comprimidos': Resultado.comprimir(pasos),
+            'tiempo': tiempo, 'version': VERSION_METODOS})
+    except DatabaseError:
+        logger.exception('No se pudo guardar el resultado')
+    return dict(contexto, pasos = pasos)
+
+def obtener_resultado(entrada):
+    """
+        Busca el problema en la tabla Resultado; si no está (o se calculó con
+        otra versión de los métodos) lo calcula y lo guarda. Regresa el
+        contexto de la plantilla con los pasos incluidos.
+
+        Si el mismo problema ya se está calculando, en este proceso o en otro
+        del servidor, se espera ese cálculo en lugar de repetirlo.
+    """
+    llave = hash_problema(entrada)
+    return vuelos.ejecutar(llave, lambda: _calcular_y_guardar(entrada, llave), lambda: _guardado(llave))
+
+def _resolver(request):
+
+    if request.session['tipo'] in ('simple', 'doble', 'extrapolacion', 'indefinida'):
+        try:
+            contexto = obtener_resultado(entrada_canonica(request.session))
+        except ExpresionCostosa as e:
+            messages.error(request, str(e))
+            return redirect(request.session['tipo'])
+        return render(request, 'integracion/view.html', contexto)
+
+    if request.session['tipo'] == 'convergencia':
+
+        nombres = {'1':'Trapezoidal',
+                   '2':'Simpson 1/3',
+                   '3':'Simpson 3/8'}
+
+        try:
+            lista_particiones = [int(p) for p in request.session['particiones'].replace(',', ' ').split()]
+            assert lista_particiones and min(lista_particiones) > 0
+        except (ValueError, AssertionError):
+            messages.error(request, 'La lista de particiones debe tener enteros positivos separados por comas.')
+            return redirect('convergencia')
+
+        integral = integracion_numerica([float(request.session['a']), float(request.session['b'])], request.session['eq'])
+        tabla = integral.convergencia(lista_particiones, request.session['metodo'])
+        tabla = tabla.astype(object).where(tabla.notna(), None)
+
+        if request.GET.get('formato') == 'json':
+            return JsonResponse({'funcion': request.session['eq'], 'a': float(request.session['a']), 'b': float(request.session['b']),
+                                 'metodo': nombres[request.session['metodo']], 'tabla': tabla.to_dict('records')},
+                                json_dumps_params = {'ensure_ascii': False})
+
+        return render(request, 'integracion/view_convergencia.html', {'equation': latex(parse_expr(request.session['eq'])), 'metodo': nombres[request.session['metodo']], 'columnas': list(tabla.columns), 'filas': tabla.values.tolist(), 'pasos': integral.pasos})
+
+    elif request.session['tipo'] == 'comparacion':
+        return _comparacion(request)
+
+    elif request.session['tipo'] == 'tabular':
+        return render(request, 'integracion/view.html', {'equation': None, 'aproximacion': request.session['aproximacion'], 'metodo': request.session['metodo'], 'tipo':'tabular', 'errores':request.session['errores'], 'pasos':request.session['pasos']})
+def _comparacion(request):
+    try:
+        subintervalos = int(request.session['particiones'])
+        metodos = request.session['metodo']
+        a, b = float(parse_expr(request.session['a'])), float(parse_expr(request.session['b']))
+        assert subintervalos > 0 and metodos and set(metodos) <= {'1', '2', '3'}
+    except (ValueError, TypeError, SyntaxError, AssertionError):
+        messages.error(request, 'Elige al menos un método y un número de subintervalos positivo, con límites numéricos.')
+        return redirect('comparacion')
+
+    try:
+        analisis = analizar(request.session['eq']).verificar()
+    except ExpresionCostosa as e:
+        messages.error(request, str(e))
+        return redirect('comparacion')
+    funcion = compilar(request.session['eq'])
+    extremo = extremo_singular(funcion, [a, b])
+    if extremo is not None:
+        messages.error(request, ('El intervalo es infinito' if extremo.is_infinite else 'La función no es finita en x = ' + _latex_limite(extremo))
+                       + ': las reglas de Newton-Cotes no se pueden aplicar. Usa Tanh-sinh en Integración Simple.')
+        return redirect('comparacion')
+
+    resultados = comparar(funcion, [a, b], subintervalos, metodos, **_opciones(analisis))
+    # Una fila por error y una columna por método.
+    tablas = [dict(r.errores) for r in resultados]
+    errores = [[nombre] + [None if tabla[nombre] is None else str(tabla[nombre]) for tabla in tablas] for nombre, _ in resultados[0].errores]
+    n = subintervalos_comunes(subintervalos, metodos)
+    columnas = [{'metodo': r.metodo, 'particiones': n//REGLAS[metodo], 'aproximacion': r.valor}
+                for r, metodo in zip(resultados, sorted(set(metodos)))]
+    return render(request, 'integracion/view_comparacion.html', {
+        'equation': latex(parse_expr(request.session['eq'])), 'resultados': columnas, 'errores': errores,
+        'subintervalos': n, 'pasos': resultados[0].pasos,
+        'aviso': None if analisis.nivel == 'completo' else 'La función ' + analisis.motivo + '.'})
+
+def _etag_grafica(request):
+    if request.session.get('tipo') not in ('simple', 'doble', 'extrapolacion', 'convergencia'):
+        return None
+    return hash_entrada(request)[:32] + '-' + version_resultados()
+
+@condition(etag_func = _etag_grafica)
+def grafica(request):
+    """
+        JSON para graficar el problema de la sesión (ver grafica_integral): la
+        función reducida a unos cientos de puntos y los paneles del método, o
+        la malla de f(x, y) sobre la región de una integral doble. Romberg y
+        convergencia usan varias particiones, así que solo llevan la función.
+
+        Se guarda en el cache con el hash del problema y VERSION_METODOS.
+    """
+    tipo = request.session.get('tipo')
+    if _etag_grafica(request) is None:
+        return JsonResponse({'error': 'No hay una integral que graficar.'}, status = 404)
+
+    datos = dict(request.session.items())
+    if tipo == 'convergencia':
+        datos['particiones'] = 0
+    try:
+        entrada = entrada_canonica(datos)
+    except (KeyError, ValueError, TypeError, SyntaxError):
+        return JsonResponse({'error': 'Los datos de la integral no son válidos.'}, status = 400)
+    if tipo in ('extrapolacion', 'convergencia'):
+        entrada.update({'metodo': None, 'particiones': None})
+
+    if 'oo' in (entrada['a'], entrada['b'], '-' + str(entrada['a'])):
+        return JsonResponse({'error': 'No se puede graficar una integral con un límite infinito.'}, status = 422)
+
+    clave = 'grafica:' + hash_problema(entrada) + ':' + str(VERSION_METODOS)
+    contenido = cache.get(clave)
+    if contenido is None:
+        try:
+            contenido = grafica_integral(entrada['eq'], [entrada['a'], entrada['b']], entrada['metodo'], entrada['particiones'],
+                                         [entrada['c'], entrada['d']] if tipo == 'doble' else None)
+        except Exception:
+            # lambdify no conoce algunas funciones especiales, o la función no
+            # se puede evaluar con numpy en la región.
+            logger.exception('No se pudo graficar %s', entrada['eq'])
+            return JsonResponse({'error': 'No se pudo evaluar la función para graficarla.'}, status = 422)
+        cache.set(clave, contenido)
+
+    response = JsonResponse(contenido)
+    patch_cache_control(response, private = True, no_cache = True)
+    return response
+
+def indefinida(request):
+    return render(request, 'integracion/indefinida.html')
+def simple(request):
+
+    return render(request, 'integracion/simple.html')
+
+def doble(request):
+
+    return render(request, 'integracion/doble.html')
+
+def extrapolacion(request):
+    return render(request, 'integracion/extrapolacion.html')
+
+def convergencia(request):
+    return render(request, 'integracion/convergencia.html')
+
+def comparacion(request):
+    return render(request, 'integracion/comparacion.html')
+
+def tabular(request):
+    if request.method != 'POST':
+        return render(request, 'integracion/tabular.html')
+
+    archivo = request.FILES['archivo']
+    nombres = {'1':'Trapezoidal',
+               '2':'Simpson 1/3'}
+    # Los archivos grandes ya están en disco y el .npy se puede leer con mmap
+    ruta = archivo.temporary_file_path() if hasattr(archivo, 'temporary_file_path') else archivo
+    formato = 'npy' if archivo.name.lower().endswith('.npy') else 'csv'
+    integral = integracion_tabular(ruta, formato)
+    metodos = {'1':integral.trapezoidal,
+               '2':integral.simpson1_3}
+    try:
+        aproximacion = metodos[request.POST['metodo']]()
+    except (ValueError, KeyError) as e:
+        messages.error(request, 'No se pudieron integrar los datos de ' + archivo.name + ': ' + str(e))
+        return redirect('tabular')
+
+    request.session['tipo'] = 'tabular'
+    request.session['archivo'] = archivo.name
+    request.session['metodo'] = nombres[request.POST['metodo']]
+    request.session['aproximacion'] = aproximacion
+    request.session['errores'] = integral.errores().reset_index().to_dict('records')
+    request.session['pasos'] = integral.pasos
+    return redirect('view')
+
+def submit(request):
+    if request.method != 'POST':
+        return redirect('home')
+
+    try:
+        eq = latex_a_texto(request.POST['eq'])
+        analizar(eq).verificar()
+    except (ErrorLatex, ExpresionCostosa) as e:
+        messages.error(request, str(e))
+        return redirect(request.META.get('HTTP_REFERER', 'home'))
+
+    if 'indefinida' in request.META.get('HTTP_REFERER', ''):
+        request.session['eq'] = eq
+        request.session['tipo'] = 'indefinida'
+        return redirect('view')
+
+    request.session['eq'] = eq
+    request.session['eql'] = request.POST['eq']
+    request.session['a'] = request.POST['a']
+    request.session['b'] = request.POST['b']
+    # La comparación recibe varios métodos (casillas con el mismo nombre).
+    request.session['metodo'] = request.POST.getlist('metodo') if request.POST['tipo'] == 'comparacion' else request.POST['metodo']
+    request.session['particiones'] = request.POST['particiones']
+    request.session['tipo'] = request.POST['tipo']
+    if request.session['tipo'] == 'doble':
+        request.session['c'] = request.POST['c']
+        request.session['d'] = request.POST['d']
+    return redirect('view')
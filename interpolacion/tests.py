@@ -0,0 +1,69 @@
+import math
+import numpy as np
+from django.test import TestCase, SimpleTestCase, override_settings
+from symboesfm.metodos import interpolacion, nodos_chebyshev
+
+SIN_MANIFIESTO = override_settings(STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage')
+
+
+class InterpolacionTests(SimpleTestCase):
+    def test_reproduce_polinomios(self):
+        x = [0, 0.5, 1.5, 2, 3]
+        y = [v**4 - 2*v + 1 for v in x]
+        puntos = np.linspace(-1, 4, 11)
+        for metodo in ('lagrange', 'newton'):
+            with self.subTest(metodo):
+                valores = getattr(interpolacion(x, y), metodo)(puntos)
+                np.testing.assert_allclose(valores, puntos**4 - 2*puntos + 1, rtol = 1e-10, atol = 1e-10)
+
+    def test_pasa_por_los_nodos(self):
+        x = [3, 0, 1, 2]
+        y = [9, 4, -1, 0]
+        for metodo in ('lagrange', 'newton', 'spline'):
+            with self.subTest(metodo):
+                np.testing.assert_allclose(getattr(interpolacion(x, y), metodo)(x), y, atol = 1e-12)
+
+    def test_spline_natural(self):
+        p = interpolacion(np.linspace(0, math.pi, 41), funcion_texto = 'sin(x)')
+        p.spline([1.0])
+        self.assertLess(p.errores().loc['Verdadero', 'Valor'], 1e-4)
+
+    def test_chebyshev_contra_runge(self):
+        def error(x):
+            p = interpolacion(x, funcion_texto = '1/(1 + 25*x**2)')
+            p.lagrange([0.0])
+            return p.errores().loc['Verdadero', 'Valor']
+        self.assertGreater(error(np.linspace(-1, 1, 21)), 1)
+        self.assertLess(error(nodos_chebyshev(21, -1, 1)), 0.1)
+
+    def test_datos_invalidos(self):
+        for x, y in (([0, 1, 1], [1, 2, 3]), ([0], [1]), ([0, 1], [1, 2, 3])):
+            with self.assertRaises(ValueError):
+                interpolacion(x, y)
+
+    def test_grafica_conserva_los_nodos(self):
+        x = np.linspace(0, 1, 500)
+        p = interpolacion(x, np.sin(40*x))
+        p.spline([0.5])
+        grafica = p.grafica(presupuesto = 50)
+        self.assertEqual(len(grafica['interpolante']), 50)
+        self.assertEqual(len(grafica['nodos']), 500)
+        np.testing.assert_allclose(np.array(grafica['nodos'])[:, 0], x, rtol = 1e-5)
+
+
+@SIN_MANIFIESTO
+class InterpolacionVistaTests(TestCase):
+    def test_datos_y_json(self):
+        datos = '\n'.join('%g, %g' % (v, v**2) for v in range(300))
+        respuesta = self.client.post('/interpolacion/submit/', {'fuente': 'datos', 'datos': datos, 'metodo': '3', 'evaluar': '1.5'})
+        self.assertRedirects(respuesta, '/interpolacion/view/')
+        pagina = self.client.get('/interpolacion/view/')
+        self.assertEqual(pagina.status_code, 200)
+        self.assertAlmostEqual(pagina.context['filas'][0][1], 2.25, places = 1)
+        grafica = self.client.get('/interpolacion/view/', {'formato': 'json'}).json()
+        self.assertEqual(len(grafica['nodos']), 300)
+
+    def test_rechaza_metodo(self):
+        respuesta = self.client.post('/interpolacion/submit/', {'fuente': 'datos', 'datos': '0 0\n1 1', 'metodo': '12'})
+        self.assertRedirects(respuesta, '/interpolacion/')
+        self.assertNotIn('interpolacion', self.client.session)
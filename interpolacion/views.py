@@ -0,0 +1,104 @@
+import numpy as np
+from django.http import JsonResponse
+from django.shortcuts import render, redirect
+from django.contrib import messages
+from sympy import parse_expr, latex
+from symboesfm.metodos import interpolacion as interpolante, integracion_tabular, nodos_chebyshev
+from symboesfm.lector_latex import latex_a_texto, ErrorLatex
+
+# Más nodos no mejoran un polinomio interpolante y la sesión los guarda todos.
+MAX_NODOS = 2000
+# Tamaño del SVG de la gráfica, en unidades del viewBox; los nodos solo se
+# marcan si son pocos.
+ANCHO, ALTO = 600, 300
+MAX_MARCAS = 200
+
+def interpolacion(request):
+    return render(request, 'interpolacion/interpolacion.html', {'metodo': request.GET.get('metodo')})
+
+def _trazos(grafica):
+    """Convierte las series de la gráfica a coordenadas del viewBox del SVG."""
+    puntos = np.concatenate([np.asarray(serie) for serie in grafica.values()])
+    puntos = puntos[np.isfinite(puntos).all(axis = 1)]
+    minimo, maximo = puntos.min(axis = 0), puntos.max(axis = 0)
+    rango = np.where(maximo > minimo, maximo - minimo, 1)
+    trazos = {}
+    for nombre, serie in grafica.items():
+        serie = np.asarray(serie)
+        serie = serie[np.isfinite(serie).all(axis = 1)]
+        u = (serie[:, 0] - minimo[0])/rango[0]*ANCHO
+        v = ALTO - (serie[:, 1] - minimo[1])/rango[1]*ALTO
+        trazos[nombre] = list(zip(u.round(1), v.round(1)))
+    marcas = trazos.pop('nodos') if len(trazos['nodos']) <= MAX_MARCAS else []
+    return {nombre: ' '.join('%.1f,%.1f' % p for p in trazo) for nombre, trazo in trazos.items() if nombre != 'nodos'}, marcas
+
+def view(request):
+    datos = request.session.get('interpolacion')
+    if datos is None:
+        return redirect('interpolacion')
+
+    nombres = {'1':'Lagrange (forma baricéntrica)',
+               '2':'Polinomio de Newton',
+               '3':'Spline cúbico natural'}
+
+    try:
+        p = interpolante(datos['x'], datos['y'], datos['eq'])
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('interpolacion')
+    metodos = {'1':p.lagrange,
+               '2':p.newton,
+               '3':p.spline}
+
+    puntos = datos['evaluar'] or [float(p.x[0] + p.x[-1])/2]
+    valores = metodos[datos['metodo']](puntos)
+    grafica = p.grafica()
+    if request.GET.get('formato') == 'json':
+        return JsonResponse(grafica)
+
+    trazos, marcas = _trazos(grafica)
+    return render(request, 'interpolacion/view.html', {'equation': latex(parse_expr(datos['eq'])) if datos['eq'] else None,
+                                                       'metodo': nombres[datos['metodo']], 'nodos': len(p.x),
+                                                       'filas': [[float(t), float(v)] for t, v in zip(puntos, valores)],
+                                                       'errores': p.errores().reset_index().to_dict('records'),
+                                                       'trazos': trazos, 'marcas': marcas, 'ancho': ANCHO, 'alto': ALTO,
+                                                       'pasos': p.pasos})
+
+def _numeros(texto):
+    return [float(v) for v in texto.replace(',', ' ').replace(';', ' ').split()]
+
+def submit(request):
+    if request.method != 'POST':
+        return redirect('interpolacion')
+
+    fuente = request.POST.get('fuente')
+    eq, y = None, None
+    try:
+        if fuente == 'funcion':
+            eq = latex_a_texto(request.POST['eq'])
+            a, b, n = float(request.POST['a']), float(request.POST['b']), int(request.POST['n'])
+            assert b > a and 2 <= n <= MAX_NODOS
+            if request.POST.get('distribucion') == 'chebyshev':
+                x = nodos_chebyshev(n, a, b).tolist()
+            else:
+                x = np.linspace(a, b, n).tolist()
+        elif fuente == 'archivo':
+            archivo = request.FILES['archivo']
+            x, y = map(np.concatenate, zip(*integracion_tabular(archivo).bloques()))
+            x, y = x.tolist(), y.tolist()
+        else:
+            pares = [_numeros(renglon) for renglon in request.POST['datos'].splitlines() if renglon.strip()]
+            assert all(len(par) == 2 for par in pares)
+            x, y = [par[0] for par in pares], [par[1] for par in pares]
+        assert 2 <= len(x) <= MAX_NODOS
+        datos = {'x': x, 'y': y, 'eq': eq, 'metodo': request.POST['metodo'], 'evaluar': _numeros(request.POST.get('evaluar', ''))}
+        assert datos['metodo'] in ('1', '2', '3')
+    except ErrorLatex as e:
+        messages.error(request, str(e))
+        return redirect('interpolacion')
+    except (ValueError, AssertionError, KeyError):
+        messages.error(request, 'Revisa los datos: entre 2 y ' + str(MAX_NODOS) + ' puntos (x, y), uno por renglón, b mayor que a y un método.')
+        return redirect('interpolacion')
+
+    request.session['interpolacion'] = datos
+    return redirect('interpolacion_view')
@@ -0,0 +1,61 @@
+import math
+import numpy as np
+from django.test import TestCase, SimpleTestCase, override_settings
+from symboesfm.metodos import ecuacion_no_lineal
+
+SIN_MANIFIESTO = override_settings(STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage')
+
+METODOS = ('biseccion', 'falsa_posicion', 'secante', 'newton', 'brent')
+
+
+class EcuacionNoLinealTests(SimpleTestCase):
+    def test_raiz_simple(self):
+        for metodo in METODOS:
+            with self.subTest(metodo):
+                raices = getattr(ecuacion_no_lineal('x**2 - 2', [0, 2]), metodo)()
+                np.testing.assert_allclose(raices, [math.sqrt(2)], atol = 1e-9)
+
+    def test_todas_las_raices(self):
+        for metodo in METODOS:
+            with self.subTest(metodo):
+                ecuacion = ecuacion_no_lineal('sin(x)', [1, 10])
+                raices = getattr(ecuacion, metodo)()
+                np.testing.assert_allclose(sorted(raices), [math.pi, 2*math.pi, 3*math.pi], atol = 1e-9)
+                self.assertEqual(len(ecuacion.errores()), 3)
+
+    def test_cero_en_la_malla(self):
+        np.testing.assert_allclose(ecuacion_no_lineal('x - 1', [0, 2]).biseccion(), [1.0])
+
+    def test_sin_cambio_de_signo(self):
+        self.assertEqual(len(ecuacion_no_lineal('x**2 + 1', [-1, 1]).brent()), 0)
+
+    def test_otra_variable(self):
+        with self.assertRaises(TypeError):
+            ecuacion_no_lineal('x*y - 1', [0, 2]).biseccion()
+
+
+@SIN_MANIFIESTO
+class RaicesVistaTests(TestCase):
+    problema = {'eq': 'x^2-2', 'a': '0', 'b': '2', 'metodo': '5'}
+
+    def enviar(self, **cambios):
+        return self.client.post('/raices/submit/', dict(self.problema, **cambios))
+
+    def test_resuelve(self):
+        self.assertRedirects(self.enviar(), '/raices/view/')
+        respuesta = self.client.get('/raices/view/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['metodo'], 'Brent')
+        self.assertAlmostEqual(respuesta.context['raices'][0], math.sqrt(2))
+
+    def test_rechaza_datos_invalidos(self):
+        for cambios in ({'eq': 'x y-1'}, {'metodo': '12'}, {'metodo': ''}, {'metodo': '6'}, {'b': '-1'}):
+            with self.subTest(**cambios):
+                self.assertRedirects(self.enviar(**cambios), '/raices/')
+                self.assertNotIn('raices', self.client.session)
+
+    def test_sesion_no_evaluable(self):
+        sesion = self.client.session
+        sesion['raices'] = dict(eq = 'x*y - 1', a = 0.0, b = 2.0, metodo = '1', tolerancia = 1e-10)
+        sesion.save()
+        self.assertRedirects(self.client.get('/raices/view/'), '/raices/')
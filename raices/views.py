@@ -0,0 +1,59 @@
+from django.shortcuts import render, redirect
+from django.contrib import messages
+from sympy import parse_expr, latex, Symbol
+from symboesfm.metodos import ecuacion_no_lineal
+from symboesfm.lector_latex import latex_a_texto, ErrorLatex
+
+def raices(request):
+    return render(request, 'raices/raices.html', {'metodo': request.GET.get('metodo')})
+
+def view(request):
+    datos = request.session.get('raices')
+    if datos is None:
+        return redirect('raices')
+
+    nombres = {'1':'Bisección',
+               '2':'Falsa Posición',
+               '3':'Secante',
+               '4':'Newton-Raphson',
+               '5':'Brent'}
+
+    try:
+        ecuacion = ecuacion_no_lineal(datos['eq'], [datos['a'], datos['b']])
+        metodos = {'1':ecuacion.biseccion,
+                   '2':ecuacion.falsa_posicion,
+                   '3':ecuacion.secante,
+                   '4':ecuacion.newton,
+                   '5':ecuacion.brent}
+        raices = metodos[datos['metodo']](datos['tolerancia'])
+        errores = ecuacion.errores()
+    except (ValueError, TypeError) as e:
+        messages.error(request, str(e))
+        return redirect('raices')
+    return render(request, 'raices/view.html', {'equation': latex(parse_expr(datos['eq'])), 'metodo': nombres[datos['metodo']],
+                                                'raices': [float(r) for r in raices], 'columnas': list(errores.columns),
+                                                'filas': errores.astype(object).values.tolist(), 'pasos': ecuacion.pasos})
+
+def submit(request):
+    if request.method != 'POST':
+        return redirect('raices')
+
+    try:
+        eq = latex_a_texto(request.POST['eq'])
+    except ErrorLatex as e:
+        messages.error(request, str(e))
+        return redirect('raices')
+    if not parse_expr(eq).free_symbols <= {Symbol('x')}:
+        messages.error(request, 'La ecuación solo puede depender de x.')
+        return redirect('raices')
+
+    try:
+        datos = {'eq': eq, 'a': float(request.POST['a']), 'b': float(request.POST['b']),
+                 'metodo': request.POST['metodo'], 'tolerancia': float(request.POST.get('tolerancia') or 1e-10)}
+        assert datos['b'] > datos['a'] and datos['tolerancia'] > 0 and datos['metodo'] in ('1', '2', '3', '4', '5')
+    except (ValueError, AssertionError, KeyError):
+        messages.error(request, 'Revisa los datos: b debe ser mayor que a, elige un método y una tolerancia positiva.')
+        return redirect('raices')
+
+    request.session['raices'] = datos
+    return redirect('raices_view')
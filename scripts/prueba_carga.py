@@ -0,0 +1,277 @@
+"""
+Prueba de carga contra una instancia local (runserver o gunicorn).
+
+Cada usuario virtual tiene su propia sesión: abre el formulario, toma el
+token CSRF, envía el problema a /integracion/submit/ y sigue la redirección a
+/integracion/view/, igual que el navegador. La latencia de una petición es el
+tiempo de submit + view.
+
+Solo usa la biblioteca estándar. Ejemplos:
+
+    python scripts/prueba_carga.py --url http://127.0.0.1:8000 --usuarios 8 --duracion 60
+    python scripts/prueba_carga.py --mezcla simple=6,doble=1,extrapolacion=2,indefinida=1 --pid $(pgrep -of gunicorn)
+    python scripts/prueba_carga.py --unicos --salida reporte.json
+
+Con --pid se muestrea el RSS (/proc/<pid>/status) del proceso indicado y de
+sus hijos, que en gunicorn son los workers.
+"""
+import os
+import re
+import math
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import http.cookiejar
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+# Integrandos reales en el LaTeX que manda MathQuill.
+INTEGRANDOS = [r'x^2+\sin\left(x\right)', r'e^{x}\cos\left(x\right)', r'\frac{1}{1+x^2}',
+               r'\sqrt{x+1}', r'x\cdot e^{-x}', r'\ln\left(x+2\right)', r'\cos\left(x\right)^2',
+               r'\frac{x}{x^2+4}', r'x^3-2x+1', r'e^{-x^2}']
+INTEGRANDOS_DOBLES = [r'xy', r'x^2+y^2', r'e^{x+y}', r'\sin\left(x\right)\cos\left(y\right)', r'xy^2']
+
+# Particiones con el peso con el que las piden los alumnos (casi siempre pocas).
+PARTICIONES = {'simple': ([1, 2, 4, 6, 8, 10, 20, 50, 100], [2, 4, 5, 3, 4, 4, 2, 1, 1]),
+               'doble': ([1, 2, 3, 4, 6], [2, 4, 2, 2, 1]),
+               'extrapolacion': ([2, 4, 6, 8], [2, 4, 3, 1])}
+
+FORMULARIOS = {'simple': '/integracion/simple/', 'doble': '/integracion/doble/',
+               'extrapolacion': '/integracion/extrapolacion/', 'indefinida': '/integracion/indefinida'}
+
+CSRF = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def problema(tipo, aleatorio, unicos):
+    """Datos del formulario para un problema del tipo indicado."""
+    if tipo == 'indefinida':
+        return {'eq': aleatorio.choice(INTEGRANDOS)}
+
+    b = round(aleatorio.uniform(1, 3), 3) if unicos else aleatorio.choice([1, 2, 3])
+    particiones, pesos = PARTICIONES[tipo]
+    datos = {'tipo': tipo, 'a': '0', 'b': str(b), 'metodo': aleatorio.choice('123'),
+             'particiones': str(aleatorio.choices(particiones, pesos)[0])}
+    if tipo == 'doble':
+        datos.update({'eq': aleatorio.choice(INTEGRANDOS_DOBLES), 'c': '0', 'd': '1'})
+    else:
+        datos['eq'] = aleatorio.choice(INTEGRANDOS)
+    return datos
+
+
+class Usuario():
+    """
+        Usuario virtual con su propia sesión (cookies) contra el servidor.
+    """
+    def __init__(self, url, tiempo_limite):
+        self.url = url.rstrip('/')
+        self.tiempo_limite = tiempo_limite
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+        self.tokens = {}
+
+    def token(self, formulario):
+        # El token de la cookie no cambia durante la sesión, basta pedir cada formulario una vez.
+        if formulario not in self.tokens:
+            with self.opener.open(self.url + formulario, timeout = self.tiempo_limite) as respuesta:
+                encontrado = CSRF.search(respuesta.read().decode('utf-8', 'replace'))
+            if not encontrado:
+                raise RuntimeError('No se encontró el token CSRF en ' + formulario)
+            self.tokens[formulario] = encontrado.group(1)
+        return self.tokens[formulario]
+
+    def enviar(self, tipo, datos):
+        """Envía el formulario y sigue la redirección; regresa (código HTTP, bytes recibidos)."""
+        formulario = FORMULARIOS[tipo]
+        datos = dict(datos, csrfmiddlewaretoken = self.token(formulario))
+        peticion = urllib.request.Request(self.url + '/integracion/submit/', data = urllib.parse.urlencode(datos).encode(),
+                                          headers = {'Referer': self.url + formulario})
+        with self.opener.open(peticion, timeout = self.tiempo_limite) as respuesta:
+            contenido = respuesta.read()
+            if not respuesta.geturl().rstrip('/').endswith('/integracion/view'):
+                raise RuntimeError('submit redirigió a ' + respuesta.geturl())
+            return respuesta.status, len(contenido)
+
+
+class Registro():
+    """Resultados de todas las peticiones, compartido entre hilos."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.errores = defaultdict(lambda: defaultdict(int))
+        self.bytes = 0
+
+    def exito(self, tipo, latencia, tamano):
+        with self.lock:
+            self.latencias[tipo].append(latencia)
+            self.bytes += tamano
+
+    def error(self, tipo, motivo):
+        with self.lock:
+            self.errores[tipo][motivo] += 1
+
+
+def trabajar(url, mezcla, fin, registro, semilla, unicos, tiempo_limite):
+    aleatorio = random.Random(semilla)
+    usuario = Usuario(url, tiempo_limite)
+    tipos, pesos = zip(*mezcla.items())
+    while time.monotonic() < fin:
+        tipo = aleatorio.choices(tipos, pesos)[0]
+        datos = problema(tipo, aleatorio, unicos)
+        inicio = time.perf_counter()
+        try:
+            _, tamano = usuario.enviar(tipo, datos)
+        except urllib.error.HTTPError as e:
+            registro.error(tipo, 'HTTP ' + str(e.code))
+        except Exception as e:
+            registro.error(tipo, type(e).__name__)
+        else:
+            registro.exito(tipo, time.perf_counter() - inicio, tamano)
+
+
+def procesos(pid):
+    """pid y todos sus descendientes, leyendo /proc."""
+    hijos = defaultdict(list)
+    for entrada in os.listdir('/proc'):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open('/proc/' + entrada + '/stat') as f:
+                # El nombre del proceso va entre paréntesis y puede tener espacios.
+                padre = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        hijos[padre].append(int(entrada))
+    encontrados = []
+    pendientes = [pid]
+    while pendientes:
+        actual = pendientes.pop()
+        encontrados.append(actual)
+        pendientes += hijos[actual]
+    return encontrados
+
+
+def rss(pid):
+    """RSS en MB de un proceso, o None si ya terminó."""
+    try:
+        with open('/proc/' + str(pid) + '/status') as f:
+            for linea in f:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1])/1024
+    except OSError:
+        return None
+
+
+def muestrear(pid, intervalo, fin, muestras):
+    inicio = time.monotonic()
+    while time.monotonic() < fin:
+        momento = round(time.monotonic() - inicio, 1)
+        memoria = {p: rss(p) for p in procesos(pid)}
+        muestras.append({'t': momento, 'rss': {p: m for p, m in memoria.items() if m is not None}})
+        time.sleep(intervalo)
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano; valores ya ordenados."""
+    if not valores:
+        return None
+    return valores[max(0, math.ceil(p/100*len(valores)) - 1)]
+
+
+def reporte(registro, duracion, muestras):
+    tipos = sorted(set(registro.latencias) | set(registro.errores))
+    por_tipo = {}
+    for tipo in tipos:
+        latencias = sorted(registro.latencias[tipo])
+        errores = sum(registro.errores[tipo].values())
+        total = len(latencias) + errores
+        por_tipo[tipo] = {'peticiones': total, 'exitosas': len(latencias),
+                          'tasa_error': errores/total if total else 0, 'errores': dict(registro.errores[tipo]),
+                          'por_segundo': len(latencias)/duracion,
+                          'p50': percentil(latencias, 50), 'p95': percentil(latencias, 95), 'p99': percentil(latencias, 99)}
+    exitosas = sum(t['exitosas'] for t in por_tipo.values())
+    total = sum(t['peticiones'] for t in por_tipo.values())
+    resumen = {'duracion': duracion, 'peticiones': total, 'exitosas': exitosas,
+               'por_segundo': exitosas/duracion, 'tasa_error': (total - exitosas)/total if total else 0,
+               'mb_recibidos': registro.bytes/2**20, 'por_tipo': por_tipo}
+    if muestras:
+        totales = [sum(m['rss'].values()) for m in muestras]
+        resumen['rss'] = {'total_max_mb': max(totales), 'total_final_mb': totales[-1], 'muestras': muestras}
+    return resumen
+
+
+def imprimir(resumen):
+    ms = lambda s: '-' if s is None else str(round(s*1000)) + ' ms'
+    print('Duración: %.1f s   peticiones: %d   exitosas: %.1f/s   errores: %.2f %%   recibido: %.1f MB'
+          % (resumen['duracion'], resumen['peticiones'], resumen['por_segundo'], 100*resumen['tasa_error'], resumen['mb_recibidos']))
+    print()
+    print('%-14s %8s %8s %8s %10s %10s %10s' % ('tipo', 'pet.', 'pet/s', 'error %', 'p50', 'p95', 'p99'))
+    for tipo, datos in resumen['por_tipo'].items():
+        print('%-14s %8d %8.2f %8.2f %10s %10s %10s' % (tipo, datos['peticiones'], datos['por_segundo'], 100*datos['tasa_error'],
+                                                         ms(datos['p50']), ms(datos['p95']), ms(datos['p99'])))
+        for motivo, cuantos in datos['errores'].items():
+            print('%14s %d x %s' % ('', cuantos, motivo))
+    if 'rss' in resumen:
+        print()
+        print('RSS (MB) del proceso y sus hijos:')
+        for muestra in resumen['rss']['muestras']:
+            print('  t=%6.1f s  total %8.1f  ' % (muestra['t'], sum(muestra['rss'].values()))
+                  + '  '.join(str(p) + ':' + str(round(v)) for p, v in sorted(muestra['rss'].items())))
+
+
+def mezcla(texto):
+    pesos = {}
+    for parte in texto.split(','):
+        tipo, _, peso = parte.partition('=')
+        if tipo.strip() not in FORMULARIOS:
+            raise argparse.ArgumentTypeError('tipo desconocido: ' + tipo)
+        pesos[tipo.strip()] = float(peso or 1)
+    return pesos
+
+
+def main(argumentos = None):
+    parser = argparse.ArgumentParser(description = __doc__.split('\n\n')[0].strip())
+    parser.add_argument('--url', default = 'http://127.0.0.1:8000')
+    parser.add_argument('--usuarios', type = int, default = 4, help = 'Usuarios virtuales concurrentes.')
+    parser.add_argument('--duracion', type = float, default = 30, help = 'Segundos de prueba.')
+    parser.add_argument('--mezcla', type = mezcla, default = 'simple=5,doble=1,extrapolacion=2,indefinida=2',
+                        help = 'Pesos por tipo de formulario, p. ej. simple=5,doble=1.')
+    parser.add_argument('--unicos', action = 'store_true',
+                        help = 'Límites aleatorios para que casi ningún problema se repita (sin aciertos de cache).')
+    parser.add_argument('--pid', type = int, help = 'PID del servidor (master de gunicorn) para muestrear el RSS.')
+    parser.add_argument('--intervalo', type = float, default = 1, help = 'Segundos entre muestras de RSS.')
+    parser.add_argument('--tiempo-limite', type = float, default = 120, help = 'Tiempo límite por petición.')
+    parser.add_argument('--semilla', type = int, default = 0)
+    parser.add_argument('--salida', help = 'Guarda el reporte completo en JSON.')
+    opciones = parser.parse_args(argumentos)
+
+    registro = Registro()
+    inicio = time.monotonic()
+    fin = inicio + opciones.duracion
+    hilos = [threading.Thread(target = trabajar, daemon = True,
+                              args = (opciones.url, opciones.mezcla, fin, registro, opciones.semilla + i,
+                                      opciones.unicos, opciones.tiempo_limite))
+             for i in range(opciones.usuarios)]
+    muestras = []
+    if opciones.pid:
+        hilos.append(threading.Thread(target = muestrear, daemon = True,
+                                      args = (opciones.pid, opciones.intervalo, fin, muestras)))
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    resumen = reporte(registro, time.monotonic() - inicio, muestras)
+    imprimir(resumen)
+    if opciones.salida:
+        with open(opciones.salida, 'w', encoding = 'utf-8') as f:
+            json.dump(resumen, f, indent = 2, ensure_ascii = False)
+    return 0 if resumen['exitosas'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
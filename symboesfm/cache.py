@@ -0,0 +1,77 @@
+"Cache en memoria local con límite de bytes además del límite de entradas."
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+# Tamaño (en bytes, ya serializado) de cada entrada, por nombre de cache.
+_tamanos = {}
+
+
+class _Tamanos(dict):
+    # Lleva la suma de los tamaños al día, así cada escritura no recorre el cache.
+    total = 0
+
+    def agregar(self, key, tamano):
+        self.quitar(key)
+        self[key] = tamano
+        self.total += tamano
+
+    def quitar(self, key):
+        self.total -= self.pop(key, 0)
+
+    def clear(self):
+        super().clear()
+        self.total = 0
+
+
+class CacheLocMemAcotada(LocMemCache):
+    """
+        Igual que LocMemCache, pero además de MAX_ENTRIES respeta MAX_BYTES:
+        antes de guardar una entrada se desalojan las menos usadas recientemente
+        hasta que la nueva quepa. Las páginas de resultados con muchos pasos
+        pesan cientos de KB, así que contar entradas no basta para acotar la
+        memoria del proceso.
+
+        Una entrada más grande que MAX_BYTES simplemente no se guarda.
+
+        OPTIONS
+        -----------------------
+        MAX_BYTES: int
+            Bytes máximos ocupados por los valores serializados (64 MB por defecto).
+    """
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        opciones = params.get('OPTIONS', {})
+        self._max_bytes = int(params.get('max_bytes', opciones.get('MAX_BYTES', 64*2**20)))
+        self._tamanos = _tamanos.setdefault(name, _Tamanos())
+
+    @property
+    def ocupado(self):
+        return self._tamanos.total
+
+    def _set(self, key, value, timeout = DEFAULT_TIMEOUT):
+        tamano = len(value)
+        self._delete(key)
+        if tamano > self._max_bytes:
+            return
+        while self._cache and self.ocupado + tamano > self._max_bytes:
+            # El OrderedDict tiene al final la entrada usada hace más tiempo.
+            viejo, _ = self._cache.popitem()
+            self._expire_info.pop(viejo, None)
+            self._tamanos.quitar(viejo)
+        super()._set(key, value, timeout)
+        self._tamanos.agregar(key, tamano)
+
+    def _cull(self):
+        super()._cull()
+        for key in [k for k in self._tamanos if k not in self._cache]:
+            self._tamanos.quitar(key)
+
+    def _delete(self, key):
+        self._tamanos.quitar(key)
+        return super()._delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._expire_info.clear()
+            self._tamanos.clear()
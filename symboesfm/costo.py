@@ -0,0 +1,211 @@
+"""
+Análisis del costo de una expresión antes de hacer trabajo simbólico con ella.
+
+Una entrada como factorial(10**7), 2**(10**9) o exp(exp(exp(exp(x)))) puede
+ocupar un proceso durante minutos al construirla, derivarla o integrarla. Aquí
+se recorre el árbol de la expresión para:
+
+- construirla sin evaluar literales gigantes (reconstruir), lo que usa
+  lector_latex al interpretar el formulario, y
+- estimar el costo de cada etapa de integracion_numerica (analizar) y decidir
+  si se rechaza, si se calcula solo la parte numérica o si se resumen los pasos.
+"""
+import math
+
+import sympy
+from sympy.core.function import Function
+
+# Límites para construir la expresión (reconstruir).
+DIGITOS_MAXIMOS = 5000      # dígitos de un entero literal o de su potencia/factorial
+NODOS_CONSTRUCCION = 20000  # nodos del árbol sin evaluar
+PROFUNDIDAD_CONSTRUCCION = 400
+
+# Límites del análisis (analizar); los costos son tamaños relativos de las
+# expresiones intermedias, no segundos.
+NODOS_MAXIMOS = 5000
+PROFUNDIDAD_MAXIMA = 60
+EXPONENTE_MAXIMO = 10**6
+EXPONENTE_NUMERICO = 1000
+DERIVADAS_MAXIMO = 5000
+INTEGRAL_MAXIMO = 200
+PASOS_MAXIMO = 500
+NODOS_RESUMIDO = 150
+
+_FACTORIALES = (sympy.factorial, sympy.factorial2, sympy.subfactorial, sympy.RisingFactorial, sympy.FallingFactorial)
+
+
+class ExpresionCostosa(ValueError):
+    """
+        La expresión es demasiado costosa para calcularse.
+
+        Atributos
+        -----------------------
+        motivo: str
+            Qué límite se rebasó.
+    """
+    def __init__(self, motivo):
+        super().__init__('La expresión es demasiado costosa: ' + motivo + '.')
+        self.motivo = motivo
+
+
+def _recorrer(expresion):
+    """Genera (nodo, profundidad) sin recursión."""
+    pila = [(expresion, 1)]
+    while pila:
+        nodo, profundidad = pila.pop()
+        yield nodo, profundidad
+        pila.extend((argumento, profundidad + 1) for argumento in nodo.args)
+
+def _digitos(entero):
+    return abs(int(entero)).bit_length()*math.log10(2)
+
+def _verificar_literal(nodo):
+    # nodo ya tiene sus argumentos evaluados; se revisa antes de evaluarlo a él.
+    if isinstance(nodo, sympy.Integer) and _digitos(nodo) > DIGITOS_MAXIMOS:
+        raise ExpresionCostosa('un número con más de ' + str(DIGITOS_MAXIMOS) + ' dígitos')
+    if isinstance(nodo, _FACTORIALES):
+        n = nodo.args[0]
+        if n.is_Integer and n > 0 and math.lgamma(float(n) + 1)/math.log(10) > DIGITOS_MAXIMOS:
+            raise ExpresionCostosa('el factorial de ' + str(n) + ' tiene más de ' + str(DIGITOS_MAXIMOS) + ' dígitos')
+    if isinstance(nodo, sympy.Pow):
+        base, exponente = nodo.args
+        if base.is_Rational and exponente.is_Integer and abs(base) != 1 and base != 0:
+            digitos = abs(int(exponente))*max(_digitos(base.p), _digitos(base.q), 1)
+            if digitos > DIGITOS_MAXIMOS:
+                raise ExpresionCostosa('la potencia ' + str(base) + '^' + str(exponente) + ' tiene más de ' + str(DIGITOS_MAXIMOS) + ' dígitos')
+
+def reconstruir(expresion):
+    """
+        Evalúa una expresión construida con sympy.evaluate(False), de abajo
+        hacia arriba, revisando antes de cada paso que no aparezcan enteros,
+        potencias o factoriales con más de DIGITOS_MAXIMOS dígitos.
+
+        Lanza ExpresionCostosa si el árbol es demasiado grande o si algún
+        literal lo es.
+    """
+    nodos = 0
+    for _, profundidad in _recorrer(expresion):
+        nodos += 1
+        if nodos > NODOS_CONSTRUCCION or profundidad > PROFUNDIDAD_CONSTRUCCION:
+            raise ExpresionCostosa('tiene demasiados términos')
+
+    def evaluar(nodo):
+        if not nodo.args:
+            _verificar_literal(nodo)
+            return nodo
+        argumentos = [evaluar(argumento) for argumento in nodo.args]
+        if isinstance(nodo, _FACTORIALES + (sympy.Pow,)):
+            _verificar_literal(nodo.func(*argumentos, evaluate = False))
+        return nodo.func(*argumentos)
+
+    return evaluar(expresion)
+
+
+class Analisis():
+    """
+        Resultado de analizar una expresión.
+
+        Atributos
+        -----------------------
+        nodos: int
+            Nodos del árbol.
+        profundidad: int
+            Profundidad del árbol.
+        anidamiento: int
+            Máximo de funciones trascendentes anidadas (exp(sin(x)) tiene 2);
+            una potencia con exponente no numérico cuenta como exp.
+        compuestas: int
+            Funciones cuyo argumento no es lineal, como sin(x**2) o exp(cos(x)).
+            El producto de varias es lo que más tarda en integrate.
+        exponente: float
+            Mayor exponente numérico, en valor absoluto.
+        especiales: list
+            Funciones especiales que aparecen (gamma, erf, besselj, ...).
+        costos: dict
+            Costo estimado de cada etapa: 'evaluacion' (por punto), 'derivadas'
+            (hasta la cuarta), 'integral' (simbólica) y 'pasos'.
+        nivel: str
+            'rechazar', 'numerico' (sin derivadas ni integrales simbólicas),
+            'resumido' (pasos sin el detalle de cada punto) o 'completo'.
+        motivo: str
+            Explicación del nivel, None si es 'completo'.
+    """
+    def __init__(self, expresion):
+        self.nodos = 0
+        self.profundidad = 0
+        self.exponente = 0
+        especiales = set()
+        for nodo, profundidad in _recorrer(expresion):
+            self.nodos += 1
+            self.profundidad = max(self.profundidad, profundidad)
+            if isinstance(nodo, Function) and (type(nodo).__module__ or '').startswith('sympy.functions.special'):
+                especiales.add(type(nodo).__name__)
+            if isinstance(nodo, sympy.Pow) and nodo.exp.is_number and nodo.exp.is_real:
+                self.exponente = max(self.exponente, abs(float(nodo.exp)))
+        self.especiales = sorted(especiales)
+        self.anidamiento = self._anidamiento(expresion)
+        self.compuestas = sum(1 for nodo in sympy.preorder_traversal(expresion) if self._compuesta(nodo))
+
+        self.costos = {'evaluacion': self.nodos,
+                       'derivadas': self.nodos*(1 + self.anidamiento)**4,
+                       'integral': self.nodos*4**self.anidamiento*8**max(self.compuestas - 1, 0)*(100 if self.especiales else 1)}
+        self.costos['pasos'] = self.costos['derivadas'] + self.nodos
+        self.nivel, self.motivo = self._nivel()
+
+    @staticmethod
+    def _trascendente(nodo):
+        return isinstance(nodo, Function) or (isinstance(nodo, sympy.Pow) and not nodo.exp.is_number)
+
+    @classmethod
+    def _compuesta(cls, nodo):
+        if not cls._trascendente(nodo):
+            return False
+        for argumento in nodo.args:
+            if argumento.is_number or (isinstance(nodo, sympy.Pow) and argumento is nodo.base and argumento.is_number):
+                continue
+            if any(cls._trascendente(interior) for interior in sympy.preorder_traversal(argumento)):
+                return True
+            if not argumento.is_polynomial() or sympy.Poly(argumento).total_degree() > 1:
+                return True
+        return False
+
+    @classmethod
+    def _anidamiento(cls, expresion):
+        niveles = {}
+        for nodo in sympy.postorder_traversal(expresion):
+            interior = max((niveles[argumento] for argumento in nodo.args), default = 0)
+            niveles[nodo] = interior + cls._trascendente(nodo)
+        return niveles[expresion]
+
+    def _nivel(self):
+        if self.nodos > NODOS_MAXIMOS:
+            return 'rechazar', 'tiene ' + str(self.nodos) + ' términos (máximo ' + str(NODOS_MAXIMOS) + ')'
+        if self.profundidad > PROFUNDIDAD_MAXIMA:
+            return 'rechazar', 'tiene ' + str(self.profundidad) + ' niveles de anidamiento (máximo ' + str(PROFUNDIDAD_MAXIMA) + ')'
+        if self.exponente > EXPONENTE_MAXIMO:
+            return 'rechazar', 'tiene un exponente de ' + str(self.exponente) + ' (máximo ' + str(EXPONENTE_MAXIMO) + ')'
+        if self.especiales:
+            return 'numerico', 'contiene funciones especiales (' + ', '.join(self.especiales) + '), así que no se calculan los errores simbólicos'
+        if self.exponente > EXPONENTE_NUMERICO:
+            return 'numerico', 'tiene exponentes muy grandes, así que no se calculan los errores simbólicos'
+        if self.costos['derivadas'] > DERIVADAS_MAXIMO or self.costos['integral'] > INTEGRAL_MAXIMO:
+            return 'numerico', 'tiene derivadas e integral simbólicas muy costosas, así que no se calculan los errores simbólicos'
+        if self.costos['pasos'] > PASOS_MAXIMO or self.nodos > NODOS_RESUMIDO:
+            return 'resumido', 'es extensa, así que los pasos no muestran cada punto de soporte'
+        return 'completo', None
+
+    def verificar(self):
+        """Lanza ExpresionCostosa si el nivel es 'rechazar'."""
+        if self.nivel == 'rechazar':
+            raise ExpresionCostosa(self.motivo)
+        return self
+
+
+def analizar(expresion):
+    """
+        Analiza una expresión de sympy (o el texto con operadores de Python)
+        y regresa un Analisis.
+    """
+    if isinstance(expresion, str):
+        expresion = sympy.parse_expr(expresion)
+    return Analisis(expresion)
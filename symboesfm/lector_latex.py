@@ -0,0 +1,344 @@
+import re
+import logging
+from collections import Counter
+from functools import lru_cache
+
+import sympy
+from sympy.parsing.latex import parse_latex
+# parse_latex importa su implementación (y con ella sympy.physics) la primera
+# vez que se usa, y esa importación falla dentro de sympy.evaluate(False).
+from sympy.parsing.latex import _parse_latex_antlr  # noqa: F401
+
+from symboesfm.costo import reconstruir, ExpresionCostosa
+
+logger = logging.getLogger(__name__)
+
+TAMANO_CACHE = 512
+
+class ErrorLatex(ValueError):
+    """
+        Error al interpretar la expresión LaTeX enviada por el formulario.
+
+        Atributos
+        -----------------------
+        texto: str
+            Expresión LaTeX (normalizada) que no se pudo interpretar.
+        posicion: int
+            Posición aproximada del error dentro de texto, o None si no se conoce.
+    """
+    def __init__(self, mensaje, texto = '', posicion = None):
+        super().__init__(mensaje)
+        self.texto = texto
+        self.posicion = posicion
+
+
+class _NoSoportado(Exception):
+    """La expresión sale de la gramática rápida, se delega a ANTLR."""
+
+
+_TOKEN = re.compile(r'''
+      (?P<espacio>\s+|\\[ ,;:!]|~)
+    | (?P<comando>\\[a-zA-Z]+)
+    | (?P<escapado>\\[{}|])
+    | (?P<numero>\d+(?:\.\d*)?|\.\d+)
+    | (?P<letra>[a-zA-Z])
+    | (?P<simbolo>[-+*/^_(){}\[\]|!])
+''', re.VERBOSE)
+
+_DELIMITADORES = {'\\left', '\\right', '\\bigl', '\\bigr', '\\Bigl', '\\Bigr'}
+
+_FUNCIONES = {'\\sin': sympy.sin, '\\cos': sympy.cos, '\\tan': sympy.tan,
+              '\\csc': sympy.csc, '\\sec': sympy.sec, '\\cot': sympy.cot,
+              '\\sinh': sympy.sinh, '\\cosh': sympy.cosh, '\\tanh': sympy.tanh,
+              '\\arcsin': sympy.asin, '\\arccos': sympy.acos, '\\arctan': sympy.atan,
+              '\\arccsc': sympy.acsc, '\\arcsec': sympy.asec, '\\arccot': sympy.acot,
+              '\\exp': sympy.exp}
+
+_INVERSAS = {'\\sin': sympy.asin, '\\cos': sympy.acos, '\\tan': sympy.atan,
+             '\\csc': sympy.acsc, '\\sec': sympy.asec, '\\cot': sympy.acot,
+             '\\sinh': sympy.asinh, '\\cosh': sympy.acosh, '\\tanh': sympy.atanh}
+
+_PRODUCTOS = {'*', '\\cdot', '\\times'}
+_COCIENTES = {'/', '\\div'}
+
+_estadisticas = Counter()
+
+
+def _tokenizar(texto):
+    tokens = []
+    posicion = 0
+    while posicion < len(texto):
+        encontrado = _TOKEN.match(texto, posicion)
+        if not encontrado:
+            raise ErrorLatex('Carácter no reconocido "' + texto[posicion] + '" en la posición ' + str(posicion),
+                             texto, posicion)
+        tipo = encontrado.lastgroup
+        valor = encontrado.group()
+        posicion = encontrado.end()
+        if tipo == 'espacio' or valor in _DELIMITADORES:
+            continue
+        if tipo == 'escapado':
+            valor = valor[1:]
+        tokens.append(valor)
+    return tokens
+
+
+def normalizar(texto):
+    """
+        Convierte el LaTeX de MathQuill a una forma canónica: sin \\left/\\right,
+        sin espacios de formato y con un solo espacio tras los comandos que lo
+        necesitan. Dos entradas con la misma forma canónica representan la
+        misma expresión y comparten la entrada en el cache.
+    """
+    partes = []
+    for token in _tokenizar(texto.strip()):
+        if partes and partes[-1].startswith('\\') and partes[-1][1:].isalpha() and (token[0].isalnum()):
+            partes.append(' ')
+        partes.append(token)
+    return ''.join(partes)
+
+
+class _Lector():
+    """
+        Analizador descendente recursivo para el subconjunto de LaTeX que genera
+        MathQuill. Sigue la misma precedencia que la gramática ANTLR de sympy:
+        la multiplicación implícita liga más fuerte que \\cdot y /, y los
+        exponentes se agrupan a la izquierda.
+    """
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def actual(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def consumir(self, esperado = None):
+        token = self.actual()
+        if token is None or (esperado is not None and token != esperado):
+            raise _NoSoportado('se esperaba ' + str(esperado) + ' y se encontró ' + str(token))
+        self.pos += 1
+        return token
+
+    def leer(self):
+        if not self.tokens:
+            raise ErrorLatex('La expresión está vacía')
+        resultado = self.expresion()
+        if self.actual() is not None:
+            raise _NoSoportado('token inesperado ' + self.actual())
+        return resultado
+
+    def expresion(self):
+        resultado = self.producto()
+        while self.actual() in ('+', '-'):
+            signo = self.consumir()
+            termino = self.producto()
+            resultado = resultado + termino if signo == '+' else resultado - termino
+        return resultado
+
+    def producto(self):
+        resultado = self.unario()
+        while self.actual() in _PRODUCTOS or self.actual() in _COCIENTES:
+            operador = self.consumir()
+            factor = self.unario()
+            resultado = resultado*factor if operador in _PRODUCTOS else resultado/factor
+        return resultado
+
+    def unario(self):
+        if self.actual() in ('+', '-'):
+            signo = self.consumir()
+            valor = self.unario()
+            return valor if signo == '+' else -valor
+        resultado = self.postfijo()
+        while self.inicia_factor():
+            resultado = resultado*self.postfijo()
+        return resultado
+
+    def inicia_factor(self):
+        token = self.actual()
+        if token is None:
+            return False
+        return (token[0].isalnum() or token[0] == '.' or token in ('(', '[', '{', '|')
+                or token in _FUNCIONES or token in ('\\frac', '\\sqrt', '\\pi', '\\ln', '\\log'))
+
+    def postfijo(self):
+        resultado = self.potencia()
+        while self.actual() == '!':
+            self.consumir()
+            resultado = sympy.factorial(resultado)
+        return resultado
+
+    def potencia(self):
+        resultado = self.primario()
+        while self.actual() == '^':
+            self.consumir()
+            resultado = resultado**self.exponente()
+        if self.actual() == '_':
+            raise _NoSoportado('subíndices')
+        return resultado
+
+    def exponente(self):
+        if self.actual() == '{':
+            return self.agrupado('{', '}')
+        return self.atomo()
+
+    def agrupado(self, abre, cierra):
+        self.consumir(abre)
+        valor = self.expresion()
+        self.consumir(cierra)
+        return valor
+
+    def atomo(self):
+        token = self.actual()
+        if token is None:
+            raise _NoSoportado('fin inesperado')
+        if token[0].isdigit() or token[0] == '.':
+            self.consumir()
+            return sympy.Number(token)
+        if len(token) == 1 and token.isalpha():
+            self.consumir()
+            return sympy.E if token == 'e' else sympy.Symbol(token)
+        if token == '\\pi':
+            self.consumir()
+            return sympy.pi
+        raise _NoSoportado('átomo ' + token)
+
+    def primario(self):
+        token = self.actual()
+        if token == '(':
+            return self.agrupado('(', ')')
+        if token == '[':
+            return self.agrupado('[', ']')
+        if token == '{':
+            return self.agrupado('{', '}')
+        if token == '|':
+            return sympy.Abs(self.agrupado('|', '|'))
+        if token == '\\frac':
+            self.consumir()
+            numerador = self.agrupado('{', '}')
+            denominador = self.agrupado('{', '}')
+            return numerador/denominador
+        if token == '\\sqrt':
+            self.consumir()
+            indice = self.agrupado('[', ']') if self.actual() == '[' else 2
+            return sympy.root(self.agrupado('{', '}'), indice)
+        if token in _FUNCIONES or token in ('\\ln', '\\log'):
+            return self.funcion()
+        return self.atomo()
+
+    def funcion(self):
+        nombre = self.consumir()
+        potencia = None
+        if self.actual() == '^':
+            self.consumir()
+            potencia = self.exponente()
+        if self.actual() == '_':
+            raise _NoSoportado('logaritmo con base')
+        argumento = self.argumento()
+
+        if nombre in ('\\ln', '\\log'):
+            # Como parse_latex, \log es el logaritmo natural.
+            valor = sympy.log(argumento)
+        elif potencia == -1 and nombre in _INVERSAS:
+            return _INVERSAS[nombre](argumento)
+        else:
+            valor = _FUNCIONES[nombre](argumento)
+        return valor if potencia is None else valor**potencia
+
+    def argumento(self):
+        if self.actual() == '(':
+            return self.agrupado('(', ')')
+        # Sin paréntesis (\sin 2x) solo se aceptan productos implícitos de átomos,
+        # lo demás depende de reglas de la gramática ANTLR que no vale la pena copiar.
+        resultado = self.atomo_potencia()
+        while self.actual() is not None and (self.actual()[0].isalnum() or self.actual() == '\\pi'):
+            resultado = resultado*self.atomo_potencia()
+        if self.actual() in _PRODUCTOS or self.actual() in _COCIENTES:
+            raise _NoSoportado('argumento sin paréntesis ambiguo')
+        return resultado
+
+    def atomo_potencia(self):
+        resultado = self.atomo()
+        while self.actual() == '^':
+            self.consumir()
+            resultado = resultado**self.exponente()
+        return resultado
+
+
+def _antlr(normalizado):
+    # Mismo preprocesamiento que se usaba en la vista antes de tener este módulo.
+    try:
+        # Solo la e suelta es la constante; la de \theta o \sec no.
+        return parse_latex(re.sub(r'(?<![\\a-zA-Z])e(?![a-zA-Z])', 'E', normalizado))
+    except Exception as e:
+        raise ErrorLatex('No se pudo interpretar la expresión "' + normalizado + '": ' + str(e).strip().split('\n')[0],
+                         normalizado) from e
+
+
+@lru_cache(maxsize = TAMANO_CACHE)
+def _convertir(normalizado):
+    # Se construye sin evaluar para que un 10^{10^{9}} o un (10^{7})! no se
+    # calculen aquí; reconstruir evalúa el árbol revisando esos literales.
+    with sympy.evaluate(False):
+        try:
+            expresion = _Lector(_tokenizar(normalizado)).leer()
+        except _NoSoportado as e:
+            logger.debug('Ruta ANTLR para %r (%s)', normalizado, e)
+            expresion = _antlr(normalizado)
+            _estadisticas['antlr'] += 1
+        else:
+            _estadisticas['rapido'] += 1
+    try:
+        return reconstruir(expresion)
+    except ExpresionCostosa as e:
+        raise ErrorLatex(str(e), normalizado) from e
+
+
+def latex_a_expresion(texto):
+    """
+        Convierte el LaTeX de un formulario a una expresión de sympy.
+
+        Primero se normaliza el texto y se busca en el cache; si no está, se
+        interpreta con el analizador rápido y solo si la expresión sale de su
+        gramática se usa parse_latex (ANTLR).
+
+        Parámetros
+        -----------------------
+        texto: str
+            LaTeX tal como lo envía MathQuill.
+
+        Regresa
+        -----------------------
+        sympy.Expr
+
+        Lanza ErrorLatex si la expresión no se puede interpretar.
+    """
+    try:
+        normalizado = normalizar(texto)
+        return _convertir(normalizado)
+    except ErrorLatex:
+        _estadisticas['errores'] += 1
+        raise
+
+
+def latex_a_texto(texto):
+    """
+        Igual que latex_a_expresion, pero regresa la expresión escrita con los
+        operadores de Python, que es lo que recibe integracion_numerica.
+    """
+    return str(latex_a_expresion(texto))
+
+
+def estadisticas():
+    """
+        Conteo de conversiones del proceso actual: cuántas usaron el analizador
+        rápido, cuántas ANTLR, cuántas fallaron y el uso del cache.
+    """
+    cache = _convertir.cache_info()
+    interpretadas = _estadisticas['rapido'] + _estadisticas['antlr']
+    return {'rapido': _estadisticas['rapido'],
+            'antlr': _estadisticas['antlr'],
+            'errores': _estadisticas['errores'],
+            'proporcion_rapido': _estadisticas['rapido']/interpretadas if interpretadas else None,
+            'cache_aciertos': cache.hits,
+            'cache_fallos': cache.misses,
+            'cache_tamano': cache.currsize}
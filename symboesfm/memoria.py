@@ -0,0 +1,125 @@
+"""
+Control de la memoria de los procesos web.
+
+SymPy guarda en un cache global los resultados intermedios de subs, diff,
+integrate, solve, ... y en un proceso de gunicorn que vive mucho tiempo ese
+cache (más la fragmentación del heap) hace crecer la memoria hasta la cuota
+del dyno. Aquí se:
+
+- acota el cache de SymPy a SYMPY_CACHE_SIZE entradas por función (settings
+  lo pone en el entorno antes de importar SymPy),
+- vacía el cache al terminar una petición si pasa de SYMPY_CACHE_LIMPIAR
+  entradas en total,
+- registra el RSS y el pico de memoria de cada petición y
+- decide si el proceso debe reciclarse porque su RSS pasó de
+  MEMORIA_RSS_MAXIMO; gunicorn.conf.py lo consulta en post_request.
+"""
+import gc
+import os
+import logging
+import resource
+import tracemalloc
+
+from django.conf import settings
+from sympy.core import cache as cache_sympy
+
+logger = logging.getLogger(__name__)
+
+MB = 2**20
+_PAGINA = resource.getpagesize()
+
+if cache_sympy.SYMPY_CACHE_SIZE != getattr(settings, 'SYMPY_CACHE_SIZE', cache_sympy.SYMPY_CACHE_SIZE):
+    logger.warning('SymPy se importó antes que settings: su cache quedó en %s entradas por función y no en %s',
+                   cache_sympy.SYMPY_CACHE_SIZE, settings.SYMPY_CACHE_SIZE)
+
+
+def _rss_maximo():
+    # getrusage da KB en Linux y bytes en macOS.
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximo if os.uname().sysname == 'Darwin' else maximo*1024
+
+def rss():
+    """Memoria residente del proceso, en bytes."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1])*_PAGINA
+    except OSError:
+        # Sin /proc solo se conoce el máximo.
+        return _rss_maximo()
+
+def entradas_sympy():
+    """Número total de entradas en los caches de SymPy."""
+    total = 0
+    for funcion in cache_sympy.CACHE:
+        while not hasattr(funcion, 'cache_info') and hasattr(funcion, '__wrapped__'):
+            funcion = funcion.__wrapped__
+        if hasattr(funcion, 'cache_info'):
+            total += funcion.cache_info().currsize
+    return total
+
+def limpiar_sympy(limite = None):
+    """
+    Vacía el cache de SymPy si tiene más de limite entradas (por defecto
+    settings.SYMPY_CACHE_LIMPIAR). Regresa cuántas entradas se borraron.
+    """
+    limite = settings.SYMPY_CACHE_LIMPIAR if limite is None else limite
+    entradas = entradas_sympy()
+    if entradas <= limite:
+        return 0
+    antes = rss()
+    cache_sympy.clear_cache()
+    gc.collect()
+    logger.info('Cache de SymPy vaciado: %d entradas, RSS %.1f -> %.1f MB', entradas, antes/MB, rss()/MB)
+    return entradas
+
+def debe_reciclarse():
+    """True si el RSS del proceso pasó de settings.MEMORIA_RSS_MAXIMO."""
+    actual = rss()
+    if settings.MEMORIA_RSS_MAXIMO and actual > settings.MEMORIA_RSS_MAXIMO:
+        logger.warning('RSS de %.1f MB, mayor que el máximo de %.1f MB: el proceso %d se va a reciclar',
+                       actual/MB, settings.MEMORIA_RSS_MAXIMO/MB, os.getpid())
+        return True
+    return False
+
+
+class MemoriaMiddleware:
+    """
+        Mide la memoria de cada petición y vacía el cache de SymPy cuando crece
+        demasiado. Con MEMORIA_TRAZAR se usa tracemalloc para el pico de memoria
+        de Python en la petición (más preciso, pero hace más lento al proceso);
+        sin él, el pico es el del RSS según getrusage.
+
+        Las medidas quedan en request.memoria y se registran con nivel DEBUG, o
+        INFO si la petición hizo crecer el RSS más de MEMORIA_AVISO.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.trazar = settings.MEMORIA_TRAZAR
+        if self.trazar and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def __call__(self, request):
+        antes, maximo = rss(), _rss_maximo()
+        if self.trazar:
+            tracemalloc.reset_peak()
+            python = tracemalloc.get_traced_memory()[0]
+
+        response = self.get_response(request)
+
+        despues = rss()
+        nuevo_maximo = _rss_maximo()
+        # Si el máximo del proceso no cambió, el pico de la petición quedó por
+        # debajo de él y lo más que se sabe es el mayor de los dos RSS medidos.
+        pico = max(antes, despues, nuevo_maximo if nuevo_maximo > maximo else 0)
+        request.memoria = {'rss': despues, 'incremento': despues - antes, 'pico': pico}
+        if self.trazar:
+            request.memoria['pico_python'] = tracemalloc.get_traced_memory()[1] - python
+
+        nivel = logging.INFO if despues - antes > settings.MEMORIA_AVISO else logging.DEBUG
+        if logger.isEnabledFor(nivel):
+            logger.log(nivel, '%s %s: RSS %.1f MB (%+.1f MB), pico %.1f MB%s', request.method, request.path,
+                       despues/MB, (despues - antes)/MB, pico/MB,
+                       ', pico de Python %.1f MB' % (request.memoria['pico_python']/MB) if self.trazar else '')
+
+        limpiar_sympy()
+        return response
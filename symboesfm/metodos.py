@@ -1,6 +1,19 @@
 from sympy import *
+import os
 import numpy as np
 import pandas as pd
+from fractions import Fraction
+import math
+import logging
+import re as regex
+import threading
+from types import MappingProxyType
+from collections import namedtuple, OrderedDict
+from functools import lru_cache, reduce
+from itertools import repeat
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
 
 class integracion_numerica():
     """
@@ -20,15 +33,41 @@ class integracion_numerica():
             .simpson3_8()
             .simpson3_8_compuesto(particiones)
             .simpson3_4_compuesto_doble(intervalo2, particiones)
+
+        Newton-Cotes de grado 1 a ORDEN_MAXIMO, cerradas o abiertas
+            .newton_cotes(particiones, orden, abierta = False)
+            .newton_cotes_doble(intervalo2, particiones, orden, abierta = False)
+
+        Los métodos compuestos de Trapezoidal y Simpson son casos de
+        newton_cotes; los pesos exactos salen de pesos_newton_cotes.
+
+        Comparación de Trapezoidal, Simpson 1/3 y Simpson 3/8 con una sola
+        evaluación de la función
+            .comparar(subintervalos, metodos = ('1', '2', '3'))
+
+        Clenshaw-Curtis (niveles anidados de nodos de Chebyshev)
+            .clenshaw_curtis(n)
+            .clenshaw_curtis_doble(intervalo2, n)
+
+        Tanh-sinh (doble exponencial; singularidades en los extremos e
+        intervalos infinitos, con límites oo o -oo)
+            .tanh_sinh(tolerancia = 1e-10)
+            .extremo_singular()
             
         OBS: Cada vez que se ejecute un método nuevo, se tiene que reinstanciar el objeto.
+        Para integrar la misma función en muchos intervalos (o una familia de
+        funciones) sin reinstanciar, ver integracion_lotes. Para usar la misma
+        función con varios métodos o desde varios hilos, ver integrar y
+        comparar, que reciben un integrando (compilar) y regresan un
+        resultado_integral inmutable; esta clase es el estado de un solo
+        cálculo.
             
         Parámetros
         -----------------------
         limites: list 
             Lista con dos elementos representando los limites de la integral. Si es una
             integral doble, entonces son los limites de la integral de adentro.
-        funcion_texto: str
+        funcion_texto: str o integrando
             Representa la función escrita con los operadores de Python.
         
         Atributos
@@ -64,8 +103,25 @@ class integracion_numerica():
             Error relativo
         verdadero: sympy.core.numbers.Float
             Error verdero
+        simbolico: bool
+            Si es False (ver symboesfm.costo) los métodos no derivan ni integran
+            la función simbólicamente: solo se calcula la aproximación y los
+            errores que dependen de la integral o las derivadas quedan en None.
         
         """
+    # A partir de este número de puntos de soporte los métodos compuestos ya no
+    # listan cada punto en los pasos: se evalúan por bloques de TAMANO_BLOQUE
+    # con numpy y solo se reporta la suma, así la memoria no crece con n.
+    LIMITE_DETALLE = 500
+    TAMANO_BLOQUE = 2**16
+    # Con UMBRAL_PARALELO puntos o más los bloques se reparten entre PARALELISMO
+    # trabajadores ('hilos' o 'procesos'). Las sumas parciales se combinan en el
+    # orden de los bloques, así el resultado es el mismo que en serie. Por
+    # defecto es 1 (en serie): en el servidor cada petición ya tiene su hilo.
+    PARALELISMO = int(os.environ.get('SYMBOESFM_PARALELISMO', 1))
+    UMBRAL_PARALELO = 2**20
+    EJECUTOR = os.environ.get('SYMBOESFM_EJECUTOR', 'hilos')
+
     def __init__(self, limites, funcion_texto):
         
         self.a = limites[0]
@@ -74,7 +130,14 @@ class integracion_numerica():
         self.d = None
        
         self.solucion = None
-        self.exp = parse_expr(funcion_texto)
+        # Con un integrando (ver compilar) se reutilizan su expresión y su
+        # función compilada en lugar de interpretar el texto otra vez.
+        if isinstance(funcion_texto, integrando):
+            self._integrando = funcion_texto
+            self.exp = funcion_texto.exp
+            self._f = funcion_texto.f
+        else:
+            self.exp = parse_expr(funcion_texto)
 
         #self.h = (self.b-self.a)/2
         self.metodo = None
@@ -85,6 +148,7 @@ class integracion_numerica():
         self.total = None
         self.relativo = None
         self.verdadero = None
+        self.simbolico = True
         
         self.pasos = []
         
@@ -138,171 +202,105 @@ class integracion_numerica():
     ####----- COMPUESTOS: ------####
     
     def trapezoidal_compuesto(self, particiones, errores = True):
-        x = symbols('x')
-        
-        h = (self.b-self.a)/particiones
-
-        self.pasos.append({ 'titulo':'Calcular h', 
-                            'procedimiento': '\\( h = \\frac{b-a}{particiones}  \\)',
-                            'resultado': '\\( \\Rightarrow  h = \\frac{'+ str(self.b) + ' - ' + str(self.a) +'}{'+str(particiones)+'}  = ' + str(h)+ '\\)'})
-
-        puntos_soporte = np.linspace(self.a + h,self.b - h, particiones-1 )
-
-        self.pasos.append({ 'titulo':'Calcular puntos de soporte', 
-                            'procedimiento': 'De h en h desde \\(a\\) hasta \\(b\\)',
-                            'resultado': '\\( x_i =  \\)' + ' ' + str(list(puntos_soporte))})
-
-        funcion_evaluada = [self.exp.subs(x,t) for t in puntos_soporte]
-        self.pasos.append({ 'titulo':'Evaluar los puntos de soporte en la función', 
-                            'procedimiento': '\\( f(x_i) \\)',
-                            'resultado': '\\( f(x_i) =  \\)' + ' ' +  str(funcion_evaluada)})
-
-        aprox_inter = sum(funcion_evaluada)
-        self.pasos.append({ 'titulo':'Sumar los puntos de soporte evaluados', 
-                            'procedimiento': '\\( \\sum f(x_i) \\)',
-                            'resultado': '\\( \\sum f(x_i) = \\ \\) ' + str(aprox_inter)})
-        fa = self.exp.subs(x,self.a) 
-        fb = self.exp.subs(x,self.b)
-        self.solucion = h*((1/2)*(fa+ fb) + aprox_inter) 
-
-        self.pasos.append({ 'titulo':'Calcular la aproximación con la fórmula', 
-                            'procedimiento': '\\( h\\cdot(\\frac{1}{2} \\cdot (f(a) + f(b)) + \\sum f(x_i) ) \\)',
-                            'resultado': f'''\\( \\Rightarrow  {h}\\cdot(\\frac{1}{2} \\cdot (f({self.a}) + f({self.b})) + {aprox_inter} ) \\ \\)
-                                            
-                                            \\( \\Rightarrow  {h}\\cdot(0.5 \\cdot ({fa} + {fb}) + {aprox_inter} ) = \\ \\)
-                                        ''' + str(self.solucion)})
-
+        self.solucion = self._newton_cotes(1, particiones, [self.a, self.b], textos = self._TEXTOS_SIMPLES[1])
         self.metodo = "Trapezoidal compuesto"
         
-        if errores:
-            f_biprima = diff(self.exp,x,x)
-            
-            self.total = abs((-((self.b-self.a)*h**2)/12)*f_biprima.subs(x,(self.b-self.a)/2))
-            self.aproximado = (-(h**2)/12)*integrate(f_biprima, (x, self.a, self.b))
-            self.cota = (((self.b-self.a)*h**2)/12)*self.maximo(3, f_biprima)
-        
+        if errores and self.simbolico:
+            self._errores_compuestos('1', particiones)
         
         return N(self.solucion)
     
     def simpson1_3_compuesto(self, particiones, errores = True):
-        x = symbols('x')
-        h = (self.b-self.a)/(2*particiones)
-        self.pasos.append({ 'titulo':'Calcular h', 
-                            'procedimiento': '\\( h = \\frac{b-a}{2 \\cdot particiones}  \\)',
-                            'resultado': '\\( \\Rightarrow  h = \\frac{'+ str(self.b) + ' - ' + str(self.a) +'}{2 \\cdot'+str(particiones)+'}  = ' + str(h)+ '\\)'})
+        # R_t se calcula después de los puntos de soporte, como antes.
+        Rt = (lambda: self._correccion_simpson1_3(particiones)) if self.simbolico else 0
 
-        soportes = np.linspace(self.a + h, self.b-h, 2*particiones - 1)
-        self.pasos.append({ 'titulo':'Calcular puntos de soporte', 
-                            'procedimiento': 'De h en h desde \\(a\\) hasta \\(b\\)',
-                            'resultado': '\\( x_i =  \\)' + ' ' + str(list(soportes))})
+        self.solucion = self._newton_cotes(2, particiones, [self.a, self.b], correccion = Rt,
+                                           textos = self._TEXTOS_SIMPLES[2])
+        
+        self.metodo = "Simpson 1/3 compuesto"
+        if errores and self.simbolico:
+            self._errores_compuestos('2', particiones)
+        
+        return N(self.solucion)
+    
+    def simpson3_8_compuesto(self, particiones, errores = False):
+        self.solucion = self._newton_cotes(3, particiones, [self.a, self.b], textos = self._TEXTOS_SIMPLES[3])
 
+        self.metodo = "Simpson 3/8 compuesto"
+        if errores and self.simbolico:
+            self._errores_compuestos('3', particiones)
+        
+        return  self.solucion
+
+    def _correccion_simpson1_3(self, particiones, pasos = True):
+        """
+        Deriva 4 veces la función y, si es un polinomio de grado mayor que 3,
+        regresa la corrección R_t que simpson1_3_compuesto suma a la regla.
+        Con pasos = False no se agregan los pasos (convergencia).
+        """
+        x = symbols('x')
+        h = (self.b-self.a)/(2*particiones)
         cuatri = diff(self.exp, x, x, x, x)
 
-        self.pasos.append({ 'titulo':'Derivar 4 veces \\( \\ f(x) \\)', 
-                            'procedimiento': '\\(f^{(i)}(x) = '+latex(diff(self.exp, x)) + ' \\)' + ',  ' +'\\(f^{(ii)}(x) = '+latex(diff(self.exp, x, x)) + ' \\)' + ',  ' +'\\(f^{(iii)}(x) = '+latex(diff(self.exp, x,x,x)) + ' \\)' + ',  ' +'\\(f^{(iv)}(x) = '+latex(cuatri) + ' \\)',
-                            'resultado': ''})
+        if pasos:
+            self.pasos.append({ 'titulo':'Derivar 4 veces \\( \\ f(x) \\)', 
+                                'procedimiento': '\\(f^{(i)}(x) = '+latex(diff(self.exp, x)) + ' \\)' + ',  ' +'\\(f^{(ii)}(x) = '+latex(diff(self.exp, x, x)) + ' \\)' + ',  ' +'\\(f^{(iii)}(x) = '+latex(diff(self.exp, x,x,x)) + ' \\)' + ',  ' +'\\(f^{(iv)}(x) = '+latex(cuatri) + ' \\)',
+                                'resultado': ''})
 
         try:
             grado = degree(self.exp, gen = x )
         except PolynomialError:
-            Rt = 0
-        else:
-            if grado > 3:
-                Rt = - ((h**5)/90)*cuatri.subs(x,((self.b-self.a)/2))
-                self.pasos.append({ 'titulo':'Calcular  \\(\\ R_t \\)', 
-                            'procedimiento': 'Debido a que la función es polinómica de grado '+ str(grado) + ', se calcula \\( \\ R_t = \\frac{h^5}{90} \\cdot f^{(iv)} (p) \\), con \\( \\ p \\in (a,b)  \\)',
-                            'resultado': '\\( \\Rightarrow  \\ R_t = \\frac{'+str(h)+'^5}{90} \\cdot f^{(iv)} ('+ str((self.b-self.a)/2) +')  \\)' +  '\\( \\  \\Rightarrow  \\ R_t = ' + str((h**5)/90) +'\\cdot' +  str(cuatri.subs(x,((self.b-self.a)/2))) + '  = \\  \\)' + str(Rt)
-                            })
-            else: 
-                Rt = 0
-
-        S1_el = [soportes[i] for i in range(0,2*particiones,2)]
-        S2_el = [soportes[i] for i in range(1,2*particiones-1,2)]
-        S1_ev = [self.exp.subs(x,i) for i in S1_el]
-        S2_ev = [self.exp.subs(x,i) for i in S2_el]
-        S1 = sum(S1_ev)
-        S2 = sum(S2_ev)
-
-        self.pasos.append({ 'titulo':'Evaluar los puntos de soporte en  \\( \\ f(x) \\)', 
-                            'procedimiento': 'Para facilitar cálculos, se divide en dos sumas: \\( \\ S_1 = \\sum_{i=0}^{2\\cdot \\ particiones}x_{2i} \\ \\)  y \\(  \\ S_2 = \\sum_{i=1}^{2\\cdot \\ particiones}x_{2i-1}  \\)',
-                            'resultado': 'Puntos de soporte para \\( \\ S_1 \\Rightarrow \\  \\)' + str(S1_el) +'\nEvaluados: '+str(S1_ev) + '. \n\nPara\\( \\ S_2  \\Rightarrow \\ \\)' + str(S2_el) +'.' +' \nEvaluados: '+str(S2_ev)  })
-        
-        self.pasos.append({ 'titulo':'Calcular  \\( \\ S_1 \\ \\) y \\( \\ S_2 \\)  ', 
-                            'procedimiento': 'Como recordatorio  \\( \\ S_1 \\) es la suma de los puntos de soporte en posición par y  \\( \\ S_2 \\) en posición impar. ',
-                            'resultado': ' \\( \\ S_1 = \\  \\)' + str(S1) + ' \n\\( \\ S_2 = \\ \\)' + str(S2)  })
-        
-        fa = self.exp.subs(x, self.a)
-        fb = self.exp.subs(x, self.b)
-
-        self.solucion = (h/3)*(fa + 4*S1 + 2*S2 + fb) + Rt
+            return 0
+        if grado <= 3:
+            return 0
+        Rt = - ((h**5)/90)*cuatri.subs(x,((self.b-self.a)/2))
+        if pasos:
+            self.pasos.append({ 'titulo':'Calcular  \\(\\ R_t \\)', 
+                        'procedimiento': 'Debido a que la función es polinómica de grado '+ str(grado) + ', se calcula \\( \\ R_t = \\frac{h^5}{90} \\cdot f^{(iv)} (p) \\), con \\( \\ p \\in (a,b)  \\)',
+                        'resultado': '\\( \\Rightarrow  \\ R_t = \\frac{'+str(h)+'^5}{90} \\cdot f^{(iv)} ('+ str((self.b-self.a)/2) +')  \\)' +  '\\( \\  \\Rightarrow  \\ R_t = ' + str((h**5)/90) +'\\cdot' +  str(cuatri.subs(x,((self.b-self.a)/2))) + '  = \\  \\)' + str(Rt)
+                        })
+        return Rt
+
+    def _errores_compuestos(self, metodo, particiones):
+        """
+        Calcula los errores total, aproximado y cota de la regla compuesta
+        ('1' Trapezoidal, '2' Simpson 1/3, '3' Simpson 3/8) con particiones
+        aplicaciones de la regla.
+        """
+        x = symbols('x')
+        if metodo == '1':
+            h = (self.b-self.a)/particiones
+            f_biprima = diff(self.exp,x,x)
+            
+            self.total = abs((-((self.b-self.a)*h**2)/12)*f_biprima.subs(x,(self.b-self.a)/2))
+            self.aproximado = (-(h**2)/12)*integrate(f_biprima, (x, self.a, self.b))
+            self.cota = (((self.b-self.a)*h**2)/12)*self.maximo(3, f_biprima)
+        elif metodo == '2':
+            h = (self.b-self.a)/(2*particiones)
+            cuatri = diff(self.exp, x, x, x, x)
 
-        self.pasos.append({ 'titulo':'Calcular la aproximación con la fórmula', 
-                            'procedimiento': '\\( h\\cdot\\frac{1}{3} \\cdot (f(a) + f(b) + 4 \\cdot S1 + 2 \\cdot S2 ) + R_t \\)',
-                            'resultado': ' \\( \\Rightarrow \\ ' + str(h) +'\\cdot\\frac{1}{3} \\cdot ('+ str(fa) +' + '+ str(fb) +' + 4 \\cdot '+  str(S1) +'+ 2 \\cdot '+ str(S2) +' ) +'+ str(Rt) +' \\)' +'\n =  ' + str(self.solucion)   })
-        
-        self.metodo = "Simpson 1/3 compuesto"
-        if errores:
             self.total = -(((self.b-self.a)**5)/(180*particiones**4))*cuatri.subs(x,(self.b-self.a)/2) 
             self.aproximado = -((h**4)/180)*(integrate(cuatri,(x, self.a, self.b)))
             self.cota = ((self.b-self.a)*h**4)/180*self.maximo(5,cuatri)
-        
-        return N(self.solucion)
-    
-    def simpson3_8_compuesto(self, particiones, errores = False):
-        x = symbols('x')
-        h = (self.b-self.a)/(3*particiones)
-        self.pasos.append({ 'titulo':'Calcular h', 
-                            'procedimiento': '\\( h = \\frac{b-a}{2 \\cdot particiones}  \\)',
-                            'resultado': '\\( \\Rightarrow  h = \\frac{'+ str(self.b) + ' - ' + str(self.a) +'}{3 \\cdot'+str(particiones)+'}  = ' + str(h)+ '\\)'})
-
-        soportes = np.linspace(self.a+h, self.b-h, 3*particiones - 1)
-        self.pasos.append({ 'titulo':'Calcular puntos de soporte', 
-                            'procedimiento': 'De h en h desde \\(a\\) hasta \\(b\\)',
-                            'resultado': '\\( x_i =  \\)' + ' ' + str(list(soportes))})
-
-        S1_el = [soportes[i] for i in range(0,3*particiones,3)]
-        S2_el = [soportes[i] for i in range(1,3*particiones,3)]
-        S3_el = [soportes[i] for i in range(2,3*particiones-1,3)]
-
-        S1_ev = [self.exp.subs(x,i) for i in S1_el]
-        S2_ev = [self.exp.subs(x,i) for i in S2_el]
-        S3_ev = [self.exp.subs(x,i) for i in S3_el]
-        
-        S1 = sum(S1_ev)# 1,4,7,10
-        S2 = sum(S2_ev)# 2,5,8,11
-        S3 = sum(S3_ev)# 3,6,9
-        #S4 = sum([self.exp.subs(x,soportes[i]) for i in range(3,3*particiones,3)]) 4,
-
-        self.pasos.append({ 'titulo':'Evaluar los puntos de soporte en  \\( \\ f(x) \\)', 
-                            'procedimiento': 'Para facilitar cálculos, se divide en dos sumas: \\( \\ S_1 = \\sum_{i=0}^{2\\cdot \\ particiones-1}x_{3i} \\ \\), \\(  \\ S_2 = \\sum_{i=1}^{2\\cdot \\ particiones}x_{3i-1}  \\) y \\(  \\ S_2 = \\sum_{i=2}^{2\\cdot \\ particiones}x_{3i-2}  \\)',
-                            'resultado': 'Puntos de soporte para \\( \\ S_1 \\Rightarrow \\  \\)' + str(S1_el) +'\nEvaluados: '+str(S1_ev) + ' \n\nPara\\( \\ S_2  \\Rightarrow \\ \\)' + str(S2_el) +'' +' \nEvaluados: '+str(S2_ev)+ ' \n\nPara\\( \\ S_3  \\Rightarrow \\ \\)' + str(S3_el) +'' +' \nEvaluados: '+str(S3_ev)  })
-        
-        #print(f'{self.exp.subs(x,self.a)} {self.exp.subs(x,self.b)} 3*{[self.exp.subs(x,soportes[i]) for i in range(0,3*particiones,3)]} 3*{[self.exp.subs(x,soportes[i]) for i in range(1,3*particiones,3)]}  2*{[self.exp.subs(x,soportes[i]) for i in range(2,3*particiones-1,3)]}' )
-        self.pasos.append({ 'titulo':'Calcular  \\( \\ S_1 \\ \\),  \\( \\ S_2 \\ \\) y  \\( \\ S_3 \\)  ', 
-                            'procedimiento': 'Como recordatorio  \\( \\ S_1 \\) es la suma de los puntos de soporte en posición 0, 3, 4, 7,  10, ...   \\( \\ S_2 \\) en posición 1, 4, 7, 10, ... y  \\( \\ S_3 \\) en posición 2, 5, 8, 11, ... . ',
-                            'resultado': ' \\( \\ S_1 = \\  \\)' + str(S1) + ' \n\\( \\ S_2 = \\ \\)' + str(S2) + ' \n\\( \\ S_3 = \\ \\)' + str(S3) })
-        
-        fa = self.exp.subs(x,self.a)
-        fb = self.exp.subs(x,self.b)
-        s1_3 = 3*S1
-        s2_3 = 3*S2
-        s3_2 = 2*S3
-        self.solucion = (3*h/8)*(fa + s1_3 + s2_3 + s3_2  + fb)
-
-        self.pasos.append({ 'titulo':'Calcular la aproximación con la fórmula', 
-                            'procedimiento': '\\( 3 \\cdot h\\cdot\\frac{1}{8} \\cdot (f(a) + f(b) + 3 \\cdot S1 + 3 \\cdot S2 + 2 \\cdot S3) \\)',
-                            'resultado': ' \\( \\Rightarrow \\ 3 \\cdot' + str(h) +'\\cdot\\frac{1}{8} \\cdot ('+ str(fa) +' + '+ str(fb) +' + 3 \\cdot '+  str(S1) +'+ 3\\cdot '+ str(S2) + '\\) \n \\( + 2\\cdot '+ str(S3)  +' \\)' +' =  ' + str(self.solucion)   })
-        
-
-        self.metodo = "Simpson 3/8 compuesto"
-        if errores:
+        elif metodo == '3':
+            h = (self.b-self.a)/(3*particiones)
             cuatriprima = diff(self.exp, x, x, x, x)
             
             self.total = (-((self.b-self.a)/80)*h**4)*cuatriprima.subs(x,(self.b-self.a)/2)
             self.aproximado = (-(h**4/80))*(integrate(cuatriprima, (x, self.a, self.b)))
             self.cota = ((self.b-self.a)*h**4)/80*self.maximo(5,cuatriprima)
-        
-        return  self.solucion
+        else:
+            raise ValueError('No existe ese método')
+
+    def newton_cotes(self, particiones, orden, abierta = False):
+        """
+        Regla compuesta de Newton-Cotes de grado orden (ver pesos_newton_cotes)
+        con particiones aplicaciones de la regla. Con orden 1, 2 y 3 cerradas
+        son Trapezoidal, Simpson 1/3 y Simpson 3/8; con 4, Boole.
+        """
+        self.solucion = self._newton_cotes(orden, particiones, [self.a, self.b], abierta = abierta)
+        self.metodo = nombre_newton_cotes(orden, abierta) + " compuesto"
+        return N(self.solucion)
     
     ####----- DOBLES: ------####
     def trapecio_compuesto_doble(self, intervalo2, particiones):
@@ -311,579 +309,632 @@ class integracion_numerica():
         """
         x = symbols('x')
         y = symbols('y')
-        try: 
-            a = float(self.a)
-            b = float(self.b)
-        except:
-            bandera = 0
-        else:
-            bandera = 1
-        
-        if bandera:
-            h = (self.b-self.a)/particiones
-            self.pasos.append({ 'titulo':'Calcular \\( \\ h_x \\ \\)', 
-                            'procedimiento': '\\( h_x = \\frac{b-a}{ particiones}  \\)',
-                            'resultado': '\\( \\Rightarrow  h_x = \\frac{'+ str(self.b) + ' - ' + str(self.a) +'}{'+str(particiones)+'}  = ' + str(h)+ '\\)'})
-
-
-            puntos_soporte = np.linspace(self.a + h,self.b - h, particiones-1)
-
-            self.pasos.append({ 'titulo':'Calcular puntos de soporte', 
-                            'procedimiento': 'De \\( \\ h_x \\ \\) en \\( \\ h_x \\ \\) desde \\(a\\) hasta \\(b\\)',
-                            'resultado': '\\( x_i =  \\)' + ' ' + str(list(puntos_soporte))})
-
-            funcion_evaluada = [self.exp.subs(x,t) for t in puntos_soporte]
-            funcion_evaluada_latex = [' \\(  ' + latex(t) + ' \\) ' for t in funcion_evaluada]
-            self.pasos.append({ 'titulo':'Evaluar los puntos de soporte en  \\( \\ f(x,y) \\)', 
-                            'procedimiento': '\\( f(x_i, y) \\)',
-                            'resultado': '\\( f(x_i, y) = \\ \\)' + '[ '+ (', '.join(funcion_evaluada_latex)) + ']' })
-        
-            aprox_inter = sum(funcion_evaluada)
-            self.pasos.append({ 'titulo':'Calcular la suma de los puntos de soporte evaluados', 
-                            'procedimiento': '\\( \\sum f(x_i, y) \\)',
-                            'resultado': ' = \\( ' + latex(aprox_inter) + '\\)' })
-
-            fa = self.exp.subs(x,self.a)
-            fb = self.exp.subs(x,self.b)
-    
-            primera_integral =  h*((1/2)*(fa + fb) + aprox_inter) 
-
-            self.pasos.append({ 'titulo':'Calcular \\( \\ g(y) \\ \\)con la fórmula', 
-                            'procedimiento': '\\( h_x\\cdot(\\frac{1}{2} \\cdot (f(a,y) + f(b,y)) + \\sum f(x_i, y)) \\)',
-                            'resultado': '\\( '+ str(h) + ' \\cdot(\\frac{1}{2} \\cdot ('+latex(fa) +' + ' + latex(fb) +') + ' + latex(aprox_inter)  +') = ' + latex(simplify(primera_integral)) + ' \\)' + '\n \\( \\therefore g(y) = '+  latex(simplify(primera_integral)) + ' \\)'   })
-        
-
-            c = intervalo2[0]
-            d = intervalo2[1]
-            h = (d-c)/particiones
-            self.pasos.append({ 'titulo':'Calcular \\( \\ h_y \\ \\)', 
-                            'procedimiento': '\\( h_y = \\frac{d-c}{ particiones}  \\)',
-                            'resultado': '\\( \\Rightarrow  h_y = \\frac{'+ str(d) + ' - ' + str(c) +'}{'+str(particiones)+'}  = ' + str(h)+ '\\)'})
-
-
-            self.c = c
-            self.d = d
-            puntos_soporte = np.linspace(c + h, d - h, particiones-1)
-
-            self.pasos.append({ 'titulo':'Calcular puntos de soporte', 
-                            'procedimiento': 'De \\( \\ h_y \\ \\) en \\( \\ h_y \\ \\) desde \\(c\\) hasta \\(d\\)',
-                            'resultado': '\\( y_i =  \\)' + ' ' + str(list(puntos_soporte))})
+        rectangulo = self._rectangulo()
+        self.solucion = self._newton_cotes_doble(intervalo2, 1, particiones, textos = self._TEXTOS_DOBLES[1],
+                                                 simple = lambda integral: integral.trapezoidal_compuesto(particiones, errores = False))
 
-            funcion_evaluada = [primera_integral.subs(y,t) for t in puntos_soporte]
-            funcion_evaluada_latex =  [' \\(  ' + latex(t) + ' \\) ' for t in funcion_evaluada]
-            self.pasos.append({ 'titulo':'Evaluar los puntos de soporte en  \\( \\ g(y) \\)', 
-                            'procedimiento': '\\( g(y_i) \\)',
-                            'resultado': '\\( g(y_i) = \\ \\)' + '[ '+ (', '.join(funcion_evaluada_latex)) + ']' })
-        
-            aprox_inter = sum(funcion_evaluada)
-
-            self.pasos.append({ 'titulo':'Calcular la suma de los puntos de soporte evaluados', 
-                            'procedimiento': '\\( \\sum g(y_i) \\)',
-                            'resultado': ' = \\( ' + latex(aprox_inter) + '\\)' })
-
-            gc = primera_integral.subs(y,c)
-            gd = primera_integral.subs(y,d)
-            self.solucion =  h*((1/2)*(gc + gd) + aprox_inter) 
-
-            self.pasos.append({ 'titulo':'Aproximar la integral con la fórmula', 
-                            'procedimiento': '\\( h_y\\cdot(\\frac{1}{2} \\cdot (g(c) + g(d)) + \\sum g(y_i)) \\)',
-                            'resultado': '\\( '+ str(h) + ' \\cdot(\\frac{1}{2} \\cdot ('+ str(gc) +' + ' + str(gd) +') + ' + str(aprox_inter)  +') = ' + str(self.solucion) +' \\)'   })
-        
+        if rectangulo:
             self.metodo = "Trapezoidal compuesto doble numérico"
 
+            h = (self.d-self.c)/particiones
             f_biprima = diff(self.exp,x,x)
-
-            self.total = abs((-((self.b-self.a)*h**2)/12)*f_biprima.subs(x,(self.b-self.a)/2))
-            self.aproximado = (-(h**2)/12)*integrate(f_biprima, (x, self.a, self.b))
-            self.cota = (((self.b-self.a)*h**2)/12)*self.maximo(3, f_biprima)
-
-            return N(self.solucion)
+            # La cota busca el máximo en x, así que solo se calcula si f'' no depende de y.
+            if self.simbolico and y not in f_biprima.free_symbols:
+                self.total = abs((-((self.b-self.a)*h**2)/12)*f_biprima.subs(x,(self.b-self.a)/2))
+                self.aproximado = (-(h**2)/12)*integrate(f_biprima, (x, self.a, self.b))
+                self.cota = 0 if f_biprima == 0 else (((self.b-self.a)*h**2)/12)*self.maximo(3, f_biprima)
         else:
-            c = intervalo2[0]
-            d = intervalo2[1]
-            h = (d-c)/particiones
-            self.pasos.append({ 'titulo':'Calcular \\( \\ h_x \\ \\)', 
-                            'procedimiento': '\\( h_x = \\frac{d-c}{ particiones}  \\)',
-                            'resultado': '\\( \\Rightarrow  h_x = \\frac{'+ str(d) + ' - ' + str(c) +'}{'+str(particiones)+'}  = ' + str(h)+ '\\)'})
-            a = parse_expr(self.a)
-            b = parse_expr(self.b)
-            self.a = a
-            self.b = b
-            self.c = c
-            self.d = d
-            puntos_soporte = np.linspace(c + h,d - h, particiones-1)
-
-            self.pasos.append({ 'titulo':'Calcular puntos de soporte', 
-                            'procedimiento': 'De \\( \\ h_x \\ \\) en \\( \\ h_x \\ \\) desde \\(c\\) hasta \\(d\\)',
-                            'resultado': '\\( x_i =  \\)' + ' ' + str(list(puntos_soporte))})
-            funcion_evaluada = []
-            procedimiento = []
-            for t in puntos_soporte:
-                aa = float(a.subs(x, t))
-                bb = float(b.subs(x, t))
-                expresion =  self.exp.subs(x,t)
-
-                integral = integracion_numerica([aa, bb], str(expresion.subs(y, x)) )
-                aproximacion = integral.trapezoidal_compuesto(particiones, errores = False)
-
-                procedimiento.append({'titulo':'Calcular evaluando el punto de soporte \\( \\ '+ str(t) +' \\ \\) \\( \\ \\Rightarrow \\int_{'+ str(aa)+ '}^{'+ str(bb)+ '} '+ latex(expresion) +'\\ dy\\ \\) con el método Trapezoidal de '+ str(particiones) + ' particiones', 
-                                      'procedimiento': integral.pasos,
-                                      'resultado': str(aproximacion) 
-                                    })
-                funcion_evaluada.append(aproximacion)
-            self.pasos.append({ 'titulo':'Calcular las integrales evaluando los puntos de soporte en los límites de la integral y en la función', 
-                            'procedimiento2': procedimiento,
-                            'resultado': '\\( G(x_i) =  ' + str(funcion_evaluada) + '\\)' })
-
-            #funcion_evaluada = [integracion_numerica([float(a.subs(x, t)), float(b.subs(x, t))], str(self.exp.subs(x,t).subs(y, x))).trapezoidal_compuesto(particiones) for t in puntos_soporte]
-            aprox_inter = sum(funcion_evaluada)
-
-            self.pasos.append({ 'titulo':'Calcular la suma de las integrales evaluadas', 
-                            'procedimiento': '\\( \\sum G(x_i) \\)',
-                            'resultado': '\\( \\sum G(x_i) =  ' + str(aprox_inter) + '\\)' })
-
-            aa1 = float(a.subs(x, c))
-            bb1 = float(b.subs(x,c))
-            expression1 = self.exp.subs(x,c)
-
-            aa2 = float(a.subs(x, d))
-            bb2 = float(b.subs(x, d))
-            expression2 = self.exp.subs(x,d)
-
-            procedimiento2 = []
-            integral_c = integracion_numerica([aa1, bb1], str(expression1.subs(y, x)))
-            aproximacionc = integral_c.trapezoidal_compuesto(particiones, errores = False) 
-            procedimiento2.append({'titulo':'Calcular evaluando el punto  \\( \\ '+ str(c) +' \\ \\) \\( \\ \\Rightarrow \\int_{'+ str(aa1)+ '}^{'+ str(bb1)+ '} '+ latex(expression1) +'\\ dy\\ \\) con el método Trapezoidal de '+ str(particiones) + ' particiones', 
-                                      'procedimiento': integral_c.pasos,
-                                      'resultado': str(aproximacionc) 
-                                    })
-
-            integral_d = integracion_numerica([aa2, bb2], str(expression2.subs(y, x)))
-            aproximaciond = integral_d.trapezoidal_compuesto(particiones, errores = False)
-            procedimiento2.append({'titulo':'Calcular evaluando el punto  \\( \\ '+ str(d) +' \\ \\) \\( \\ \\Rightarrow \\int_{'+ str(aa2)+ '}^{'+ str(bb2)+ '} '+ latex(expression2) +'\\ dy\\ \\) con el método Trapezoidal de '+ str(particiones) + ' particiones', 
-                                      'procedimiento': integral_d.pasos,
-                                      'resultado': str(aproximaciond) 
-                                    })
-
-            self.pasos.append({ 'titulo':'Calcular las integrales evaluando los límites y la función con \\( \\ c \\ \\) y \\( \\ d \\ \\)', 
-                            'procedimiento2': procedimiento2,
-                            'resultado': '\\( G(c) =  ' + str(aproximacionc) + '\\)' + '\\( \\ \\ G(d) =  ' + str(aproximaciond) + '\\)'  })
-
-            self.solucion =  h*((1/2)*(aproximacionc + aproximaciond)  + aprox_inter) 
-            
-            self.pasos.append({ 'titulo':'Aproximar la integral con la fórmula', 
-                            'procedimiento': '\\( h_x\\cdot(\\frac{1}{2} \\cdot(G(c) + G(d) ) + \sum G(x_i)  \\) ',
-                            'resultado': '\\( \\Rightarrow '+ str(h)+'\\cdot(\\frac{1}{2} \\cdot ('+ str(aproximacionc) +'  + '+ str(aproximaciond) +') +'+ str(aprox_inter) +'  = \\ ' + str(self.solucion)+' \\)'  })
-
             self.metodo = "Trapezoidal compuesto doble"
-            return N(self.solucion)
+        return N(self.solucion)
         
     def simpson1_3_compuesto_doble(self, intervalo2, particiones):
         """
         Recibe los limites de la integral de afuera.
         """
-        x = symbols('x')
-        y = symbols('y')
-
-        try: 
-            a = float(self.a)
-            b = float(self.b)
-        except:
-            bandera = 0
-        else:
-            bandera = 1
+        rectangulo = self._rectangulo()
+        self.solucion = self._newton_cotes_doble(intervalo2, 2, particiones, textos = self._TEXTOS_DOBLES[2],
+                                                 simple = lambda integral: integral.simpson1_3_compuesto(particiones, errores = False))
+        self.metodo = "Simpson 1/3 compuesto doble" + (" numérico" if rectangulo else "")
+        return N(self.solucion)
         
-        if bandera:
-            h = (self.b-self.a)/(2*particiones)
-            self.pasos.append({ 'titulo':'Calcular \\( \\ h_x \\ \\)', 
-                            'procedimiento': '\\( h_x = \\frac{b-a}{ 2 \\cdot particiones}  \\)',
-                            'resultado': '\\( \\Rightarrow  h_x = \\frac{'+ str(self.b) + ' - ' + str(self.a) +'}{2 \\cdot'+str(particiones)+'}  = ' + str(h)+ '\\)'})
-            soportes = np.linspace(self.a + h, self.b-h, 2*particiones - 1)
-            self.pasos.append({ 'titulo':'Calcular puntos de soporte', 
-                            'procedimiento': 'De \\( \\ h_x \\ \\) en \\( \\ h_x \\ \\) desde \\(a\\) hasta \\(b\\)',
-                            'resultado': '\\( x_i =  \\)' + ' ' + str(list(soportes))})
-
-            S1_el = [soportes[i] for i in range(0,2*particiones,2)]
-            S2_el = [soportes[i] for i in range(1,2*particiones-1,2)]
-            S1_ev = [self.exp.subs(x,i) for i in S1_el]
-            S2_ev = [self.exp.subs(x,i) for i in S2_el]
-            S1 = sum(S1_ev)
-            S2 = sum(S2_ev)
-            
-            self.pasos.append({ 'titulo':'Evaluar los puntos de soporte en  \\( \\ f(x,y) \\)', 
-                            'procedimiento': 'Para facilitar cálculos, se divide en dos sumas: \\( \\ S_1 = \\sum_{i=0}^{2\\cdot \\ particiones}f(x_{2i},y) \\ \\)  y \\(  \\ S_2 = \\sum_{i=1}^{2\\cdot \\ particiones}f(x_{2i-1},y)  \\)',
-                            'resultado': 'Puntos de soporte para \\( \\ S_1 \\Rightarrow \\  ' + latex(S1_el) +'\\)\nEvaluados: \\( '+latex(S1_ev) + '\\). \n\nPara\\( \\ S_2  \\Rightarrow \\ ' + latex(S2_el) +'\\)' +' \nEvaluados: \\('+latex(S2_ev)+'\\)'  })
-            
-            self.pasos.append({ 'titulo':'Calcular \\( \\ S_1 \\ \\) y \\( \\ S_2 \\)  ', 
-                            'procedimiento': 'Como recordatorio  \\( \\ S_1 \\) es la suma de los puntos de soporte evaluados en posición par y  \\( \\ S_2 \\) en posición impar. ',
-                            'resultado': ' \\( \\ S_1 = \\ ' + latex(S1) + ' \\) \n\\( \\ S_2 = \\ ' + latex(S2) +'\\)' })
-
-            fa  = self.exp.subs(x, self.a)
-            fb = self.exp.subs(x, self.b)
-            primera_integral =  (h/3)*(fa + 4*S1 + 2*S2 + fb) #+Rt
-            self.pasos.append({ 'titulo':'Calcular \\( \\ g(y) \\ \\)con la fórmula', 
-                            'procedimiento': '\\( h\\cdot\\frac{1}{3} \\cdot (f(a,y) + f(b,y) + 4 \\cdot S1 + 2 \\cdot S2 )  \\)',
-                            'resultado': ' \\( \\Rightarrow \\ ' + str(h) +'\\cdot\\frac{1}{3} \\cdot ('+ latex(fa) +' + '+ latex(fb) +' + 4 \\cdot '+  latex(S1) +'+ 2 \\cdot '+ latex(S2) +' )  \\)' +'\n \\(= \\ ' + latex(primera_integral)+'\\)'    })
-            c = intervalo2[0]
-            d = intervalo2[1]
-            h = (d-c)/(2*particiones)
-            self.pasos.append({ 'titulo':'Calcular \\( \\ h_y \\ \\)', 
-                            'procedimiento': '\\( h_y = \\frac{d-c}{ 2 \\cdot particiones}  \\)',
-                            'resultado': '\\( \\Rightarrow  h_y = \\frac{'+ str(d) + ' - ' + str(c) +'}{2 \\cdot'+str(particiones)+'}  = ' + str(h)+ '\\)'})
-            
+    def simpson3_8_compuesto_doble(self, intervalo2, particiones):
+        """
+        Recibe los limites de la integral de afuera.
+        """
+        rectangulo = self._rectangulo()
+        self.solucion = self._newton_cotes_doble(intervalo2, 3, particiones, textos = self._TEXTOS_DOBLES[3],
+                                                 simple = lambda integral: integral.simpson3_8_compuesto(particiones, errores = False))
+        self.metodo = "Simpson 3/8 compuesto doble" + (" numérico" if rectangulo else "")
+        return N(self.solucion)
 
-            self.c = c
-            self.d = d
-            soportes = np.linspace(c + h, d - h, 2*particiones - 1)
-            self.pasos.append({ 'titulo':'Calcular puntos de soporte', 
-                            'procedimiento': 'De \\( \\ h_y \\ \\) en \\( \\ h_y \\ \\) desde \\(c\\) hasta \\(d\\)',
-                            'resultado': '\\( y_i =  \\)' + ' ' + str(list(soportes))})
-
-            S1_el = [soportes[i] for i in range(0,2*particiones,2)]
-            S2_el = [soportes[i] for i in range(1,2*particiones-1,2)]
-            S1_ev = [primera_integral.subs(y,i) for i in S1_el]
-            S2_ev = [primera_integral.subs(y,i) for i in S2_el]
-            S1 = sum(S1_ev)
-            S2 = sum(S2_ev)
-
-            self.pasos.append({ 'titulo':'Evaluar los puntos de soporte en  \\( \\ g(y) \\)', 
-                            'procedimiento': 'Para facilitar cálculos, se divide en dos sumas: \\( \\ S_1 = \\sum_{i=0}^{2\\cdot \\ particiones}g(y_{2i}) \\ \\)'+  '  y ' +'\\(  \\ S_2 = \\sum_{i=1}^{2\\cdot \\ particiones}g(y_{2i-1})  \\)',
-                            'resultado': 'Puntos de soporte para \\( \\ S_1 \\Rightarrow \\  ' + latex(S1_el) +'\\)\nEvaluados: \\( '+latex(S1_ev) + '\\). \n\nPara\\( \\ S_2  \\Rightarrow \\ ' + latex(S2_el) +'\\)' +' \nEvaluados: \\('+latex(S2_ev)+'\\)'  })
-            
-            self.pasos.append({ 'titulo':'Calcular  \\( \\ S_1 \\ \\) y \\( \\ S_2 \\)  ', 
-                            'procedimiento': 'Como recordatorio  \\( \\ S_1 \\) es la suma de los puntos de soporte evaluados en posición par y  \\( \\ S_2 \\) en posición impar. ',
-                            'resultado': ' \\( \\ S_1 = \\ ' + latex(S1) + ' \\) \n\\( \\ S_2 = \\ ' + latex(S2) +'\\)' })
-
-            gc = primera_integral.subs(y, c)
-            gd = primera_integral.subs(y, d)           
-            self.solucion =  (h/3)*(gc + 4*S1 + 2*S2 + gd) #+Rt
-            self.pasos.append({ 'titulo':'Aproximar la integral con la fórmula', 
-                            'procedimiento': '\\( h\\cdot\\frac{1}{3} \\cdot (g(c) + g(d) + 4 \\cdot S1 + 2 \\cdot S2 )  \\)',
-                            'resultado': ' \\( \\Rightarrow \\ ' + str(h) +'\\cdot\\frac{1}{3} \\cdot ('+ latex(gc) +' + '+ latex(gd) +' + 4 \\cdot '+  latex(S1) +'+ 2 \\cdot '+ latex(S2) +' )  \\)' +'\n \\(= \\ ' + latex(self.solucion)+'\\)'    })
-            
-            self.metodo = "Simpson 1/3 compuesto doble numérico"
+    def newton_cotes_doble(self, intervalo2, particiones, orden, abierta = False):
+        """
+        Recibe los limites de la integral de afuera. Aplica en las dos
+        variables la regla compuesta de Newton-Cotes de grado orden.
+        """
+        rectangulo = self._rectangulo()
+        self.solucion = self._newton_cotes_doble(intervalo2, orden, particiones, abierta = abierta)
+        self.metodo = nombre_newton_cotes(orden, abierta) + " compuesto doble" + (" numérico" if rectangulo else "")
+        return N(self.solucion)
 
-            return N(self.solucion)
-            
+    ####----- CLENSHAW-CURTIS: ------####
+    def clenshaw_curtis(self, n):
+        """
+        Cuadratura de Clenshaw-Curtis con n + 1 nodos de Chebyshev (n se
+        redondea a la siguiente potencia de 2). Se aproxima con los niveles
+        2, 4, ..., n: los nodos de cada nivel están contenidos en los del
+        siguiente, así que cada valor de la función se evalúa una sola vez, y
+        la diferencia entre los dos últimos niveles es el error aproximado.
+        """
+        niveles = niveles_clenshaw_curtis(n)
+        ultimo = niveles[-1]
+        nodos, _ = pesos_clenshaw_curtis(ultimo)
+        a, b = float(self.a), float(self.b)
+        puntos = a + (b - a)*(1 + nodos)/2
+
+        valores = np.zeros(ultimo + 1)
+        calculados = np.zeros(ultimo + 1, dtype = bool)
+        tabla = []
+        for nivel in niveles:
+            indices = np.arange(0, ultimo + 1, ultimo//nivel)
+            nuevos = indices[~calculados[indices]]
+            valores[nuevos] = self._evaluar(puntos[nuevos])
+            calculados[nuevos] = True
+            pesos = pesos_clenshaw_curtis(nivel)[1]
+            tabla.append((nivel, len(nuevos), (b - a)/2*np.dot(pesos, valores[indices])))
+
+        self._niveles_clenshaw_curtis(tabla, '\\( \\frac{b-a}{2} \\sum_k w_k f\\left(a + (b-a)\\frac{1 + \\cos(k\\pi/n)}{2}\\right) \\)')
+        self.metodo = "Clenshaw-Curtis"
+        return N(self.solucion)
+
+    def clenshaw_curtis_doble(self, intervalo2, n):
+        """
+        Recibe los limites de la integral de afuera. Clenshaw-Curtis en las dos
+        variables (producto tensorial de los pesos) con los niveles anidados
+        de clenshaw_curtis. Si los límites son funciones de x, los nodos en y
+        de cada x_i se toman en [a(x_i), b(x_i)].
+        """
+        x, y = symbols('x y')
+        niveles = niveles_clenshaw_curtis(n)
+        ultimo = niveles[-1]
+        nodos, _ = pesos_clenshaw_curtis(ultimo)
+        t = (1 + nodos)/2
+        f = lambdify((x, y), self.exp, 'numpy')
+        c, d = float(intervalo2[0]), float(intervalo2[1])
+        self.c = c
+        self.d = d
+
+        rectangulo = self._rectangulo()
+        if rectangulo:
+            a, b = float(self.a), float(self.b)
+            externos = a + (b - a)*t
+            inferior, superior = np.full(ultimo + 1, c), np.full(ultimo + 1, d)
+            mitad = (b - a)/2
         else:
-            c = intervalo2[0]
-            d = intervalo2[1]
-            h = (d-c)/(2*particiones)
+            self.a = parse_expr(str(self.a))
+            self.b = parse_expr(str(self.b))
+            externos = c + (d - c)*t
+            inferior = np.broadcast_to(lambdify(x, self.a, 'numpy')(externos), externos.shape).astype(float)
+            superior = np.broadcast_to(lambdify(x, self.b, 'numpy')(externos), externos.shape).astype(float)
+            mitad = (d - c)/2
+
+        valores = np.zeros((ultimo + 1, ultimo + 1))
+        calculados = np.zeros((ultimo + 1, ultimo + 1), dtype = bool)
+        tabla = []
+        for nivel in niveles:
+            indices = np.arange(0, ultimo + 1, ultimo//nivel)
+            malla = np.ix_(indices, indices)
+            filas, columnas = np.nonzero(~calculados[malla])
+            filas, columnas = indices[filas], indices[columnas]
+            Y = inferior[filas] + (superior - inferior)[filas]*t[columnas]
+            valores[filas, columnas] = np.broadcast_to(f(externos[filas], Y), Y.shape)
+            calculados[filas, columnas] = True
+            pesos = pesos_clenshaw_curtis(nivel)[1]
+            internos = (superior - inferior)[indices]/2*(valores[malla] @ pesos)
+            tabla.append((nivel, len(filas), mitad*np.dot(pesos, internos)))
+
+        self._niveles_clenshaw_curtis(tabla, '\\( \\frac{d-c}{2} \\sum_i w_i \\frac{b(x_i)-a(x_i)}{2} \\sum_j w_j f(x_i, y_{ij}) \\)' if not rectangulo
+                                      else '\\( \\frac{b-a}{2} \\cdot \\frac{d-c}{2} \\sum_i \\sum_j w_i w_j f(x_i, y_j) \\)')
+        self.metodo = "Clenshaw-Curtis doble" + (" numérico" if rectangulo else "")
+        return N(self.solucion)
 
-            self.pasos.append({ 'titulo':'Calcular \\( \\ h_x \\ \\)', 
-                            'procedimiento': '\\( h_x = \\frac{d-c}{2\\cdot particiones}  \\)',
-                            'resultado': '\\( \\Rightarrow  h_x = \\frac{'+ str(d) + ' - ' + str(c) +'}{ 2 \\cdot '+str(particiones)+'}  = ' + str(h)+ '\\)'})
+    def _niveles_clenshaw_curtis(self, tabla, formula):
+        self.pasos.append({ 'titulo':'Calcular los pesos de Clenshaw-Curtis',
+                            'procedimiento': 'Los nodos son \\( \\ t_k = \\cos(k\\pi/n), \\ k = 0, \\dots, n \\) en [-1, 1] y los pesos \\( \\ w_k \\) se obtienen con la transformada rápida de Fourier en \\( O(n \\log n) \\).',
+                            'resultado': 'Fórmula: ' + formula})
+        self._niveles(tabla, 'n = {}')
+
+    def _niveles(self, tabla, etiqueta):
+        # tabla: (nivel, puntos nuevos, aproximación) de cada nivel anidado.
+        for (nivel, nuevos, aproximacion), anterior in zip(tabla, [None] + tabla[:-1]):
+            self.pasos.append({ 'titulo':'Nivel \\( \\ ' + etiqueta.format(nivel) + ' \\)',
+                                'procedimiento': str(nuevos) + ' puntos evaluados por primera vez; los demás son los del nivel anterior.',
+                                'resultado': '\\( \\Rightarrow \\ ' + str(aproximacion) + ' \\)'
+                                             + ('' if anterior is None else '\n Diferencia con el nivel anterior: \\( ' + str(aproximacion - anterior[2]) + ' \\)')})
+        self.solucion = Float(tabla[-1][2])
+        self.aproximado = Float(tabla[-1][2] - tabla[-2][2])
+        self.pasos.append({ 'titulo':'Estimar el error',
+                            'procedimiento': 'La diferencia entre los dos últimos niveles es el error aproximado; en total se evaluaron ' + str(sum(fila[1] for fila in tabla)) + ' puntos.',
+                            'resultado': '\\( ' + str(self.aproximado) + ' \\)'})
+
+    ####----- TANH-SINH: ------####
+    def extremo_singular(self):
+        """
+        Regresa el primer límite que es infinito o donde la función no es
+        finita (1/sqrt(x) en 0, log(x) en 0, sin(x)/x en 0), o None si los dos
+        extremos son regulares. Ahí las reglas de Newton-Cotes evalúan zoo o
+        nan y conviene usar tanh_sinh.
+        """
+        return extremo_singular(self.exp, [self.a, self.b])
 
+    def tanh_sinh(self, tolerancia = 1e-10, niveles = None):
+        """
+        Cuadratura tanh-sinh (doble exponencial). Con el cambio de variable
+        x = tanh(pi/2 sinh t) la integral en [a, b] se vuelve una en toda la
+        recta cuyo integrando decae doble exponencialmente, y la regla del
+        trapecio con paso h = 2^-k converge muy rápido aunque f no sea finita
+        en a o en b. Los intervalos [a, oo), (-oo, b] y (-oo, oo) usan
+        x = a + exp(pi/2 sinh t) y x = sinh(pi/2 sinh t).
+
+        Los nodos de cada nivel incluyen los del anterior, así que se suman
+        solo los nuevos (ver nodos_tanh_sinh). Se refina hasta que la
+        diferencia entre dos niveles es menor que tolerancia (relativa) o
+        hasta niveles (por defecto NIVELES_TANH_SINH).
+
+        La función se evalúa en la distancia al extremo más cercano
+        (f(a + s) o f(b - s)), así los nodos pegados a un extremo no se
+        redondean al extremo mismo. Si la expresión vuelve a restar (1 - x^2
+        con x = -1 + s) los nodos de la cola que dan inf se omiten.
+        """
+        x = symbols('x')
+        niveles = NIVELES_TANH_SINH if niveles is None else min(int(niveles), NIVELES_TANH_SINH)
+        a, b = sympify(self.a), sympify(self.b)
+        signo = 1
+        if a == b:
+            raise ValueError('Los límites de la integral son iguales')
+        if a > b:
+            a, b, signo = b, a, -1
+
+        # Expresión que se evalúa en cada lado: los nodos con t <= 0 (-1) se
+        # miden desde a y los demás (1) desde b; con 0 se usan todos.
+        # extremos guarda, por lado, el extremo y el sentido en que se mide s.
+        if a.is_infinite and b.is_infinite:
+            tipo, formula, escala = 'infinito', 'x = \\sinh\\left(\\frac{\\pi}{2}\\sinh t\\right)', 1
+            lados, extremos = {0: self.exp}, {}
+        elif b.is_infinite:
+            tipo, formula, escala = 'semiinfinito', 'x = a + e^{\\frac{\\pi}{2}\\sinh t}', 1
+            lados, extremos = {0: self.exp.subs(x, a + x)}, {0: (float(a), 1)}
+        elif a.is_infinite:
+            tipo, formula, escala = 'semiinfinito', 'x = b - e^{\\frac{\\pi}{2}\\sinh t}', 1
+            lados, extremos = {0: self.exp.subs(x, b - x)}, {0: (float(b), -1)}
+        else:
+            tipo, formula, escala = 'finito', 'x = \\frac{a+b}{2} + \\frac{b-a}{2}\\tanh\\left(\\frac{\\pi}{2}\\sinh t\\right)', float(b - a)/2
+            lados = {-1: self.exp.subs(x, a + x), 1: self.exp.subs(x, b - x)}
+            extremos = {-1: (float(a), 1), 1: (float(b), -1)}
+        compiladas = {lado: lambdify(x, expresion, 'numpy') for lado, expresion in lados.items()}
+
+        tabla = []
+        suma = 0.0
+        with np.errstate(all = 'ignore'):
+            for nivel in range(niveles + 1):
+                t, s, pesos = nodos_tanh_sinh(nivel, tipo)
+                distancias = escala*s
+                valores = np.empty(len(t))
+                for lado, f in compiladas.items():
+                    seleccion = t <= 0 if lado == -1 else t > 0 if lado == 1 else np.ones(len(t), dtype = bool)
+                    valores[seleccion] = np.broadcast_to(f(distancias[seleccion]), distancias[seleccion].shape)
+                    if lado in extremos:
+                        # En la cola, donde a + s (o b - s) ya es el extremo en
+                        # punto flotante, la expresión puede volver a restar
+                        # (1 - (s - 1)^2 = 0) y dar inf. El peso ahí es
+                        # despreciable, así que esos nodos no se suman.
+                        extremo, sentido = extremos[lado]
+                        cola = seleccion & (extremo + sentido*distancias == extremo) & ~np.isfinite(valores)
+                        valores[cola] = 0
+                    _limites_removibles(valores, seleccion, lados[lado], distancias)
+                suma += np.dot(pesos, valores)
+                tabla.append((nivel, len(t), signo*escala*2.0**-nivel*suma))
+                if nivel >= 3 and abs(tabla[-1][2] - tabla[-2][2]) <= tolerancia*max(1, abs(tabla[-1][2])):
+                    break
+
+        self.pasos.append({ 'titulo':'Cambio de variable doble exponencial',
+                            'procedimiento': 'Con \\( ' + formula + ' \\) la integral se vuelve una en \\( t \\in (-\\infty, \\infty) \\) cuyo integrando decae doble exponencialmente; se aproxima con la regla del trapecio de paso \\( h = 2^{-k} \\) en \\( |t| \\le ' + str(T_TANH_SINH) + ' \\). Cada nivel usa los nodos del anterior.',
+                            'resultado': 'Fórmula: \\( h \\sum_j w_j f(x_j) \\)'})
+        self._niveles(tabla, 'h = 2^{{-{}}}')
+        self.metodo = "Tanh-sinh"
+        return N(self.solucion)
 
-            a = parse_expr(self.a)
-            b = parse_expr(self.b)
-            
-            self.a = a
-            self.b = b
-            self.c = c
-            self.d = d
-            
-            soportes = np.linspace(c + h, d - h, 2*particiones - 1)
-            
-            self.pasos.append({ 'titulo':'Calcular puntos de soporte', 
-                            'procedimiento': 'De \\( \\ h_x \\ \\) en \\( \\ h_x \\ \\) desde \\(c\\) hasta \\(d\\)',
-                            'resultado': '\\( x_i =  \\)' + ' ' + str(list(soportes))})
-            
-            ##### s1
-            funcion_evaluada = []
-            procedimiento = []
-            puntos_soporteS1 = [soportes[t] for t in range(0,2*particiones,2)]
-            for t in puntos_soporteS1:
-                aa = float(a.subs(x, t))
-                bb = float(b.subs(x, t))
-                expresion =  self.exp.subs(x,t)
-
-                integral = integracion_numerica([aa, bb], str(expresion.subs(y, x)) )
-                aproximacion = integral.simpson1_3_compuesto(particiones, errores = False)
-
-                procedimiento.append({'titulo':'Calcular evaluando el punto de soporte \\( \\ '+ str(t) +' \\ \\) \\( \\ \\Rightarrow \\int_{'+ str(aa)+ '}^{'+ str(bb)+ '} '+ latex(expresion) +'\\ dy\\ \\) con el método Simpson 1/3 de '+ str(particiones) + ' particiones', 
-                                      'procedimiento': integral.pasos,
-                                      'resultado': str(aproximacion) 
-                                    })
-                funcion_evaluada.append(aproximacion)
-            S1 = sum(funcion_evaluada)
-
-            self.pasos.append({ 'titulo':'Calcular S1 con las integrales evaluando los puntos de soporte pares en los límites de la integral y en la función', 
-                            'procedimiento2': procedimiento,
-                            'resultado': '\\( S1 = \\sum \\ ' + str(funcion_evaluada) + ' \\ = \\ '+ str(S1) + ' \\)' })
-            ##### s2
-            funcion_evaluada = []
-            procedimiento = []
-            puntos_soporteS1 = [soportes[t] for t in range(1,2*particiones-1,2)]
-            for t in puntos_soporteS1:
-                aa = float(a.subs(x, t))
-                bb = float(b.subs(x, t))
-                expresion =  self.exp.subs(x,t)
-
-                integral = integracion_numerica([aa, bb], str(expresion.subs(y, x)) )
-                aproximacion = integral.simpson1_3_compuesto(particiones, errores = False)
-
-                procedimiento.append({'titulo':'Calcular evaluando el punto de soporte \\( \\ '+ str(t) +' \\ \\) \\( \\ \\Rightarrow \\int_{'+ str(aa)+ '}^{'+ str(bb)+ '} '+ latex(expresion) +'\\ dy\\ \\) con el método Simpson 1/3 de '+ str(particiones) + ' particiones', 
-                                      'procedimiento': integral.pasos,
-                                      'resultado': str(aproximacion) 
-                                    })
-                funcion_evaluada.append(aproximacion)
-            S2 = sum(funcion_evaluada)
-            
-            self.pasos.append({ 'titulo':'Calcular S2 con las integrales evaluando los puntos de soporte impares en los límites de la integral y en la función', 
-                            'procedimiento2': procedimiento,
-                            'resultado': '\\( S2 = \\sum \\ ' + str(funcion_evaluada) + ' \\ = \\ '+ str(S2) + ' \\)' })
-            
-            aa1 = float(a.subs(x, c))
-            bb1 = float(b.subs(x,c))
-            expression1 = self.exp.subs(x,c)
-
-            aa2 = float(a.subs(x, d))
-            bb2 = float(b.subs(x, d))
-            expression2 = self.exp.subs(x,d)
-
-            procedimiento2 = []
-            integral_gc = integracion_numerica([aa1, bb1], str(expression1.subs(y, x)))
-            gc = integral_gc.simpson1_3_compuesto(particiones, errores = False)
-            procedimiento2.append({'titulo':'Calcular evaluando el punto  \\( \\ '+ str(c) +' \\ \\) \\( \\ \\Rightarrow \\int_{'+ str(aa1)+ '}^{'+ str(bb1)+ '} '+ latex(expression1) +'\\ dy\\ \\) con el método Simpson 1/3 de '+ str(particiones) + ' particiones', 
-                                      'procedimiento': integral_gc.pasos,
-                                      'resultado': str(gc) 
-                                    })
-            integral_gd = integracion_numerica([aa2, bb2], str(expression2.subs(y, x)))
-            gd = integral_gd.simpson1_3_compuesto(particiones, errores = False)
-            procedimiento2.append({'titulo':'Calcular evaluando el punto  \\( \\ '+ str(d) +' \\ \\) \\( \\ \\Rightarrow \\int_{'+ str(aa2)+ '}^{'+ str(bb1)+ '} '+ latex(expression2) +'\\ dy\\ \\) con el método Simpson 1/3 de '+ str(particiones) + ' particiones', 
-                                      'procedimiento': integral_gd.pasos,
-                                      'resultado': str(gd) 
-                                    })
-
-            self.pasos.append({ 'titulo':'Calcular las integrales evaluando los límites y la función con \\( \\ c \\ \\) y \\( \\ d \\ \\) ', 
-                            'procedimiento2':procedimiento2 ,
-                            'resultado': f'\\(G(c) = {gc} \\ \\ G(d) = {gd} \\)'  })
-
-
-            self.solucion =  (h/3)*(gc + 4*S1 + 2*S2 + gd ) #+Rt
-            
-            self.pasos.append({ 'titulo':'Calcular la aproximación con la fórmula', 
-                            'procedimiento': '\\( h\\cdot\\frac{1}{3} \\cdot (G(c) + G(d) + 4 \\cdot S1 + 2 \\cdot S2 )  \\)',
-                            'resultado': ' \\( \\Rightarrow \\ ' + str(h) +'\\cdot\\frac{1}{3} \\cdot ('+ str(gc) +' + '+ str(gd) +' + 4 \\cdot '+  str(S1) +'+ 2 \\cdot '+ str(S2) +' )  \\)' +'\n =  ' + str(self.solucion)   })
+    ####----- NEWTON-COTES: ------####
+    # Etiquetas de los pasos de _newton_cotes; 'f' es una plantilla para el punto.
+    _NOMBRES_PASOS = {'h': 'h', 'x': 'x', 'f': 'f({})', 'a': 'a', 'b': 'b',
+                      'formula': 'Calcular la aproximación con la fórmula'}
+
+    # Pasos de Trapezoidal, Simpson 1/3 y Simpson 3/8 compuestos tal como se
+    # escribían antes de _newton_cotes, por grado; los campos <...> los llena
+    # _newton_cotes (P_k/E_k puntos y valores de S_k, L... en LaTeX).
+    _TEXTOS_SIMPLES = {
+        1: {'soportes': ('Calcular puntos de soporte', 'De h en h desde \\(a\\) hasta \\(b\\)', '\\( x_i =  \\) <puntos>'),
+            'evaluar': ('Evaluar los puntos de soporte en la función', '\\( f(x_i) \\)', '\\( f(x_i) =  \\) <E1>'),
+            'formula': ('Calcular la aproximación con la fórmula',
+                        '\\( h\\cdot(\\frac{1}{2} \\cdot (f(a) + f(b)) + \\sum f(x_i) ) \\)',
+                        '\\( \\Rightarrow  <h>\\cdot(\\frac12 \\cdot (f(<a>) + f(<b>)) + <S1> ) \\ \\)\n' + ' '*44 + '\n' + ' '*44
+                        + '\\( \\Rightarrow  <h>\\cdot(0.5 \\cdot (<fa> + <fb>) + <S1> ) = \\ \\)\n' + ' '*40 + '<total>')},
+        2: {'h': ('Calcular h', '\\( h = \\frac{b-a}{2 \\cdot particiones}  \\)', '\\( \\Rightarrow  h = \\frac{<b> - <a>}{2 \\cdot<n>}  = <h>\\)'),
+            'soportes': ('Calcular puntos de soporte', 'De h en h desde \\(a\\) hasta \\(b\\)', '\\( x_i =  \\) <puntos>'),
+            'evaluar': ('Evaluar los puntos de soporte en  \\( \\ f(x) \\)',
+                        'Para facilitar cálculos, se divide en dos sumas: \\( \\ S_1 = \\sum_{i=0}^{2\\cdot \\ particiones}x_{2i} \\ \\)  y \\(  \\ S_2 = \\sum_{i=1}^{2\\cdot \\ particiones}x_{2i-1}  \\)',
+                        'Puntos de soporte para \\( \\ S_1 \\Rightarrow \\  \\)<P1>\nEvaluados: <E1>. \n\nPara\\( \\ S_2  \\Rightarrow \\ \\)<P2>. \nEvaluados: <E2>'),
+            'sumas': ('Calcular  \\( \\ S_1 \\ \\) y \\( \\ S_2 \\)  ',
+                      'Como recordatorio  \\( \\ S_1 \\) es la suma de los puntos de soporte en posición par y  \\( \\ S_2 \\) en posición impar. ',
+                      ' \\( \\ S_1 = \\  \\)<S1> \n\\( \\ S_2 = \\ \\)<S2>'),
+            'formula': ('Calcular la aproximación con la fórmula',
+                        '\\( h\\cdot\\frac{1}{3} \\cdot (f(a) + f(b) + 4 \\cdot S1 + 2 \\cdot S2 ) + R_t \\)',
+                        ' \\( \\Rightarrow \\ <h>\\cdot\\frac{1}{3} \\cdot (<fa> + <fb> + 4 \\cdot <S1>+ 2 \\cdot <S2> ) +<Rt> \\)\n =  <total>')},
+        3: {'h': ('Calcular h', '\\( h = \\frac{b-a}{2 \\cdot particiones}  \\)', '\\( \\Rightarrow  h = \\frac{<b> - <a>}{3 \\cdot<n>}  = <h>\\)'),
+            'soportes': ('Calcular puntos de soporte', 'De h en h desde \\(a\\) hasta \\(b\\)', '\\( x_i =  \\) <puntos>'),
+            'evaluar': ('Evaluar los puntos de soporte en  \\( \\ f(x) \\)',
+                        'Para facilitar cálculos, se divide en dos sumas: \\( \\ S_1 = \\sum_{i=0}^{2\\cdot \\ particiones-1}x_{3i} \\ \\), \\(  \\ S_2 = \\sum_{i=1}^{2\\cdot \\ particiones}x_{3i-1}  \\) y \\(  \\ S_2 = \\sum_{i=2}^{2\\cdot \\ particiones}x_{3i-2}  \\)',
+                        'Puntos de soporte para \\( \\ S_1 \\Rightarrow \\  \\)<P1>\nEvaluados: <E1> \n\nPara\\( \\ S_2  \\Rightarrow \\ \\)<P2> \nEvaluados: <E2> \n\nPara\\( \\ S_3  \\Rightarrow \\ \\)<P3> \nEvaluados: <E3>'),
+            'sumas': ('Calcular  \\( \\ S_1 \\ \\),  \\( \\ S_2 \\ \\) y  \\( \\ S_3 \\)  ',
+                      'Como recordatorio  \\( \\ S_1 \\) es la suma de los puntos de soporte en posición 0, 3, 4, 7,  10, ...   \\( \\ S_2 \\) en posición 1, 4, 7, 10, ... y  \\( \\ S_3 \\) en posición 2, 5, 8, 11, ... . ',
+                      ' \\( \\ S_1 = \\  \\)<S1> \n\\( \\ S_2 = \\ \\)<S2> \n\\( \\ S_3 = \\ \\)<S3>'),
+            'formula': ('Calcular la aproximación con la fórmula',
+                        '\\( 3 \\cdot h\\cdot\\frac{1}{8} \\cdot (f(a) + f(b) + 3 \\cdot S1 + 3 \\cdot S2 + 2 \\cdot S3) \\)',
+                        ' \\( \\Rightarrow \\ 3 \\cdot<h>\\cdot\\frac{1}{8} \\cdot (<fa> + <fb> + 3 \\cdot <S1>+ 3\\cdot <S2>\\) \n \\( + 2\\cdot <S3> \\) =  <total>')},
+    }
+
+    # Lo mismo para las dobles: (regla en x, regla en y) con límites numéricos y
+    # la regla en x de las integrales G(x_i) con límites variables.
+    _TEXTOS_DOBLES = {
+        1: ({'h': ('Calcular \\( \\ h_x \\ \\)', '\\( h_x = \\frac{b-a}{ particiones}  \\)', '\\( \\Rightarrow  h_x = \\frac{<b> - <a>}{<n>}  = <h>\\)'),
+             'evaluar': ('Evaluar los puntos de soporte en  \\( \\ f(x,y) \\)', '\\( f(x_i, y) \\)', '\\( f(x_i, y) = \\ \\)[ <LI1>]'),
+             'sumas': ('Calcular la suma de los puntos de soporte evaluados', '\\( \\sum f(x_i, y) \\)', ' = \\( <LS1>\\)'),
+             'formula': ('Calcular \\( \\ g(y) \\ \\)con la fórmula',
+                         '\\( h_x\\cdot(\\frac{1}{2} \\cdot (f(a,y) + f(b,y)) + \\sum f(x_i, y)) \\)',
+                         '\\( <h> \\cdot(\\frac{1}{2} \\cdot (<Lfa> + <Lfb>) + <LS1>) = <Lg> \\)\n \\( \\therefore g(y) = <Lg> \\)')},
+            {'h': ('Calcular \\( \\ h_y \\ \\)', '\\( h_y = \\frac{d-c}{ particiones}  \\)', '\\( \\Rightarrow  h_y = \\frac{<b> - <a>}{<n>}  = <h>\\)'),
+             'evaluar': ('Evaluar los puntos de soporte en  \\( \\ g(y) \\)', '\\( g(y_i) \\)', '\\( g(y_i) = \\ \\)[ <LI1>]'),
+             'sumas': ('Calcular la suma de los puntos de soporte evaluados', '\\( \\sum g(y_i) \\)', ' = \\( <LS1>\\)'),
+             'formula': ('Aproximar la integral con la fórmula',
+                         '\\( h_y\\cdot(\\frac{1}{2} \\cdot (g(c) + g(d)) + \\sum g(y_i)) \\)',
+                         '\\( <h> \\cdot(\\frac{1}{2} \\cdot (<fa> + <fb>) + <S1>) = <total> \\)')},
+            {'h': ('Calcular \\( \\ h_x \\ \\)', '\\( h_x = \\frac{d-c}{ particiones}  \\)', '\\( \\Rightarrow  h_x = \\frac{<b> - <a>}{<n>}  = <h>\\)'),
+             'sumas': ('Calcular la suma de las integrales evaluadas', '\\( \\sum G(x_i) \\)', '\\( \\sum G(x_i) =  <S1>\\)'),
+             'extremos': ('Calcular las integrales evaluando los límites y la función con \\( \\ c \\ \\) y \\( \\ d \\ \\)', None, '\\( G(c) =  <fa>\\)\\( \\ \\ G(d) =  <fb>\\)'),
+             'formula': ('Aproximar la integral con la fórmula',
+                         '\\( h_x\\cdot(\\frac{1}{2} \\cdot(G(c) + G(d) ) + \\sum G(x_i)  \\) ',
+                         '\\( \\Rightarrow <h>\\cdot(\\frac{1}{2} \\cdot (<fa>  + <fb>) +<S1>  = \\ <total> \\)')}),
+        2: ({'h': ('Calcular \\( \\ h_x \\ \\)', '\\( h_x = \\frac{b-a}{ 2 \\cdot particiones}  \\)', '\\( \\Rightarrow  h_x = \\frac{<b> - <a>}{2 \\cdot<n>}  = <h>\\)'),
+             'evaluar': ('Evaluar los puntos de soporte en  \\( \\ f(x,y) \\)',
+                         'Para facilitar cálculos, se divide en dos sumas: \\( \\ S_1 = \\sum_{i=0}^{2\\cdot \\ particiones}f(x_{2i},y) \\ \\)  y \\(  \\ S_2 = \\sum_{i=1}^{2\\cdot \\ particiones}f(x_{2i-1},y)  \\)',
+                         'Puntos de soporte para \\( \\ S_1 \\Rightarrow \\  <LP1>\\)\nEvaluados: \\( <LE1>\\). \n\nPara\\( \\ S_2  \\Rightarrow \\ <LP2>\\) \nEvaluados: \\(<LE2>\\)'),
+             'sumas': ('Calcular \\( \\ S_1 \\ \\) y \\( \\ S_2 \\)  ',
+                       'Como recordatorio  \\( \\ S_1 \\) es la suma de los puntos de soporte evaluados en posición par y  \\( \\ S_2 \\) en posición impar. ',
+                       ' \\( \\ S_1 = \\ <LS1> \\) \n\\( \\ S_2 = \\ <LS2>\\)'),
+             'formula': ('Calcular \\( \\ g(y) \\ \\)con la fórmula',
+                         '\\( h\\cdot\\frac{1}{3} \\cdot (f(a,y) + f(b,y) + 4 \\cdot S1 + 2 \\cdot S2 )  \\)',
+                         ' \\( \\Rightarrow \\ <h>\\cdot\\frac{1}{3} \\cdot (<Lfa> + <Lfb> + 4 \\cdot <LS1>+ 2 \\cdot <LS2> )  \\)\n \\(= \\ <Ltotal>\\)')},
+            {'h': ('Calcular \\( \\ h_y \\ \\)', '\\( h_y = \\frac{d-c}{ 2 \\cdot particiones}  \\)', '\\( \\Rightarrow  h_y = \\frac{<b> - <a>}{2 \\cdot<n>}  = <h>\\)'),
+             'evaluar': ('Evaluar los puntos de soporte en  \\( \\ g(y) \\)',
+                         'Para facilitar cálculos, se divide en dos sumas: \\( \\ S_1 = \\sum_{i=0}^{2\\cdot \\ particiones}g(y_{2i}) \\ \\)  y \\(  \\ S_2 = \\sum_{i=1}^{2\\cdot \\ particiones}g(y_{2i-1})  \\)',
+                         'Puntos de soporte para \\( \\ S_1 \\Rightarrow \\  <LP1>\\)\nEvaluados: \\( <LE1>\\). \n\nPara\\( \\ S_2  \\Rightarrow \\ <LP2>\\) \nEvaluados: \\(<LE2>\\)'),
+             'sumas': ('Calcular  \\( \\ S_1 \\ \\) y \\( \\ S_2 \\)  ',
+                       'Como recordatorio  \\( \\ S_1 \\) es la suma de los puntos de soporte evaluados en posición par y  \\( \\ S_2 \\) en posición impar. ',
+                       ' \\( \\ S_1 = \\ <LS1> \\) \n\\( \\ S_2 = \\ <LS2>\\)'),
+             'formula': ('Aproximar la integral con la fórmula',
+                         '\\( h\\cdot\\frac{1}{3} \\cdot (g(c) + g(d) + 4 \\cdot S1 + 2 \\cdot S2 )  \\)',
+                         ' \\( \\Rightarrow \\ <h>\\cdot\\frac{1}{3} \\cdot (<Lfa> + <Lfb> + 4 \\cdot <LS1>+ 2 \\cdot <LS2> )  \\)\n \\(= \\ <Ltotal>\\)')},
+            {'h': ('Calcular \\( \\ h_x \\ \\)', '\\( h_x = \\frac{d-c}{2\\cdot particiones}  \\)', '\\( \\Rightarrow  h_x = \\frac{<b> - <a>}{ 2 \\cdot <n>}  = <h>\\)'),
+             'integrales1': ('Calcular S1 con las integrales evaluando los puntos de soporte pares en los límites de la integral y en la función', None, '\\( S1 = \\sum \\ <E1> \\ = \\ <S1> \\)'),
+             'integrales2': ('Calcular S2 con las integrales evaluando los puntos de soporte impares en los límites de la integral y en la función', None, '\\( S2 = \\sum \\ <E2> \\ = \\ <S2> \\)'),
+             'extremos': ('Calcular las integrales evaluando los límites y la función con \\( \\ c \\ \\) y \\( \\ d \\ \\) ', None, '\\(G(c) = <fa> \\ \\ G(d) = <fb> \\)'),
+             'formula': ('Calcular la aproximación con la fórmula',
+                         '\\( h\\cdot\\frac{1}{3} \\cdot (G(c) + G(d) + 4 \\cdot S1 + 2 \\cdot S2 )  \\)',
+                         ' \\( \\Rightarrow \\ <h>\\cdot\\frac{1}{3} \\cdot (<fa> + <fb> + 4 \\cdot <S1>+ 2 \\cdot <S2> )  \\)\n =  <total>')}),
+        3: ({'h': ('Calcular \\( \\ h_x \\ \\)', '\\( h_x = \\frac{b-a}{ 3 \\cdot particiones}  \\)', '\\( \\Rightarrow  h_x = \\frac{<b> - <a>}{3 \\cdot<n>}  = <h>\\)'),
+             'evaluar': ('Evaluar los puntos de soporte en  \\( \\ f(x,y) \\)',
+                         'Para facilitar cálculos, se divide en tres sumas: \\( \\ S_1 = \\sum_{i=0}^{2\\cdot \\ particiones}f(x_{3i},y) \\ \\), \\(  \\ S_2 = \\sum_{i=1}^{2\\cdot \\ particiones}f(x_{3i-1},y)  \\)  y \\(  \\ S_3 = \\sum_{i=2}^{2\\cdot \\ particiones}f(x_{3i-3},y)  \\)',
+                         'Puntos de soporte para \\( \\ S_1 \\Rightarrow \\  <LP1>\\)\nEvaluados: \\( <LE1>\\). \n\nPara\\( \\ S_2  \\Rightarrow \\ <LP2>\\) \nEvaluados: \\(<LE2>\\) \n\nPara\\( \\ S_3  \\Rightarrow \\ <LP3>\\) \nEvaluados: \\(<LE3>\\)'),
+             'sumas': ('Calcular \\( \\ S_1 \\ \\), \\( \\ S_2 \\  \\) y \\( \\ S_3 \\)   ',
+                       'Como recordatorio  \\( \\ S_1 \\) es la suma de los puntos de soporte con posiciones de 3 en 3 empezando en 0,  \\( \\ S_2 \\) empezando en 1 y \\( \\ S_2 \\) empezando en 2. ',
+                       ' \\( \\ S_1 = \\ <LS1> \\) \n\\( \\ S_2 = \\ <LS2>\\) \n \\( \\ S_3 = \\ <LS3>\\)'),
+             'formula': ('Calcular \\( \\ g(y) \\ \\)con la fórmula',
+                         '\\( h\\cdot\\frac{3}{8} \\cdot (f(a,y) + f(b,y) + 3 \\cdot S1 + 3 \\cdot S2 + 2 \\cdot S2 )  \\)',
+                         ' \\( \\Rightarrow \\ <h>\\cdot\\frac{3}{8} \\cdot (<Lfa> + <Lfb> + 3 \\cdot <LS1>+ 3 \\cdot <LS2>+ 2 \\cdot <LS3> )  \\)\n \\(= \\ <Ltotal>\\)')},
+            {'h': ('Calcular \\( \\ h_y \\ \\)', '\\( h_y = \\frac{d-c}{ 3 \\cdot particiones}  \\)', '\\( \\Rightarrow  h_y = \\frac{<b> - <a>}{3 \\cdot<n>}  = <h>\\)'),
+             'evaluar': ('Evaluar los puntos de soporte en  \\( \\ g(y) \\)',
+                         'Para facilitar cálculos, se divide en tres sumas: \\( \\ S_1 = \\sum_{i=0}^{2\\cdot \\ particiones}g(y_{3i}) \\ \\), \\(  \\ S_2 = \\sum_{i=1}^{2\\cdot \\ particiones}g(y_{3i-1})  \\)  y \\(  \\ S_3 = \\sum_{i=2}^{2\\cdot \\ particiones}g(y_{3i-3})  \\)',
+                         'Puntos de soporte para \\( \\ S_1 \\Rightarrow \\  <LP1>\\)\nEvaluados: \\( <LE1>\\). \n\nPara\\( \\ S_2  \\Rightarrow \\ <LP2>\\) \nEvaluados: \\(<LE2>\\) \n\nPara\\( \\ S_3  \\Rightarrow \\ <LP3>\\) \nEvaluados: \\(<LE3>\\)'),
+             'sumas': ('Calcular \\( \\ S_1 \\ \\), \\( \\ S_2 \\  \\) y \\( \\ S_3 \\)   ',
+                       'Como recordatorio  \\( \\ S_1 \\) es la suma de los puntos de soporte evaluados con posiciones de 3 en 3 empezando en 0,  \\( \\ S_2 \\) empezando en 1 y \\( \\ S_2 \\) empezando en 2. ',
+                       ' \\( \\ S_1 = \\ <LS1> \\) \n\\( \\ S_2 = \\ <LS2>\\) \n \\( \\ S_3 = \\ <LS3>\\)'),
+             'formula': ('Calcular la aproximación con la fórmula',
+                         '\\( 3 \\cdot h\\cdot\\frac{1}{8} \\cdot (g(c) + g(d) + 3 \\cdot S1 + 3 \\cdot S2 + 2 \\cdot S3) \\)',
+                         ' \\( \\Rightarrow \\ 3 \\cdot<h>\\cdot\\frac{1}{8} \\cdot (<fa> + <fb> + 3 \\cdot <S1>+ 3\\cdot <S2>\\) \n \\( + 2\\cdot <S3> =  <total> \\)')},
+            {'h': ('Calcular \\( \\ h_x \\ \\)', '\\( h_x = \\frac{d-c}{3\\cdot particiones}  \\)', '\\( \\Rightarrow  h_x = \\frac{<b> - <a>}{ 3 \\cdot <n>}  = <h>\\)'),
+             'integrales1': ('Calcular S1 con las integrales evaluando los puntos de soporte en posición 0, 3, 4, 7, 10, ...  en los límites de la integral y en la función', None, '\\( S1 = \\sum \\ <E1> \\ = \\ <S1> \\)'),
+             'integrales2': ('Calcular S2 con las integrales evaluando los puntos de soporte en posición 1, 4, 7, 10, ... impares en los límites de la integral y en la función', None, '\\( S2 = \\sum \\ <E2> \\ = \\ <S2> \\)'),
+             'integrales3': ('Calcular S3 con las integrales evaluando los puntos de soporte en posición 2, 5, 8, 11, ...  en los límites de la integral y en la función', None, '\\( S3 = \\sum \\ <E3> \\ = \\ <S3> \\)'),
+             'extremos': ('Calcular las integrales evaluando los límites y la función con \\( \\ c \\ \\) y \\( \\ d \\ \\) ', None, '\\(G(c) = <fa> \\ \\ G(d) = <fb> \\)'),
+             'formula': ('Calcular la aproximación con la fórmula',
+                         '\\( 3 \\cdot h\\cdot\\frac{1}{8} \\cdot (G(c) + G(d) + 3 \\cdot S1 + 3 \\cdot S2 + 2 \\cdot S3) \\)',
+                         ' \\( \\Rightarrow \\ 3 \\cdot<h>\\cdot\\frac{1}{8} \\cdot (<fa> + <fb> + 3 \\cdot <S1>+ 3\\cdot <S2>\\) \n \\( + 2\\cdot <S3> =  <total> \\)')}),
+    }
+
+    def _rectangulo(self):
+        try:
+            float(self.a), float(self.b)
+        except (TypeError, ValueError):
+            return False
+        return True
 
-            self.metodo = "Simpson 1/3 compuesto doble"
-            return N(self.solucion)            
-        
-    def simpson3_8_compuesto_doble(self, intervalo2, particiones):
+    def _newton_cotes(self, orden, particiones, limites, abierta = False, evaluar = None, nombres = None, correccion = 0, textos = None):
         """
-        Recibe los limites de la integral de afuera.
+        Regla compuesta de Newton-Cotes de grado orden con particiones paneles
+        sobre limites = [a, b]. Agrega los pasos y regresa la aproximación.
+
+        Los puntos de soporte se agrupan por su posición dentro del panel: S_k
+        suma los que están en la posición k, así la fórmula queda, como en
+        Simpson, factor*h*(w*(f(a) + f(b)) + c_1*S_1 + ... ) con coeficientes
+        enteros.
+
+        evaluar(t) regresa f(t), o (f(t), paso) si cada valor es a su vez una
+        integral con sus propios pasos; por defecto sustituye t en self.exp.
+        Sin evaluar y con más de LIMITE_DETALLE puntos cada S_k se suma por
+        bloques con numpy. nombres cambia las etiquetas de los pasos (ver
+        _NOMBRES_PASOS) y correccion se suma al final como R_t; si es una
+        función se llama justo antes de evaluar, para que sus pasos queden
+        en ese lugar.
+
+        textos reemplaza los pasos 'h', 'soportes', 'evaluar', 'sumas',
+        'integrales<k>', 'extremos' y 'formula' por plantillas (titulo,
+        procedimiento, resultado) con campos <campo> (ver _TEXTOS_SIMPLES y
+        _rellenar).
         """
         x = symbols('x')
-        y = symbols('y')
-        try: 
-            a = float(self.a)
-            b = float(self.b)
-        except:
-            bandera = 0
+        nombres = dict(self._NOMBRES_PASOS, **(nombres or {}))
+        textos = textos or {}
+        campos = {}
+
+        def escribir(clave, titulo, procedimiento, resultado, subpasos = None):
+            if clave in textos:
+                titulo, procedimiento, resultado = (plantilla and _rellenar(plantilla, campos) for plantilla in textos[clave])
+            if subpasos is None:
+                self.pasos.append({'titulo': titulo, 'procedimiento': procedimiento, 'resultado': resultado})
+            else:
+                self.pasos.append({'titulo': titulo, 'procedimiento2': subpasos, 'resultado': resultado})
+
+        f, h_, x_ = nombres['f'], nombres['h'], nombres['x']
+        a, b = limites
+        pesos = pesos_newton_cotes(orden, abierta)
+        ancho = orden + 2 if abierta else orden
+        m = ancho*particiones
+        h = (b - a)/m
+
+        # (posición en el panel, coeficiente, cantidad de puntos)
+        if abierta:
+            clases = [(k, pesos[k - 1], particiones) for k in range(1, orden + 2)]
+            extremos = Fraction(0)
         else:
-            bandera = 1
-        
-        if bandera:
-           
-            h = (self.b-self.a)/(3*particiones)
-            self.pasos.append({ 'titulo':'Calcular \\( \\ h_x \\ \\)', 
-                            'procedimiento': '\\( h_x = \\frac{b-a}{ 3 \\cdot particiones}  \\)',
-                            'resultado': '\\( \\Rightarrow  h_x = \\frac{'+ str(self.b) + ' - ' + str(self.a) +'}{3 \\cdot'+str(particiones)+'}  = ' + str(h)+ '\\)'})
-            soportes = np.linspace(self.a+h, self.b-h, 3*particiones - 1)
-            self.pasos.append({ 'titulo':'Calcular puntos de soporte', 
-                            'procedimiento': 'De \\( \\ h_x \\ \\) en \\( \\ h_x \\ \\) desde \\(a\\) hasta \\(b\\)',
-                            'resultado': '\\( x_i =  \\)' + ' ' + str(list(soportes))})
-
-            S1_el = [soportes[i] for i in range(0,3*particiones,3)]
-            S2_el = [soportes[i] for i in range(1,3*particiones,3)]
-            S3_el = [soportes[i] for i in range(2,3*particiones-1,3)]
-            S1_ev = [self.exp.subs(x,i) for i in S1_el]
-            S2_ev = [self.exp.subs(x,i) for i in S2_el]
-            S3_ev = [self.exp.subs(x,i) for i in S3_el]
-            S1 = sum(S1_ev)
-            S2 = sum(S2_ev)
-            S3 = sum(S3_ev)
-
-            self.pasos.append({ 'titulo':'Evaluar los puntos de soporte en  \\( \\ f(x,y) \\)', 
-                            'procedimiento': 'Para facilitar cálculos, se divide en tres sumas: \\( \\ S_1 = \\sum_{i=0}^{2\\cdot \\ particiones}f(x_{3i},y) \\ \\), \\(  \\ S_2 = \\sum_{i=1}^{2\\cdot \\ particiones}f(x_{3i-1},y)  \\)  y \\(  \\ S_3 = \\sum_{i=2}^{2\\cdot \\ particiones}f(x_{3i-3},y)  \\)',
-                            'resultado': 'Puntos de soporte para \\( \\ S_1 \\Rightarrow \\  ' + latex(S1_el) +'\\)\nEvaluados: \\( '+latex(S1_ev) + '\\). \n\nPara\\( \\ S_2  \\Rightarrow \\ ' + latex(S2_el) +'\\)' +' \nEvaluados: \\('+latex(S2_ev)+'\\) \n\nPara\\( \\ S_3  \\Rightarrow \\ ' + latex(S3_el) +'\\)' +' \nEvaluados: \\('+latex(S3_ev)+'\\)' })
-            
-            self.pasos.append({ 'titulo':'Calcular \\( \\ S_1 \\ \\), \\( \\ S_2 \\  \\) y \\( \\ S_3 \\)   ', 
-                            'procedimiento': 'Como recordatorio  \\( \\ S_1 \\) es la suma de los puntos de soporte con posiciones de 3 en 3 empezando en 0,  \\( \\ S_2 \\) empezando en 1 y \\( \\ S_2 \\) empezando en 2. ',
-                            'resultado': ' \\( \\ S_1 = \\ ' + latex(S1) + ' \\) \n\\( \\ S_2 = \\ ' + latex(S2) +'\\) \n \\( \\ S_3 = \\ ' + latex(S3) +'\\)' })
-
-            fa  = self.exp.subs(x, self.a)
-            fb = self.exp.subs(x, self.b)
-            primera_integral =  (3*h/8)*(fa + 3*S1 + 3*S2 + 2*S3  + fb)
-            self.pasos.append({ 'titulo':'Calcular \\( \\ g(y) \\ \\)con la fórmula', 
-                            'procedimiento': '\\( h\\cdot\\frac{3}{8} \\cdot (f(a,y) + f(b,y) + 3 \\cdot S1 + 3 \\cdot S2 + 2 \\cdot S2 )  \\)',
-                            'resultado': ' \\( \\Rightarrow \\ ' + str(h) +'\\cdot\\frac{1}{3} \\cdot ('+ latex(fa) +' + '+ latex(fb) +' + 4 \\cdot '+  latex(S1) +'+ 2 \\cdot '+ latex(S2) +' )  \\)' +'\n \\(= \\ ' + latex(primera_integral)+'\\)'    })
-            c = intervalo2[0]
-            d = intervalo2[1]
-            h = (d-c)/(3*particiones)
-            self.pasos.append({ 'titulo':'Calcular \\( \\ h_y \\ \\)', 
-                            'procedimiento': '\\( h_y = \\frac{d-c}{ 3 \\cdot particiones}  \\)',
-                            'resultado': '\\( \\Rightarrow  h_y = \\frac{'+ str(d) + ' - ' + str(c) +'}{3 \\cdot'+str(particiones)+'}  = ' + str(h)+ '\\)'})
-            self.c = c
-            self.d = d
-            soportes = np.linspace(c + h, d - h, 3*particiones - 1)
-            self.pasos.append({ 'titulo':'Calcular puntos de soporte', 
-                            'procedimiento': 'De \\( \\ h_y \\ \\) en \\( \\ h_y \\ \\) desde \\(c\\) hasta \\(d\\)',
-                            'resultado': '\\( y_i =  \\)' + ' ' + str(list(soportes))})
-
-            S1_el = [soportes[i] for i in range(0,3*particiones,3)]
-            S2_el = [soportes[i] for i in range(1,3*particiones-1,3)]############################################################# -1?
-            S3_el = [soportes[i] for i in range(2,3*particiones-1,3)]
-            S1_ev = [primera_integral.subs(y,i) for i in S1_el]
-            S2_ev = [primera_integral.subs(y,i) for i in S2_el]
-            S3_ev = [primera_integral.subs(y,i) for i in S3_el]
-            S1 = sum(S1_ev)
-            S2 = sum(S2_ev)
-            S3 = sum(S3_ev)
-
-            self.pasos.append({ 'titulo':'Evaluar los puntos de soporte en  \\( \\ g(y) \\)', 
-                            'procedimiento': 'Para facilitar cálculos, se divide en tres sumas: \\( \\ S_1 = \\sum_{i=0}^{2\\cdot \\ particiones}g(y_{3i}) \\ \\), \\(  \\ S_2 = \\sum_{i=1}^{2\\cdot \\ particiones}g(y_{3i-1})  \\)  y \\(  \\ S_3 = \\sum_{i=2}^{2\\cdot \\ particiones}g(y_{3i-3})  \\)',
-                            'resultado': 'Puntos de soporte para \\( \\ S_1 \\Rightarrow \\  ' + latex(S1_el) +'\\)\nEvaluados: \\( '+latex(S1_ev) + '\\). \n\nPara\\( \\ S_2  \\Rightarrow \\ ' + latex(S2_el) +'\\)' +' \nEvaluados: \\('+latex(S2_ev)+'\\) \n\nPara\\( \\ S_3  \\Rightarrow \\ ' + latex(S3_el) +'\\)' +' \nEvaluados: \\('+latex(S3_ev)+'\\)' })
-            
-            self.pasos.append({ 'titulo':'Calcular \\( \\ S_1 \\ \\), \\( \\ S_2 \\  \\) y \\( \\ S_3 \\)   ', 
-                            'procedimiento': 'Como recordatorio  \\( \\ S_1 \\) es la suma de los puntos de soporte evaluados con posiciones de 3 en 3 empezando en 0,  \\( \\ S_2 \\) empezando en 1 y \\( \\ S_2 \\) empezando en 2. ',
-                            'resultado': ' \\( \\ S_1 = \\ ' + latex(S1) + ' \\) \n\\( \\ S_2 = \\ ' + latex(S2) +'\\) \n \\( \\ S_3 = \\ ' + latex(S3) +'\\)' })
-            fa = primera_integral.subs(y,c)
-            fb = primera_integral.subs(y,d)
-            self.solucion =  (3*h/8)*(fa + 3*S1 + 3*S2 + 2*S3  + fb)
-            self.pasos.append({ 'titulo':'Calcular la aproximación con la fórmula', 
-                            'procedimiento': '\\( 3 \\cdot h\\cdot\\frac{1}{8} \\cdot (g(c) + g(d) + 3 \\cdot S1 + 3 \\cdot S2 + 2 \\cdot S3) \\)',
-                            'resultado': ' \\( \\Rightarrow \\ 3 \\cdot' + str(h) +'\\cdot\\frac{1}{8} \\cdot ('+ str(fa) +' + '+ str(fb) +' + 3 \\cdot '+  str(S1) +'+ 3\\cdot '+ str(S2) + '\\) \n \\( + 2\\cdot '+ str(S3)  +' =  ' + str(self.solucion)  +' \\)'   })
-            self.metodo = "Simpson 3/8 compuesto doble numérico"
-
-            return N(self.solucion)
-            
+            clases = [(k, pesos[k], particiones) for k in range(1, orden)] + [(orden, 2*pesos[0], particiones - 1)]
+            extremos = pesos[0]
+        numeros = [v for v in [extremos] + [c for _, c, _ in clases] if v]
+        factor = Fraction(reduce(math.gcd, [v.numerator for v in numeros]), reduce(math.lcm, [v.denominator for v in numeros]))
+        if len(clases) == 1:
+            etiquetas = [x_ + '_i']
+            sumas_nombres = ['\\sum ' + f.format(x_ + '_i')]
         else:
-            c = intervalo2[0]
-            d = intervalo2[1]
-            h = (d-c)/(3*particiones)
-            self.pasos.append({ 'titulo':'Calcular \\( \\ h_x \\ \\)', 
-                            'procedimiento': '\\( h_x = \\frac{d-c}{3\\cdot particiones}  \\)',
-                            'resultado': '\\( \\Rightarrow  h_x = \\frac{'+ str(d) + ' - ' + str(c) +'}{ 3 \\cdot '+str(particiones)+'}  = ' + str(h)+ '\\)'})
-
-            a = parse_expr(self.a)
-            b = parse_expr(self.b)
-            
-            self.a = a
-            self.b = b
-            self.c = c
-            self.d = d
-            
-            soportes = np.linspace(c + h, d - h, 3*particiones - 1)
-            self.pasos.append({ 'titulo':'Calcular puntos de soporte', 
-                            'procedimiento': 'De \\( \\ h_x \\ \\) en \\( \\ h_x \\ \\) desde \\(c\\) hasta \\(d\\)',
-                            'resultado': '\\( x_i =  \\)' + ' ' + str(list(soportes))})
-
-            ##### s1
-            funcion_evaluada = []
-            procedimiento = []
-            puntos_soporteS1 = [soportes[t] for t in range(0,3*particiones,3)]
-            for t in puntos_soporteS1:
-                aa = float(a.subs(x, t))
-                bb = float(b.subs(x, t))
-                expresion =  self.exp.subs(x,t)
-
-                integral = integracion_numerica([aa, bb], str(expresion.subs(y, x)) )
-                aproximacion = integral.simpson3_8_compuesto(particiones, errores = False)
-
-                procedimiento.append({'titulo':'Calcular evaluando el punto de soporte \\( \\ '+ str(t) +' \\ \\) \\( \\ \\Rightarrow \\int_{'+ str(aa)+ '}^{'+ str(bb)+ '} '+ latex(expresion) +'\\ dy\\ \\) con el método Simpson 3/8 de '+ str(particiones) + ' particiones', 
-                                      'procedimiento': integral.pasos,
-                                      'resultado': str(aproximacion) 
-                                    })
-                funcion_evaluada.append(aproximacion)
-            S1 = sum(funcion_evaluada)
-
-            self.pasos.append({ 'titulo':'Calcular S1 con las integrales evaluando los puntos de soporte en posición 0, 3, 4, 7, 10, ...  en los límites de la integral y en la función', 
-                            'procedimiento2': procedimiento,
-                            'resultado': '\\( S1 = \\sum \\ ' + str(funcion_evaluada) + ' \\ = \\ '+ str(S1) + ' \\)' })
-
-            ##### s2
-            funcion_evaluada = []
-            procedimiento = []
-            puntos_soporteS1 = [soportes[t] for t in range(1,3*particiones,3)]
-            for t in puntos_soporteS1:
-                aa = float(a.subs(x, t))
-                bb = float(b.subs(x, t))
-                expresion =  self.exp.subs(x,t)
-
-                integral = integracion_numerica([aa, bb], str(expresion.subs(y, x)) )
-                aproximacion = integral.simpson3_8_compuesto(particiones, errores = False)
-
-                procedimiento.append({'titulo':'Calcular evaluando el punto de soporte \\( \\ '+ str(t) +' \\ \\) \\( \\ \\Rightarrow \\int_{'+ str(aa)+ '}^{'+ str(bb)+ '} '+ latex(expresion) +'\\ dy\\ \\) con el método Simpson 3/8 de '+ str(particiones) + ' particiones', 
-                                      'procedimiento': integral.pasos,
-                                      'resultado': str(aproximacion) 
-                                    })
-                funcion_evaluada.append(aproximacion)
-            S2 = sum(funcion_evaluada)
-            
-
-            self.pasos.append({ 'titulo':'Calcular S2 con las integrales evaluando los puntos de soporte en posición 1, 4, 7, 10, ... impares en los límites de la integral y en la función', 
-                            'procedimiento2': procedimiento,
-                            'resultado': '\\( S2 = \\sum \\ ' + str(funcion_evaluada) + ' \\ = \\ '+ str(S2) + ' \\)' })
-            ##### s3
-            funcion_evaluada = []
-            procedimiento = []
-            puntos_soporteS1 = [soportes[t] for t in range(3,3*particiones-1,3)]
-            for t in puntos_soporteS1:
-                aa = float(a.subs(x, t))
-                bb = float(b.subs(x, t))
-                expresion =  self.exp.subs(x,t)
-
-                integral = integracion_numerica([aa, bb], str(expresion.subs(y, x)) )
-                aproximacion = integral.simpson3_8_compuesto(particiones, errores = False)
-
-                procedimiento.append({'titulo':'Calcular evaluando el punto de soporte \\( \\ '+ str(t) +' \\ \\) \\( \\ \\Rightarrow \\int_{'+ str(aa)+ '}^{'+ str(bb)+ '} '+ latex(expresion) +'\\ dy\\ \\) con el método Simpson 3/8 de '+ str(particiones) + ' particiones', 
-                                      'procedimiento': integral.pasos,
-                                      'resultado': str(aproximacion) 
-                                    })
-                funcion_evaluada.append(aproximacion)
-            S3 = sum(funcion_evaluada)
-            
-
-            self.pasos.append({ 'titulo':'Calcular S3 con las integrales evaluando los puntos de soporte en posición 2, 5, 8, 11, ...  en los límites de la integral y en la función', 
-                            'procedimiento2': procedimiento,
-                            'resultado': '\\( S3 = \\sum \\ ' + str(funcion_evaluada) + ' \\ = \\ '+ str(S3) + ' \\)' })
-
-            aa1 = float(a.subs(x, c))
-            bb1 = float(b.subs(x,c))
-            expression1 = self.exp.subs(x,c)
-
-            aa2 = float(a.subs(x, d))
-            bb2 = float(b.subs(x, d))
-            expression2 = self.exp.subs(x,d)
-
-            procedimiento2 = []
-            integral_gc = integracion_numerica([aa1, bb1], str(expression1.subs(y, x)))
-            gc = integral_gc.simpson3_8_compuesto(particiones, errores = False)
-            procedimiento2.append({'titulo':'Calcular evaluando el punto  \\( \\ '+ str(c) +' \\ \\) \\( \\ \\Rightarrow \\int_{'+ str(aa1)+ '}^{'+ str(bb1)+ '} '+ latex(expression1) +'\\ dy\\ \\) con el método Simpson 3/8 de '+ str(particiones) + ' particiones', 
-                                      'procedimiento': integral_gc.pasos,
-                                      'resultado': str(gc) 
-                                    })
-            integral_gd = integracion_numerica([aa2, bb2], str(expression2.subs(y, x)))
-            gd = integral_gd.simpson3_8_compuesto(particiones, errores = False)
-            procedimiento2.append({'titulo':'Calcular evaluando el punto  \\( \\ '+ str(d) +' \\ \\) \\( \\ \\Rightarrow \\int_{'+ str(aa2)+ '}^{'+ str(bb1)+ '} '+ latex(expression2) +'\\ dy\\ \\) con el método Simpson 3/8 de '+ str(particiones) + ' particiones', 
-                                      'procedimiento': integral_gd.pasos,
-                                      'resultado': str(gd) 
-                                    })
-
-            self.pasos.append({ 'titulo':'Calcular las integrales evaluando los límites y la función con \\( \\ c \\ \\) y \\( \\ d \\ \\) ', 
-                            'procedimiento2':procedimiento2 ,
-                            'resultado': f'\\(G(c) = {gc} \\ \\ G(d) = {gd} \\)'  })
-
-
-            self.solucion =  (3*h/8)*(gc + 3*S1 + 3*S2 + 2*S3 + gd ) 
-            self.pasos.append({ 'titulo':'Calcular la aproximación con la fórmula', 
-                            'procedimiento': '\\( 3 \\cdot h\\cdot\\frac{1}{8} \\cdot (G(c) + G(d) + 3 \\cdot S1 + 3 \\cdot S2 + 2 \\cdot S3) \\)',
-                            'resultado': ' \\( \\Rightarrow \\ 3 \\cdot' + str(h) +'\\cdot\\frac{1}{8} \\cdot ('+ str(gc) +' + '+ str(gd) +' + 3 \\cdot '+  str(S1) +'+ 3\\cdot '+ str(S2) + '\\) \n \\( + 2\\cdot '+ str(S3)  +' =  ' + str(self.solucion) + ' \\)'    })
-        
-            self.metodo = "Simpson 3/8 compuesto doble"
-            return N(self.solucion)
+            etiquetas = sumas_nombres = ['S_' + str(i + 1) for i in range(len(clases))]
+
+        campos.update(a = str(a), b = str(b), n = str(particiones), h = str(h))
+        escribir('h', 'Calcular h' if h_ == 'h' else 'Calcular \\( \\ ' + h_ + ' \\ \\)',
+                 '\\( ' + h_ + ' = \\frac{' + nombres['b'] + '-' + nombres['a'] + '}{' + ('' if ancho == 1 else str(ancho) + ' \\cdot ') + 'particiones}  \\)',
+                 '\\( \\Rightarrow  ' + h_ + ' = \\frac{'+ str(b) + ' - ' + str(a) +'}{' + ('' if ancho == 1 else str(ancho) + ' \\cdot ') + str(particiones) + '}  = ' + str(h)+ '\\)')
+
+        anidado = False
+        if evaluar is not None or m - 1 <= self.LIMITE_DETALLE:
+            if evaluar is None:
+                evaluar = lambda t: self.exp.subs(x, t)
+            soportes = [float(t) for t in np.linspace(a + h, b - h, m - 1)]
+            campos.update(puntos = str(soportes))
+            escribir('soportes', 'Calcular puntos de soporte',
+                     'De \\( \\ ' + h_ + ' \\ \\) en \\( \\ ' + h_ + ' \\ \\) desde \\(' + nombres['a'] + '\\) hasta \\(' + nombres['b'] + '\\)',
+                     '\\( ' + x_ + '_i =  \\)' + ' ' + str(soportes))
+            if callable(correccion):
+                correccion = correccion()
+
+            grupos = [soportes[k - 1::ancho][:cantidad] for k, _, cantidad in clases]
+            evaluados, subpasos = [], []
+            for grupo in grupos:
+                resultados = [evaluar(t) for t in grupo]
+                anidado = anidado or any(isinstance(r, tuple) for r in resultados)
+                subpasos.append([r[1] for r in resultados if isinstance(r, tuple)])
+                evaluados.append([r[0] if isinstance(r, tuple) else r for r in resultados])
+            sumas = [sum(valores) for valores in evaluados]
+            if textos:
+                for k, (grupo, valores, suma) in enumerate(zip(grupos, evaluados, sumas), start = 1):
+                    campos.update({'P' + str(k): str(grupo), 'E' + str(k): str(valores),
+                                   'LP' + str(k): latex(grupo), 'LE' + str(k): latex(valores),
+                                   'LI' + str(k): ', '.join(' \\(  ' + latex(v) + ' \\) ' for v in valores),
+                                   'S' + str(k): str(suma), 'LS' + str(k): latex(suma)})
+
+            if anidado:
+                for k, (nombre, valores, pasos, suma) in enumerate(zip(sumas_nombres, evaluados, subpasos, sumas), start = 1):
+                    if len(clases) == 1:
+                        escribir('integrales1', 'Calcular las integrales evaluando los puntos de soporte en los límites de la integral y en la función', None,
+                                 '\\( ' + f.format(x_ + '_i') + ' =  ' + str(valores) + '\\)', pasos)
+                    else:
+                        escribir('integrales' + str(k), 'Calcular ' + nombre + ' con las integrales evaluando los puntos de soporte en la posición ' + str(k) + ' de cada panel en los límites de la integral y en la función', None,
+                                 '\\( ' + nombre + ' = \\sum \\ ' + str(valores) + ' \\ = \\ ' + str(suma) + ' \\)', pasos)
+            else:
+                if len(clases) == 1:
+                    procedimiento = '\\( ' + f.format(x_ + '_i') + ' \\)'
+                    resultado = '\\( ' + f.format(x_ + '_i') + ' =  \\)' + ' ' + _lista(evaluados[0])
+                else:
+                    procedimiento = ('Para facilitar cálculos, se divide en ' + str(len(clases)) + ' sumas según la posición en cada panel de '
+                                     + str(ancho) + ' subintervalos: \\( \\ S_k \\ \\) suma los \\( \\ ' + f.format(x_ + '_i') + ' \\ \\) con \\( \\ i \\equiv k \\ \\) (mód ' + str(ancho) + ').')
+                    resultado = '\n\n'.join('Puntos de soporte para \\( \\ ' + nombre + ' \\Rightarrow \\  \\)' + str(grupo) + '\nEvaluados: ' + _lista(valores)
+                                            for nombre, grupo, valores in zip(sumas_nombres, grupos, evaluados))
+                escribir('evaluar', 'Evaluar los puntos de soporte en  \\( \\ ' + f.format(x_) + ' \\)', procedimiento, resultado)
+        else:
+            if callable(correccion):
+                correccion = correccion()
+            evaluar = lambda t: self.exp.subs(x, t)
+            sumas = [self._suma_por_bloques(a + k*h, ancho*h, cantidad, etiqueta)
+                     for (k, _, cantidad), etiqueta in zip(clases, etiquetas)]
+            for k, suma in enumerate(sumas, start = 1):
+                campos.update({'S' + str(k): str(suma), 'LS' + str(k): latex(suma)})
+
+        if len(clases) == 1:
+            escribir('sumas', 'Calcular la suma de las integrales evaluadas' if anidado else 'Sumar los puntos de soporte evaluados',
+                     '\\( ' + sumas_nombres[0] + ' \\)',
+                     '\\( ' + sumas_nombres[0] + ' = \\ \\) ' + _texto(sumas[0]))
+        elif not anidado:
+            escribir('sumas', 'Calcular ' + ', '.join('\\( \\ ' + nombre + ' \\ \\)' for nombre in sumas_nombres[:-1]) + ' y \\( \\ ' + sumas_nombres[-1] + ' \\)',
+                     'Como recordatorio \\( \\ S_k \\) es la suma de los puntos de soporte evaluados en la posición k de cada panel.',
+                     ' \n'.join('\\( \\ ' + nombre + ' = \\ \\)' + _texto(suma) for nombre, suma in zip(sumas_nombres, sumas)))
+
+        fa = fb = 0
+        if extremos:
+            fa, fb = evaluar(a), evaluar(b)
+            if isinstance(fa, tuple):
+                (fa, paso_a), (fb, paso_b) = fa, fb
+                campos.update(fa = str(fa), fb = str(fb))
+                escribir('extremos', 'Calcular las integrales evaluando los límites y la función con \\( \\ ' + nombres['a'] + ' \\ \\) y \\( \\ ' + nombres['b'] + ' \\ \\)', None,
+                         '\\( ' + f.format(nombres['a']) + ' = ' + str(fa) + ' \\ \\ ' + f.format(nombres['b']) + ' = ' + str(fb) + ' \\)', [paso_a, paso_b])
+
+        coeficientes = [c/factor for _, c, _ in clases]
+        comun = Rational(factor.numerator, factor.denominator)
+        total = comun*h*(Rational(extremos/factor)*(fa + fb) + sum(Rational(c)*s for c, s in zip(coeficientes, sumas))) + correccion
+
+        def formula(h_texto, extremo_a, extremo_b, terminos):
+            partes = []
+            if extremos:
+                e = extremos/factor
+                partes.append(extremo_a + ' + ' + extremo_b if e == 1 else str(e) + ' \\cdot ' + extremo_a + ' + ' + str(e) + ' \\cdot ' + extremo_b)
+            partes += [t if c == 1 else str(c) + ' \\cdot ' + t for c, t in zip(coeficientes, terminos)]
+            inicio = h_texto if factor == 1 else '\\frac{' + str(factor.numerator) + '}{' + str(factor.denominator) + '} \\cdot ' + h_texto
+            return inicio + ' \\cdot (' + ' + '.join(partes) + ')'
+
+        if textos:
+            campos.update(fa = str(fa), fb = str(fb), Lfa = latex(fa), Lfb = latex(fb), Rt = str(correccion),
+                          total = str(total), Ltotal = latex(total), Lg = latex(simplify(total)))
+        escribir('formula', nombres['formula'],
+                 '\\( ' + formula(h_, f.format(nombres['a']), f.format(nombres['b']), sumas_nombres) + (' + R_t' if correccion else '') + ' \\)',
+                 '\\( \\Rightarrow \\ ' + formula(str(h), _texto(fa), _texto(fb), [_texto(s) for s in sumas]) + (' + ' + str(correccion) if correccion else '') + ' \\)'
+                 + '\n \\( = \\ ' + _texto(total) + ' \\)')
+        return total
+
+    def _newton_cotes_doble(self, intervalo2, orden, particiones, abierta = False, simple = None, textos = None):
+        """
+        Integral doble con la regla de Newton-Cotes en las dos variables.
+
+        Con límites numéricos es la integral de c a d en y de la de a a b en x:
+        la regla en x da g(y) y la regla en y sobre g da la aproximación. Si
+        los límites son funciones de x es la integral de c a d en x de la de
+        a(x) a b(x) en y: cada punto de soporte es una integral simple G(x_i),
+        calculada con simple(integral) (por defecto newton_cotes) y con sus
+        pasos anidados.
+
+        Con más de LIMITE_DETALLE puntos de soporte se usa el producto
+        tensorial de los pesos (ver _doble_tensorial). textos son los textos
+        de _newton_cotes para la regla en x, la regla en y y la regla con
+        límites variables (ver _TEXTOS_DOBLES).
+        """
+        x, y = symbols('x y')
+        textos = textos or (None, None, None)
+        c, d = intervalo2
+        self.c = c
+        self.d = d
+        ancho = orden + 2 if abierta else orden
+        if ancho*particiones - 1 > self.LIMITE_DETALLE:
+            return self._doble_tensorial(intervalo2, orden, particiones, abierta)
+
+        if self._rectangulo():
+            g = self._newton_cotes(orden, particiones, [self.a, self.b], abierta, evaluar = lambda t: self.exp.subs(x, t),
+                                   nombres = {'h': 'h_x', 'f': 'f({}, y)', 'formula': 'Calcular \\( \\ g(y) \\ \\)con la fórmula'},
+                                   textos = textos[0])
+            g = sympify(g)
+            if textos[0] is None:
+                self.pasos[-1]['resultado'] += '\n \\( \\therefore g(y) = ' + latex(g) + ' \\)'
+            return self._newton_cotes(orden, particiones, [c, d], abierta, evaluar = lambda t: g.subs(y, t),
+                                      nombres = {'h': 'h_y', 'x': 'y', 'f': 'g({})', 'a': 'c', 'b': 'd',
+                                                 'formula': 'Aproximar la integral con la fórmula'},
+                                      textos = textos[1])
+
+        a = parse_expr(str(self.a))
+        b = parse_expr(str(self.b))
+        self.a = a
+        self.b = b
+        nombre = nombre_newton_cotes(orden, abierta)
+
+        def interior(t):
+            aa = float(a.subs(x, t))
+            bb = float(b.subs(x, t))
+            expresion = self.exp.subs(x, t)
+            integral = integracion_numerica([aa, bb], str(expresion.subs(y, x)))
+            integral.simbolico = self.simbolico
+            integral.LIMITE_DETALLE = self.LIMITE_DETALLE
+            aproximacion = simple(integral) if simple else integral.newton_cotes(particiones, orden, abierta)
+            punto = 'punto'
+            if textos[2] is not None:
+                punto = 'punto ' if t in (c, d) else 'punto de soporte'
+            return aproximacion, {'titulo':'Calcular evaluando el ' + punto + ' \\( \\ '+ str(t) +' \\ \\) \\( \\ \\Rightarrow \\int_{'+ str(aa)+ '}^{'+ str(bb)+ '} '+ latex(expresion) +'\\ dy\\ \\) con el método ' + nombre + ' de '+ str(particiones) + ' particiones',
+                                  'procedimiento': integral.pasos,
+                                  'resultado': str(aproximacion)}
+
+        return self._newton_cotes(orden, particiones, [c, d], abierta, evaluar = interior,
+                                  nombres = {'h': 'h_x', 'f': 'G({})', 'a': 'c', 'b': 'd',
+                                             'formula': 'Aproximar la integral con la fórmula'},
+                                  textos = textos[2])
+
+    def _doble_tensorial(self, intervalo2, orden, particiones, abierta = False):
+        """
+        Integral doble evaluada con numpy: los pesos en las dos variables son
+        el producto tensorial de los de la regla compuesta, w_i*w_j. Con
+        límites variables, el renglón del punto x_i usa los nodos de
+        [a(x_i), b(x_i)] y su propio h_y.
+        """
+        x, y = symbols('x y')
+        m, pesos = pesos_newton_cotes_compuesto(orden, particiones, abierta)
+        # En las reglas abiertas los extremos de los paneles tienen peso 0 y
+        # no se evalúan (la función puede no estar definida ahí).
+        usados = np.flatnonzero(pesos)
+        t = np.linspace(0, 1, m + 1)[usados]
+        pesos = pesos[usados]
+        f = lambdify((x, y), self.exp, 'numpy')
+        c, d = float(intervalo2[0]), float(intervalo2[1])
+
+        if self._rectangulo():
+            a, b = float(self.a), float(self.b)
+            externos = a + (b - a)*t
+            inferior, superior = np.full(len(t), c), np.full(len(t), d)
+            h_externo = (b - a)/m
+            procedimiento = '\\( h_x h_y \\sum_i \\sum_j w_i w_j f(x_i, y_j) \\)'
+        else:
+            a = parse_expr(str(self.a))
+            b = parse_expr(str(self.b))
+            self.a, self.b = a, b
+            externos = c + (d - c)*t
+            inferior = np.broadcast_to(lambdify(x, a, 'numpy')(externos), externos.shape).astype(float)
+            superior = np.broadcast_to(lambdify(x, b, 'numpy')(externos), externos.shape).astype(float)
+            h_externo = (d - c)/m
+            procedimiento = '\\( h_x \\sum_i w_i \\, h_y(x_i) \\sum_j w_j f(x_i, y_{ij}) \\), con \\( h_y(x_i) = \\frac{b(x_i) - a(x_i)}{' + str(m) + '} \\)'
+
+        acumulador = _Acumulador()
+        renglones = max(1, self.TAMANO_BLOQUE//len(t))
+        for i in range(0, len(t), renglones):
+            X = externos[i:i + renglones, None]
+            Y = inferior[i:i + renglones, None] + (superior - inferior)[i:i + renglones, None]*t
+            valores = np.broadcast_to(f(X, Y), Y.shape)
+            h_interno = (superior - inferior)[i:i + renglones]/m
+            acumulador.agregar(np.sum(pesos[i:i + renglones]*h_interno*(valores @ pesos)))
+        solucion = h_externo*acumulador.total
+
+        self.pasos.append({ 'titulo':'Aplicar la regla de ' + nombre_newton_cotes(orden, abierta) + ' en las dos variables',
+                            'procedimiento': procedimiento + ', donde \\( w_i w_j \\) son los pesos de la regla compuesta con ' + str(m) + ' subintervalos en cada variable (producto tensorial).',
+                            'resultado': 'Se evaluaron ' + str(len(t)**2) + ' puntos en bloques de ' + str(renglones) + ' renglones: \\( \\ ' + str(solucion) + ' \\)'})
+        return solucion
             
     ####----- Extrapolación: ------####   
     def romberg(self, n, i=2, metodo = None):
@@ -915,20 +966,193 @@ class integracion_numerica():
             self.estimadores = [( 1/(4**((i-2)/2) -1 ) )*((4**((i-2)/2))*self.estimadores[pos+1] - self.estimadores[pos]) for pos in range(len(self.estimadores)-1)]
             return self.romberg(n, i + 2)
 
+    ####----- CONVERGENCIA: ------####
+    def convergencia(self, lista_particiones, metodo = '1'):
+        """
+        Aproxima la integral con cada número de particiones de lista_particiones
+        usando el método compuesto indicado ('1' Trapezoidal, '2' Simpson 1/3,
+        '3' Simpson 3/8) y regresa la tabla de convergencia.
+
+        Cada nodo distinto se evalúa una sola vez: cuando una malla está contenida
+        en otra (por ejemplo 2, 4, 8, ...), los valores ya calculados se reutilizan.
+        """
+        nombres = {'1':'Trapezoidal compuesto',
+                   '2':'Simpson 1/3 compuesto',
+                   '3':'Simpson 3/8 compuesto'}
+        lista_particiones = sorted(set(int(p) for p in lista_particiones))
+
+        valores = {}
+        tabla = []
+        evaluaciones_separadas = 0
+        for particiones in lista_particiones:
+            subintervalos, pesos, factor = self._pesos_compuestos(metodo, particiones)
+            claves = [Fraction(i, subintervalos) for i in range(subintervalos + 1)]
+            nuevas = [k for k in claves if k not in valores]
+            if nuevas:
+                nodos = self.a + (self.b - self.a)*np.array([float(k) for k in nuevas])
+                valores.update(zip(nuevas, self._evaluar(nodos)))
+            evaluaciones_separadas += len(claves)
+
+            aproximacion = factor*np.dot(pesos, [valores[k] for k in claves])
+            # La misma corrección que suma simpson1_3_compuesto.
+            Rt = self._correccion_simpson1_3(particiones, pasos = False) if metodo == '2' and self.simbolico else 0
+            tabla.append({'Particiones': particiones, 'Nodos': len(claves), 'Nuevos': len(nuevas),
+                          'Aproximación': aproximacion + float(Rt), 'Rt': Rt})
+
+        for anterior, fila in zip([None] + tabla[:-1], tabla):
+            fila['Diferencia'] = None if anterior is None else fila['Aproximación'] - anterior['Aproximación']
+        for anterior, fila in zip([None] + tabla[:-1], tabla):
+            if anterior is None or anterior['Diferencia'] is None or not fila['Diferencia']:
+                fila['Orden observado'] = None
+            else:
+                fila['Orden observado'] = (np.log(abs(anterior['Diferencia'])/abs(fila['Diferencia']))
+                                           /np.log(fila['Particiones']/anterior['Particiones']))
+
+        self.metodo = 'Convergencia de ' + nombres[metodo]
+        self.solucion = tabla[-1]['Aproximación']
+        self.pasos.append({ 'titulo':'Evaluar la función en los nodos de todas las mallas',
+                            'procedimiento': 'Los nodos \\( x_i = a + \\frac{i}{m}(b-a) \\) de mallas anidadas coinciden, así que cada uno se evalúa una sola vez.',
+                            'resultado': 'Se evaluaron ' + str(len(valores)) + ' nodos distintos en lugar de ' + str(evaluaciones_separadas) + '.'})
+        for fila in tabla:
+            self.pasos.append({ 'titulo':'Aproximar con ' + str(fila['Particiones']) + ' particiones',
+                                'procedimiento': str(fila['Nodos']) + ' nodos, ' + str(fila['Nuevos']) + ' evaluados por primera vez.'
+                                                 + ('' if not fila['Rt'] else ' Se suma \\( R_t = ' + str(fila['Rt']) + ' \\).'),
+                                'resultado': '\\( \\Rightarrow \\ ' + str(fila['Aproximación']) + ' \\)'})
+        self.pasos.append({ 'titulo':'Calcular el orden observado',
+                            'procedimiento': '\\( p_k = \\frac{\\ln |D_{k-1}| - \\ln |D_k|}{\\ln n_k - \\ln n_{k-1}} \\), con \\( D_k = I_{n_k} - I_{n_{k-1}} \\)',
+                            'resultado': ''})
+
+        return pd.DataFrame(tabla, columns = ['Particiones', 'Nodos', 'Nuevos', 'Aproximación', 'Diferencia', 'Orden observado'])
+
+    def comparar(self, subintervalos, metodos = ('1', '2', '3'), errores = True):
+        """
+        Aproxima la integral con varias reglas compuestas ('1' Trapezoidal,
+        '2' Simpson 1/3, '3' Simpson 3/8) evaluando la función una sola vez.
+
+        subintervalos se redondea hacia arriba al mínimo común múltiplo de
+        los subintervalos por panel de las reglas (6 para las tres), así todas
+        usan los mismos nodos a, a+h, ..., b y solo cambian los pesos: con n
+        subintervalos Trapezoidal usa n particiones, Simpson 1/3 n/2 y Simpson
+        3/8 n/3.
+
+        Regresa una lista con un diccionario por método: 'metodo',
+        'particiones', 'subintervalos' (n), 'aproximacion' y 'errores' (el
+        DataFrame de errores()).
+        """
+        metodos = sorted(set(metodos))
+        n = subintervalos_comunes(subintervalos, metodos)
+        multiplo = reduce(math.lcm, (REGLAS[metodo] for metodo in metodos))
+        a, b = float(self.a), float(self.b)
+        h = (b - a)/n
+        valores = self._evaluar(a + (b - a)*np.arange(n + 1)/n)
+
+        self.pasos.append({ 'titulo':'Calcular la malla común',
+                            'procedimiento': 'Cada panel usa ' + ', '.join(str(REGLAS[metodo]) for metodo in metodos) + ' subintervalos según la regla, así que se toma un múltiplo de ' + str(multiplo) + ': \\( n = ' + str(n) + ' \\), \\( h = \\frac{b-a}{n} \\)',
+                            'resultado': '\\( \\Rightarrow h = \\frac{' + str(b) + ' - ' + str(a) + '}{' + str(n) + '} = ' + str(h) + ' \\)'})
+        self.pasos.append({ 'titulo':'Evaluar la función una sola vez',
+                            'procedimiento': 'Todas las reglas usan los nodos \\( x_i = a + ih, \\ i = 0, \\dots, ' + str(n) + ' \\).',
+                            'resultado': ('\\( f(x_i) = \\) ' + str([float(v) for v in valores]) if n - 1 <= self.LIMITE_DETALLE
+                                          else 'Se evaluaron ' + str(n + 1) + ' nodos con numpy.')})
+
+        resultados = []
+        for metodo in metodos:
+            orden = REGLAS[metodo]
+            particiones = n//orden
+            self.reiniciar_errores()
+            Rt = self._correccion_simpson1_3(particiones) if metodo == '2' and self.simbolico else 0
+            pesos = pesos_newton_cotes_compuesto(orden, particiones)[1]
+            self.solucion = Float(h*np.dot(pesos, valores)) + Rt
+            self.metodo = nombre_newton_cotes(orden) + " compuesto"
+            panel = pesos_newton_cotes(orden)
+            self.pasos.append({ 'titulo':'Aplicar los pesos de ' + nombre_newton_cotes(orden) + ' con ' + str(particiones) + ' particiones',
+                                'procedimiento': 'Pesos de cada panel de ' + str(orden) + ' subintervalo(s): \\( h \\cdot [' + ', '.join(latex(Rational(w.numerator, w.denominator)) for w in panel) + '] \\); en los nodos que comparten dos paneles se suman.'
+                                                 + (' Se suma \\( R_t \\).' if Rt else ''),
+                                'resultado': '\\( h \\sum_i w_i f(x_i) ' + ('+ R_t ' if Rt else '') + '= \\ ' + str(self.solucion) + ' \\)'})
+            if errores and self.simbolico:
+                self._errores_compuestos(metodo, particiones)
+            resultados.append({'metodo': self.metodo, 'particiones': particiones, 'subintervalos': n,
+                               'aproximacion': N(self.solucion), 'errores': self.errores()})
+        return resultados
+
+    def _pesos_compuestos(self, metodo, particiones):
+        """
+        Regresa el número de subintervalos, los pesos de la regla compuesta sobre
+        los nodos a, a+h, ..., b y el factor que multiplica a la suma.
+        """
+        m, pesos, factor = pesos_compuestos(metodo, particiones)
+        return m, pesos, factor*(self.b - self.a)
+
+    ####----- EVALUACIÓN: ------####
+    def _evaluar(self, puntos):
+        """
+        Evalúa la función en un arreglo de puntos con numpy. La función se
+        compila con lambdify la primera vez que se necesita.
+        """
+        if getattr(self, '_f', None) is None:
+            self._f = lambdify(symbols('x'), self.exp, 'numpy')
+        puntos = np.asarray(puntos, dtype = float)
+        trabajadores = self._trabajadores(puntos.size, -(-puntos.size//self.TAMANO_BLOQUE))
+        if trabajadores > 1:
+            bloques = [puntos[i:i + self.TAMANO_BLOQUE] for i in range(0, puntos.size, self.TAMANO_BLOQUE)]
+            ejecutor = _ejecutor(self.EJECUTOR, int(self.PARALELISMO))
+            return np.concatenate(list(ejecutor.map(_evaluar_bloque, repeat(srepr(self.exp)), bloques)))
+        valores = np.asarray(self._f(puntos), dtype = float)
+        if valores.shape != puntos.shape:
+            valores = np.broadcast_to(valores, puntos.shape)
+        return valores
+
+    def _suma_por_bloques(self, inicio, paso, cantidad, nombre):
+        """
+        Suma f(inicio + k*paso) para k = 0, ..., cantidad-1 sin construir la
+        lista completa de nodos. Cada bloque se evalúa con numpy y su suma
+        parcial se acumula con suma compensada. Si hay suficientes puntos los
+        bloques se evalúan en paralelo (ver UMBRAL_PARALELO).
+        """
+        desde = list(range(0, cantidad, self.TAMANO_BLOQUE))
+        hasta = desde[1:] + [cantidad]
+        trabajadores = self._trabajadores(cantidad, len(desde))
+        if trabajadores > 1:
+            ejecutor = _ejecutor(self.EJECUTOR, int(self.PARALELISMO))
+            parciales = list(ejecutor.map(_suma_bloque, repeat(srepr(self.exp)), repeat(inicio), repeat(paso), desde, hasta))
+        else:
+            parciales = [np.sum(self._evaluar(inicio + paso*np.arange(i, j, dtype = float))) for i, j in zip(desde, hasta)]
+
+        acumulador = _Acumulador()
+        for parcial in parciales:
+            acumulador.agregar(parcial)
+
+        self.pasos.append({ 'titulo':'Evaluar y sumar los puntos de soporte de \\( \\ ' + nombre + ' \\)',
+                            'procedimiento': 'Se evaluaron ' + str(cantidad) + ' puntos desde \\( x = ' + str(inicio) + ' \\) con paso \\( ' + str(paso) + ' \\), en ' + str(len(desde)) + ' bloque(s) de hasta ' + str(self.TAMANO_BLOQUE) + ' puntos'
+                                             + (' repartidos entre ' + str(trabajadores) + ' ' + self.EJECUTOR if trabajadores > 1 else '') + ', con suma compensada.',
+                            'resultado': '\\( \\sum f(' + nombre + ') = \\ \\)' + str(acumulador.total)})
+        return acumulador.total
+
+    def _trabajadores(self, cantidad, no_bloques):
+        if cantidad < self.UMBRAL_PARALELO:
+            return 1
+        return max(1, min(int(self.PARALELISMO), no_bloques))
+
     ####----- ERRORES: ------####
     def maximo(self, grado, f = None):
         if not f:
             f = self.exp
-        x = symbols = 'x'
+        x = symbols('x')
         g = self.exp
         for _ in range(grado):
             g = diff(g, x)
 
-        try:             
-            puntos_criticos = solve(g,x)
-        except:
-            puntos_criticos = []
-        puntos_criticos = [p for p in puntos_criticos if p >= self.a and p<=self.b] + [self.a,self.b]
+        # Las raíces de g se buscan numéricamente (corchetes + Brent), que es mucho
+        # más rápido que solve; solve queda para cuando g no se puede evaluar así
+        # (por ejemplo si tiene otra variable o los límites no son numéricos).
+        try:
+            puntos_criticos = list(ecuacion_no_lineal(str(g), [float(self.a), float(self.b)]).brent())
+        except (TypeError, ValueError) as e:
+            logger.debug('Puntos críticos de %s con solve: %s', g, e)
+            try:
+                puntos_criticos = [p for p in solve(g,x) if p >= self.a and p<=self.b]
+            except (NotImplementedError, TypeError):
+                puntos_criticos = []
+        puntos_criticos = puntos_criticos + [self.a,self.b]
         
         maximo = float(abs(f.subs(x,puntos_criticos[0])))
         for punto in puntos_criticos:
@@ -965,19 +1189,1601 @@ class integracion_numerica():
             else:
                 raise ValueError('No existe ese error')
         else: 
-            if 'doble' in self.metodo:
-                if 'numérico' not in self.metodo:
-                    integral_y = integrate(self.exp, (y, self.a, self.b))
-                    valor_verdadero = N(integrate (integral_y, (x, self.c, self.d)))
-                else:
-                    integral_x = integrate(self.exp, (x, self.a, self.b))
-                    valor_verdadero = N(integrate (integral_x, (y, self.c, self.d)))
+            if not self.simbolico:
+                self.verdadero = None
+                self.relativo = None
             else:
-                valor_verdadero = integrate(self.exp, (x, self.a, self.b))
+                if 'doble' in self.metodo:
+                    if 'numérico' not in self.metodo:
+                        integral_y = integrate(self.exp, (y, self.a, self.b))
+                        valor_verdadero = N(integrate (integral_y, (x, self.c, self.d)))
+                    else:
+                        integral_x = integrate(self.exp, (x, self.a, self.b))
+                        valor_verdadero = N(integrate (integral_x, (y, self.c, self.d)))
+                elif getattr(self, '_integrando', None) is not None:
+                    valor_verdadero = self._integrando.exacta(self.a, self.b)
+                else:
+                    valor_verdadero = integrate(self.exp, (x, sympify(self.a), sympify(self.b)))
                 
-            self.verdadero = valor_verdadero - self.solucion
-            self.relativo = (1 - self.solucion/valor_verdadero)*100
+                # Una integral impropia puede diverger o no tener forma cerrada.
+                if valor_verdadero.has(Integral) or valor_verdadero.is_finite is False:
+                    self.verdadero = None
+                    self.relativo = None
+                else:
+                    self.verdadero = valor_verdadero - self.solucion
+                    self.relativo = (1 - self.solucion/valor_verdadero)*100
 
             error = {'Total': self.total, 'Verdadero': self.verdadero, 'Relativo': self.relativo, 'Aproximado':self.aproximado, 
                     'Estimado':self.estimado, 'Cota':self.cota}
-            return pd.DataFrame(error.values(),index = error.keys(), columns = ['Valor']).reset_index().rename({'index':'Error'}, axis = 1).set_index('Error')
\ No newline at end of file
+            return pd.DataFrame(error.values(),index = error.keys(), columns = ['Valor']).reset_index().rename({'index':'Error'}, axis = 1).set_index('Error')
+
+# Reglas de Newton-Cotes: grado máximo y grado de cada método de los formularios.
+ORDEN_MAXIMO = 10
+REGLAS = {'1': 1, '2': 2, '3': 3}
+_NOMBRES_NEWTON_COTES = {1: 'Trapezoidal', 2: 'Simpson 1/3', 3: 'Simpson 3/8', 4: 'Boole'}
+
+def nombre_newton_cotes(orden, abierta = False):
+    if abierta:
+        return 'Punto medio' if orden == 0 else 'Newton-Cotes abierta de grado ' + str(orden)
+    return _NOMBRES_NEWTON_COTES.get(orden, 'Newton-Cotes de grado ' + str(orden))
+
+@lru_cache(maxsize = None)
+def pesos_newton_cotes(orden, abierta = False):
+    """
+    Pesos exactos (Fraction) de la regla de Newton-Cotes de grado orden con
+    nodos separados por h = 1. La regla cerrada usa los nodos 0, 1, ..., orden
+    de [0, orden]; la abierta, los nodos 1, ..., orden + 1 de [0, orden + 2]
+    (con orden 0 es la del punto medio). La integral del panel es
+    h*(pesos · f(nodos)).
+
+    Se obtienen resolviendo con fracciones el sistema que hace exacta la regla
+    para 1, x, ..., x^orden, una sola vez por regla.
+    """
+    if not (0 if abierta else 1) <= orden <= ORDEN_MAXIMO:
+        raise ValueError('El grado de la regla tiene que estar entre ' + ('0' if abierta else '1') + ' y ' + str(ORDEN_MAXIMO))
+    nodos = range(1, orden + 2) if abierta else range(orden + 1)
+    largo = orden + 2 if abierta else orden
+    n = orden + 1
+    # Renglón k: sum_i w_i x_i^k = largo^(k+1)/(k+1); eliminación de Gauss-Jordan.
+    sistema = [[Fraction(nodo)**k for nodo in nodos] + [Fraction(largo**(k + 1), k + 1)] for k in range(n)]
+    for j in range(n):
+        pivote = next(i for i in range(j, n) if sistema[i][j] != 0)
+        sistema[j], sistema[pivote] = sistema[pivote], sistema[j]
+        for i in range(n):
+            if i != j and sistema[i][j] != 0:
+                cociente = sistema[i][j]/sistema[j][j]
+                sistema[i] = [u - cociente*v for u, v in zip(sistema[i], sistema[j])]
+    return tuple(sistema[i][n]/sistema[i][i] for i in range(n))
+
+@lru_cache(maxsize = 32)
+def pesos_newton_cotes_compuesto(orden, paneles, abierta = False):
+    """
+    Pesos de la regla compuesta con paneles aplicaciones de la regla de grado
+    orden sobre los m+1 nodos de una malla uniforme, con m = paneles*orden
+    (cerrada) o paneles*(orden + 2) (abierta). Regresa (m, pesos); con
+    h = (b-a)/m la integral es h*(pesos · f(nodos)). En las reglas abiertas
+    los extremos de cada panel tienen peso 0.
+    """
+    pesos = pesos_newton_cotes(orden, abierta)
+    ancho = orden + 2 if abierta else orden
+    m = ancho*paneles
+    vector = np.zeros(m + 1)
+    for k, w in enumerate(pesos, start = 1 if abierta else 0):
+        vector[k::ancho][:paneles] += float(w)
+    return m, _inmutable(vector)
+
+def pesos_newton_cotes_doble(orden, paneles, abierta = False):
+    """
+    Pesos de la regla compuesta en dos variables: el producto tensorial
+    w_i*w_j de los de pesos_newton_cotes_compuesto. Regresa (m, matriz); la
+    integral en [a, b] x [c, d] es h_x*h_y*sum(matriz*f(x_i, y_j)).
+    """
+    m, pesos = pesos_newton_cotes_compuesto(orden, paneles, abierta)
+    return m, np.outer(pesos, pesos)
+
+# Máximo de niveles de Clenshaw-Curtis: n = 2^NIVELES_CLENSHAW_CURTIS.
+NIVELES_CLENSHAW_CURTIS = 16
+
+def niveles_clenshaw_curtis(n):
+    """Niveles anidados 2, 4, ..., 2^k con 2^k >= n; al menos dos para estimar el error."""
+    k = max(2, math.ceil(math.log2(max(int(n), 2))))
+    if k > NIVELES_CLENSHAW_CURTIS:
+        raise ValueError('Clenshaw-Curtis admite a lo más ' + str(2**NIVELES_CLENSHAW_CURTIS) + ' nodos')
+    return [2**i for i in range(1, k + 1)]
+
+@lru_cache(maxsize = 32)
+def pesos_clenshaw_curtis(n):
+    """
+    Nodos t_k = cos(k*pi/n), k = 0, ..., n, y pesos de Clenshaw-Curtis en
+    [-1, 1], calculados con la FFT en O(n log n) (algoritmo de Waldvogel).
+    La integral en [a, b] es (b-a)/2*(pesos · f(a + (b-a)(1 + t)/2)).
+    """
+    impares = np.arange(1, n, 2)
+    l = len(impares)
+    m = n - l
+    v0 = np.concatenate([2/impares/(impares - 2), [1/impares[-1]], np.zeros(m)])
+    v2 = -v0[:-1] - v0[:0:-1]
+    g0 = -np.ones(n)
+    g0[l] += n
+    g0[m] += n
+    pesos = np.real(np.fft.ifft(v2 + g0/(n**2 - 1 + n % 2)))
+    nodos = np.cos(np.pi*np.arange(n + 1)/n)
+    return _inmutable(nodos), _inmutable(np.append(pesos, pesos[0]))
+
+# Tanh-sinh: el nivel k usa el paso h = 2^-k en |t| <= T_TANH_SINH. Con
+# T = 6 los nodos de [-1, 1] llegan a ~1e-275 de los extremos sin redondearse
+# a ellos y exp(pi/2 sinh t) no se desborda.
+NIVELES_TANH_SINH = 10
+T_TANH_SINH = 6
+
+@lru_cache(maxsize = 3*(NIVELES_TANH_SINH + 1))
+def nodos_tanh_sinh(nivel, tipo = 'finito'):
+    """
+    Nodos que el nivel agrega a los anteriores: t = j*2^-nivel con j impar
+    (todos los enteros en el nivel 0). Regresa (t, s, pesos), sin los nodos
+    cuyo peso es 0 en punto flotante, con la integral aproximada por
+    2^-nivel * (pesos · f(s)) sumada sobre los niveles 0, ..., nivel:
+
+    'finito'        s = 1 - |tanh(pi/2 sinh t)|, la distancia al extremo más
+                    cercano de [-1, 1] calculada sin restar (f se evalúa en
+                    a + s o en b - s, escalada por (b-a)/2),
+    'semiinfinito'  s = exp(pi/2 sinh t) (f en a + s o en b - s),
+    'infinito'      s = sinh(pi/2 sinh t).
+    """
+    h = 2.0**-nivel
+    j = np.arange(-(T_TANH_SINH*2**nivel), T_TANH_SINH*2**nivel + 1)
+    t = (j if nivel == 0 else j[j % 2 == 1])*h
+    u = np.pi/2*np.sinh(t)
+    with np.errstate(over = 'ignore'):
+        if tipo == 'finito':
+            s = 2/(1 + np.exp(2*np.abs(u)))
+            pesos = np.pi/2*np.cosh(t)/np.cosh(u)**2
+        elif tipo == 'semiinfinito':
+            s = np.exp(u)
+            pesos = np.pi/2*np.cosh(t)*s
+        elif tipo == 'infinito':
+            s = np.sinh(u)
+            pesos = np.pi/2*np.cosh(t)*np.cosh(u)
+        else:
+            raise ValueError('El tipo de intervalo tiene que ser "finito", "semiinfinito" o "infinito"')
+    usados = (pesos > 0) & np.isfinite(pesos) & (s != 0 if tipo == 'finito' else True)
+    return _inmutable(t[usados]), _inmutable(s[usados]), _inmutable(pesos[usados])
+
+def _limites_removibles(valores, seleccion, expresion, puntos, maximo = 8):
+    # Un nodo puede caer en una singularidad removible (sin(x)/x en x = 0
+    # con t = 0); ahí se usa el límite. Si no existe se deja el valor.
+    x = symbols('x')
+    for i in np.flatnonzero(seleccion & ~np.isfinite(valores))[:maximo]:
+        try:
+            valores[i] = float(limit(expresion, x, puntos[i]))
+        except (TypeError, ValueError, NotImplementedError):
+            pass
+
+def subintervalos_comunes(subintervalos, metodos):
+    """
+    Menor múltiplo de los subintervalos por panel de las reglas de metodos
+    ('1', '2', '3') que es mayor o igual que subintervalos: la malla en la que
+    todas se pueden aplicar (ver integracion_numerica.comparar).
+    """
+    if not metodos or any(metodo not in REGLAS for metodo in metodos):
+        raise ValueError('No existe ese método')
+    multiplo = reduce(math.lcm, (REGLAS[metodo] for metodo in metodos))
+    return multiplo*max(1, -(-int(subintervalos)//multiplo))
+
+def pesos_compuestos(metodo, particiones):
+    """
+    Pesos de la regla compuesta ('1' Trapezoidal, '2' Simpson 1/3, '3' Simpson 3/8)
+    sobre los m+1 nodos de [0, 1]. Regresa (m, pesos, factor); para un intervalo
+    [a, b] la integral es factor*(b-a)*(pesos · f(nodos)).
+    """
+    if metodo not in REGLAS:
+        raise ValueError('No existe ese método')
+    m, pesos = pesos_newton_cotes_compuesto(REGLAS[metodo], particiones)
+    return m, pesos, 1/m
+
+def _texto(valor):
+    # Los valores simbólicos (g(y) en las integrales dobles) se muestran en LaTeX.
+    return latex(valor) if isinstance(valor, Basic) and valor.free_symbols else str(valor)
+
+def _lista(valores):
+    if any(isinstance(v, Basic) and v.free_symbols for v in valores):
+        return '\\( [' + ', '.join(latex(v) for v in valores) + '] \\)'
+    return str(valores)
+
+def _rellenar(plantilla, campos):
+    # Sustituye cada <campo> de los textos de _TEXTOS_SIMPLES/_TEXTOS_DOBLES.
+    return regex.sub(r'<(\w+)>', lambda m: campos[m.group(1)], plantilla)
+
+@lru_cache(maxsize = 64)
+def _compilar(funcion):
+    return lambdify(symbols('x'), sympify(funcion), 'numpy')
+
+def _evaluar_bloque(funcion, puntos):
+    # Funciones de módulo para que ProcessPoolExecutor las pueda enviar a otros
+    # procesos; la expresión viaja como srepr y se compila una vez por proceso.
+    valores = np.asarray(_compilar(funcion)(puntos), dtype = float)
+    if valores.shape != puntos.shape:
+        valores = np.broadcast_to(valores, puntos.shape)
+    return valores
+
+def _suma_bloque(funcion, inicio, paso, desde, hasta):
+    return np.sum(_evaluar_bloque(funcion, inicio + paso*np.arange(desde, hasta, dtype = float)))
+
+_EJECUTORES = {}
+_CANDADO_EJECUTORES = threading.Lock()
+
+def _ejecutor(tipo, trabajadores):
+    # El pool se crea la primera vez que se necesita y se reutiliza en las
+    # siguientes llamadas; crear uno por integral cuesta más que la integral.
+    if tipo not in ('hilos', 'procesos'):
+        raise ValueError('EJECUTOR tiene que ser "hilos" o "procesos"')
+    with _CANDADO_EJECUTORES:
+        if (tipo, trabajadores) not in _EJECUTORES:
+            clase = ProcessPoolExecutor if tipo == 'procesos' else ThreadPoolExecutor
+            _EJECUTORES[(tipo, trabajadores)] = clase(max_workers = trabajadores)
+        return _EJECUTORES[(tipo, trabajadores)]
+
+class _Acumulador():
+    """
+        Suma compensada (Kahan-Neumaier) para acumular sumas parciales sin
+        perder precisión cuando hay muchos términos.
+    """
+    def __init__(self):
+        self.suma = 0.0
+        self.compensacion = 0.0
+
+    def agregar(self, valor):
+        valor = float(valor)
+        t = self.suma + valor
+        if abs(self.suma) >= abs(valor):
+            self.compensacion += (self.suma - t) + valor
+        else:
+            self.compensacion += (valor - t) + self.suma
+        self.suma = t
+
+    @property
+    def total(self):
+        return self.suma + self.compensacion
+
+
+####----- API SIN ESTADO: ------####
+class integrando():
+    """
+        Función de x (y de y en las integrales dobles) interpretada y
+        compilada con numpy una sola vez. Es inmutable, así que un mismo
+        integrando se puede usar desde varios hilos y con varios métodos (ver
+        integrar y comparar); compilar(funcion_texto) guarda los últimos.
+
+        Parámetros
+        -----------------------
+        funcion_texto: str
+            Función escrita con los operadores de Python.
+
+        Atributos
+        -----------------------
+        texto: str
+            La función como se recibió.
+        exp: sympy.Expr
+            La expresión simbólica.
+        f: function
+            f(x) compilada con lambdify para arreglos de numpy.
+    """
+    __slots__ = ('texto', 'exp', 'f', '_exactas', '_candado')
+    # Integrales exactas que se guardan por integrando (las más recientes).
+    MAX_EXACTAS = 8
+
+    def __init__(self, funcion_texto):
+        asignar = super().__setattr__
+        asignar('texto', funcion_texto)
+        asignar('exp', parse_expr(funcion_texto))
+        asignar('f', lambdify(symbols('x'), self.exp, 'numpy'))
+        asignar('_exactas', OrderedDict())
+        asignar('_candado', threading.Lock())
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError('Un integrando no se puede modificar')
+
+    def __repr__(self):
+        return 'integrando(' + repr(self.texto) + ')'
+
+    def exacta(self, a, b):
+        """
+        Integral simbólica de a a b, calculada una vez por par de límites
+        para todos los métodos que la usan en sus errores. Solo se guardan
+        los últimos MAX_EXACTAS pares.
+        """
+        llave = (str(a), str(b))
+        with self._candado:
+            if llave in self._exactas:
+                self._exactas.move_to_end(llave)
+                return self._exactas[llave]
+        valor = integrate(self.exp, (symbols('x'), sympify(a), sympify(b)))
+        with self._candado:
+            valor = self._exactas.setdefault(llave, valor)
+            self._exactas.move_to_end(llave)
+            while len(self._exactas) > self.MAX_EXACTAS:
+                self._exactas.popitem(last = False)
+            return valor
+
+@lru_cache(maxsize = 64)
+def compilar(funcion_texto):
+    """Regresa el integrando de funcion_texto, compartido entre llamadas."""
+    return integrando(funcion_texto)
+
+resultado_integral = namedtuple('resultado_integral', ['valor', 'metodo', 'errores', 'pasos'])
+resultado_integral.__doc__ = """
+    Resultado inmutable de integrar: valor de la aproximación, nombre del
+    método, errores como tuplas (nombre, valor) en el orden de
+    integracion_numerica.errores() (vacío si no se pidieron) y los pasos
+    como tupla de diccionarios de solo lectura (ver descongelar).
+"""
+
+# Métodos de integracion_numerica que acepta integrar.
+METODOS_INTEGRAL = frozenset({'trapezoidal', 'simpson1_3', 'simpson3_8',
+                              'trapezoidal_compuesto', 'simpson1_3_compuesto', 'simpson3_8_compuesto', 'newton_cotes',
+                              'trapecio_compuesto_doble', 'simpson1_3_compuesto_doble', 'simpson3_8_compuesto_doble', 'newton_cotes_doble',
+                              'clenshaw_curtis', 'clenshaw_curtis_doble', 'tanh_sinh', 'romberg'})
+
+def _congelar(objeto):
+    if isinstance(objeto, dict):
+        return MappingProxyType({llave: _congelar(valor) for llave, valor in objeto.items()})
+    if isinstance(objeto, (list, tuple)):
+        return tuple(_congelar(valor) for valor in objeto)
+    return objeto
+
+def descongelar(objeto):
+    """Copia los pasos de un resultado_integral en listas y diccionarios comunes (para JSON)."""
+    if isinstance(objeto, MappingProxyType):
+        return {llave: descongelar(valor) for llave, valor in objeto.items()}
+    if isinstance(objeto, tuple):
+        return [descongelar(valor) for valor in objeto]
+    return objeto
+
+def _calculo(funcion, limites, simbolico, detalle):
+    # Estado de un solo cálculo: nadie más tiene esta instancia.
+    calculo = integracion_numerica(limites, funcion if isinstance(funcion, integrando) else compilar(funcion))
+    calculo.simbolico = simbolico
+    if detalle is not None:
+        calculo.LIMITE_DETALLE = detalle
+    return calculo
+
+def _errores(calculo):
+    return tuple(calculo.errores()['Valor'].items())
+
+def integrar(funcion, limites, metodo, /, *argumentos, tabla_errores = True, simbolico = True, detalle = None, **opciones):
+    """
+        Aproxima la integral sin estado compartido: es seguro llamarla desde
+        varios hilos con el mismo integrando.
+
+        Parámetros
+        -----------------------
+        funcion: integrando o str
+            La función; si es texto se usa compilar(funcion).
+        limites: list
+            Límites como en integracion_numerica.
+        metodo: str
+            Nombre del método de integracion_numerica (ver METODOS_INTEGRAL);
+            argumentos y opciones son sus parámetros, por ejemplo
+            integrar(f, [0, 1], 'simpson1_3_compuesto', 10) o
+            integrar(f, [0, 1], 'romberg', n = 6, metodo = '2').
+        tabla_errores: bool
+            Si es False no se calcula la tabla de errores (errores = ... es el
+            parámetro de los métodos compuestos).
+        simbolico: bool
+            Como integracion_numerica.simbolico.
+        detalle: int
+            Si no es None, reemplaza a LIMITE_DETALLE.
+
+        Regresa un resultado_integral.
+    """
+    if metodo not in METODOS_INTEGRAL:
+        raise ValueError('No existe ese método')
+    calculo = _calculo(funcion, limites, simbolico, detalle)
+    valor = getattr(calculo, metodo)(*argumentos, **opciones)
+    return resultado_integral(valor, calculo.metodo, _errores(calculo) if tabla_errores else (), _congelar(calculo.pasos))
+
+def comparar(funcion, limites, subintervalos, metodos = ('1', '2', '3'), errores = True, simbolico = True, detalle = None):
+    """
+        Como integracion_numerica.comparar, sin estado compartido. Regresa una
+        tupla de resultado_integral, uno por método, que comparten los pasos.
+    """
+    calculo = _calculo(funcion, limites, simbolico, detalle)
+    resultados = calculo.comparar(subintervalos, metodos, errores = errores)
+    pasos = _congelar(calculo.pasos)
+    return tuple(resultado_integral(r['aproximacion'], r['metodo'], tuple(r['errores']['Valor'].items()), pasos)
+                 for r in resultados)
+
+def extremo_singular(funcion, limites):
+    """
+        Primer límite que es infinito o donde la función no es finita, o None
+        (ver integracion_numerica.extremo_singular).
+    """
+    x = symbols('x')
+    expresion = funcion.exp if isinstance(funcion, integrando) else funcion if isinstance(funcion, Basic) else parse_expr(funcion)
+    for limite in (sympify(limites[0]), sympify(limites[1])):
+        if limite.is_infinite or expresion.subs(x, limite).is_finite is not True:
+            return limite
+    return None
+
+
+class integracion_tabular():
+    """
+        Aproximación de integrales de datos tabulados (x_i, f(x_i)), con
+        espaciamiento no necesariamente uniforme, por los métodos de:
+
+        Trapezoidal
+            .trapezoidal()
+        Simpson 1/3 (no uniforme)
+            .simpson1_3()
+
+        Los datos se leen por bloques de TAMANO_BLOQUE renglones y las sumas se
+        acumulan entre bloques, así que la memoria no depende del número de datos.
+        En una sola lectura se calculan ambas reglas; la diferencia entre ellas
+        se reporta como error estimado.
+
+        Parámetros
+        -----------------------
+        archivo: str o archivo
+            Ruta o archivo abierto con los datos. Un CSV debe tener x en la primera
+            columna y f(x) en la segunda (el encabezado es opcional). Un .npy debe
+            ser un arreglo de forma (n, 2) o (2, n).
+        formato: str
+            'csv' o 'npy'. Si es None se deduce de la extensión del archivo.
+
+        Atributos
+        -----------------------
+        solucion: float
+            Aproximacion a la integral.
+        metodo: str
+            Nombre del método utilizado para aproximar la solución.
+        estimado: float
+            Diferencia entre la regla de Simpson y la trapezoidal.
+        pasos: list
+            Resumen de los pasos realizados.
+        """
+    TAMANO_BLOQUE = 100000
+
+    def __init__(self, archivo, formato = None):
+        self.archivo = archivo
+        if formato is None:
+            nombre = archivo if isinstance(archivo, str) else getattr(archivo, 'name', '')
+            formato = 'npy' if str(nombre).lower().endswith('.npy') else 'csv'
+        self.formato = formato
+
+        self.solucion = None
+        self.metodo = None
+        self.estimado = None
+        self.pasos = []
+
+    ####----- LECTURA: ------####
+    def bloques(self):
+        """
+        Generador de bloques (x, y) como arreglos de numpy de tipo float.
+        """
+        if self.formato == 'npy':
+            datos = np.load(self.archivo, mmap_mode = 'r') if isinstance(self.archivo, str) else np.load(self.archivo)
+            if datos.ndim != 2 or 2 not in datos.shape:
+                raise ValueError('El arreglo debe tener forma (n, 2) o (2, n)')
+            if datos.shape[1] != 2:
+                datos = datos.T
+            for inicio in range(0, datos.shape[0], self.TAMANO_BLOQUE):
+                bloque = np.asarray(datos[inicio:inicio + self.TAMANO_BLOQUE], dtype = float)
+                yield bloque[:, 0], bloque[:, 1]
+        elif self.formato == 'csv':
+            lector = pd.read_csv(self.archivo, header = None, usecols = [0, 1], chunksize = self.TAMANO_BLOQUE,
+                                 comment = '#', skipinitialspace = True)
+            primero = True
+            for bloque in lector:
+                bloque = bloque.apply(pd.to_numeric, errors = 'coerce')
+                if primero and bloque.iloc[0].isna().any():
+                    bloque = bloque.iloc[1:]
+                primero = False
+                if bloque.isna().values.any():
+                    raise ValueError('Hay valores que no son numéricos en el archivo')
+                yield bloque[0].to_numpy(dtype = float), bloque[1].to_numpy(dtype = float)
+        else:
+            raise ValueError('Formato no soportado: ' + str(self.formato))
+
+    ####----- RECORRIDO: ------####
+    def _recorrer(self):
+        """
+        Lee los datos una sola vez y acumula la regla trapezoidal y la de
+        Simpson 1/3 no uniforme. Entre bloques solo se guardan los últimos
+        puntos que faltan por procesar.
+        """
+        trapecio = _Acumulador()
+        simpson = _Acumulador()
+        x_pend = np.empty(0)
+        y_pend = np.empty(0)
+        x_ant = y_ant = None
+        n = 0
+        no_bloques = 0
+        h_min = np.inf
+        h_max = 0.0
+        x_ini = x_fin = None
+
+        for x, y in self.bloques():
+            if len(x) == 0:
+                continue
+            no_bloques += 1
+            n += len(x)
+            if x_ini is None:
+                x_ini = x[0]
+            x_fin = x[-1]
+
+            x = np.concatenate([x_pend, x])
+            y = np.concatenate([y_pend, y])
+            h = np.diff(x)
+            if len(h):
+                if not np.all(h > 0) or not np.all(np.isfinite(y)):
+                    raise ValueError('Las abscisas deben ser estrictamente crecientes y los valores finitos')
+                h_min = min(h_min, h.min())
+                h_max = max(h_max, h.max())
+                # Solo se suman los intervalos nuevos; los pendientes ya se sumaron
+                nuevos = len(h) - max(len(x_pend) - 1, 0)
+                trapecio.agregar(np.sum((h*(y[:-1] + y[1:])/2)[-nuevos:]) if nuevos else 0.0)
+
+            pares = len(h)//2
+            if pares:
+                h0 = h[0:2*pares:2]
+                h1 = h[1:2*pares:2]
+                y0 = y[0:2*pares:2]
+                y1 = y[1:2*pares:2]
+                y2 = y[2:2*pares+1:2]
+                simpson.agregar(np.sum((h0 + h1)/6*((2 - h1/h0)*y0 + (h0 + h1)**2/(h0*h1)*y1 + (2 - h0/h1)*y2)))
+                x_ant, y_ant = x[2*pares - 1], y[2*pares - 1]
+            x_pend = x[2*pares:]
+            y_pend = y[2*pares:]
+
+        if n < 2:
+            raise ValueError('Se necesitan al menos dos puntos')
+
+        if len(x_pend) == 2:
+            h1 = x_pend[1] - x_pend[0]
+            if x_ant is None:
+                simpson.agregar(h1*(y_pend[0] + y_pend[1])/2)
+            else:
+                # Corrección para el último intervalo cuando el número de intervalos es impar
+                h0 = x_pend[0] - x_ant
+                alfa = (2*h1**2 + 3*h0*h1)/(6*(h0 + h1))
+                beta = (h1**2 + 3*h0*h1)/(6*h0)
+                eta = h1**3/(6*h0*(h0 + h1))
+                simpson.agregar(alfa*y_pend[1] + beta*y_pend[0] - eta*y_ant)
+
+        self.pasos.append({ 'titulo':'Leer los datos',
+                            'procedimiento': 'Se leyeron ' + str(n) + ' puntos en ' + str(no_bloques) + ' bloque(s) de hasta ' + str(self.TAMANO_BLOQUE) + ' renglones.',
+                            'resultado': '\\( x_0 = ' + str(x_ini) + ', \\ x_n = ' + str(x_fin) + ', \\ \\min h_i = ' + str(h_min) + ', \\ \\max h_i = ' + str(h_max) + ' \\)'})
+        return n - 1, trapecio.total, simpson.total
+
+    ####----- MÉTODOS: ------####
+    def trapezoidal(self):
+        intervalos, trapecio, simpson = self._recorrer()
+        self.solucion = trapecio
+        self.estimado = abs(simpson - trapecio)
+        self.metodo = "Trapezoidal con datos tabulados"
+        self.pasos.append({ 'titulo':'Aplicar la regla trapezoidal en cada intervalo',
+                            'procedimiento': '\\( \\sum_{i=0}^{n-1} \\frac{h_i}{2}(f(x_i) + f(x_{i+1})) \\), con \\( h_i = x_{i+1} - x_i \\). La suma se acumula bloque por bloque.',
+                            'resultado': '\\( \\Rightarrow ' + str(self.solucion) + ' \\)'})
+        return self.solucion
+
+    def simpson1_3(self):
+        intervalos, trapecio, simpson = self._recorrer()
+        self.solucion = simpson
+        self.estimado = abs(simpson - trapecio)
+        self.metodo = "Simpson 1/3 con datos tabulados"
+        self.pasos.append({ 'titulo':'Aplicar Simpson 1/3 no uniforme por pares de intervalos',
+                            'procedimiento': '\\( \\frac{h_0 + h_1}{6}\\left[(2 - \\frac{h_1}{h_0})f_0 + \\frac{(h_0+h_1)^2}{h_0 h_1}f_1 + (2 - \\frac{h_0}{h_1})f_2\\right] \\)'
+                                             + (' Como hay ' + str(intervalos) + ' intervalos, el último se corrige con los tres puntos finales.' if intervalos % 2 else ''),
+                            'resultado': '\\( \\Rightarrow ' + str(self.solucion) + ' \\)'})
+        return self.solucion
+
+    def errores(self):
+        error = {'Estimado': self.estimado}
+        return pd.DataFrame(error.values(),index = error.keys(), columns = ['Valor']).reset_index().rename({'index':'Error'}, axis = 1).set_index('Error')
+
+
+class integracion_lotes():
+    """
+        Aproximación de muchas integrales a la vez con los métodos compuestos
+        (Trapezoidal '1', Simpson 1/3 '2', Simpson 3/8 '3'):
+
+        Una función sobre muchos intervalos
+            .intervalos(limites, metodo, particiones)
+        Una familia de funciones con un parámetro sobre un intervalo
+            .familia(valores, limites, metodo, particiones)
+        Integral acumulada F(x_k) = integral de a a x_k en una malla
+            .acumulada(limites, particiones, metodo)
+
+        La función se interpreta y se compila una sola vez, los pesos se
+        calculan una sola vez sobre [0, 1] y todos los nodos se evalúan juntos
+        en una matriz (un renglón por integral), por bloques de TAMANO_BLOQUE
+        nodos. A diferencia de integracion_numerica, el mismo objeto se puede
+        usar para cualquier número de llamadas.
+
+        Parámetros
+        -----------------------
+        funcion_texto: str
+            Representa la función escrita con los operadores de Python.
+        parametro: str
+            Nombre del parámetro de la familia (por ejemplo 'k' en 'exp(-k*x)'),
+            o None si la función solo depende de x.
+
+        Atributos
+        -----------------------
+        exp: sympy.parse_expr
+            Objeto que representa la función simbólica.
+        solucion: numpy.ndarray
+            Resultados de la última llamada.
+        metodo: str
+            Nombre del método utilizado en la última llamada.
+        pasos: list
+            Resumen de los pasos realizados.
+        """
+    TAMANO_BLOQUE = 2**18
+
+    def __init__(self, funcion_texto, parametro = None):
+        self.exp = parse_expr(funcion_texto)
+        self.parametro = parametro
+        variables = (symbols('x'),) if parametro is None else (symbols('x'), symbols(parametro))
+        self._f = lambdify(variables, self.exp, 'numpy')
+
+        self.solucion = None
+        self.metodo = None
+        self.pasos = []
+
+    def _evaluar(self, *argumentos):
+        forma = np.broadcast(*argumentos).shape
+        return np.broadcast_to(np.asarray(self._f(*argumentos), dtype = float), forma)
+
+    def _renglones(self, nodos):
+        # Renglones de la matriz de nodos que caben en un bloque.
+        return max(1, self.TAMANO_BLOQUE//nodos)
+
+    ####----- LOTES: ------####
+    def intervalos(self, limites, metodo = '1', particiones = 10):
+        """
+        Integra la función sobre cada intervalo [a_i, b_i] de limites, un
+        arreglo de forma (k, 2). Regresa un arreglo con k aproximaciones.
+        """
+        limites = np.asarray(limites, dtype = float).reshape(-1, 2)
+        m, pesos, factor = pesos_compuestos(metodo, particiones)
+        t = np.linspace(0, 1, m + 1)
+        a, b = limites[:, 0], limites[:, 1]
+
+        self.solucion = np.empty(len(limites))
+        paso = self._renglones(m + 1)
+        for i in range(0, len(limites), paso):
+            ancho = (b[i:i + paso] - a[i:i + paso])[:, None]
+            nodos = a[i:i + paso, None] + ancho*t
+            self.solucion[i:i + paso] = factor*ancho[:, 0]*(self._evaluar(nodos) @ pesos)
+
+        self.metodo = 'Lote de ' + str(len(limites)) + ' intervalos'
+        self.pasos.append({ 'titulo':'Evaluar la matriz de nodos',
+                            'procedimiento': 'Renglón i: \\( x_{ij} = a_i + t_j(b_i - a_i) \\), con los ' + str(m + 1) + ' nodos \\( t_j \\) de [0, 1]. Los pesos se calculan una sola vez.',
+                            'resultado': 'Se evaluaron ' + str(len(limites)*(m + 1)) + ' puntos para ' + str(len(limites)) + ' integrales.'})
+        return self.solucion
+
+    def familia(self, valores, limites, metodo = '1', particiones = 10):
+        """
+        Integra f(x, p) sobre limites = [a, b] para cada valor p de valores.
+        Regresa un arreglo con una aproximación por valor.
+        """
+        if self.parametro is None:
+            raise ValueError('La función no tiene parámetro')
+        valores = np.asarray(valores, dtype = float).ravel()
+        a, b = float(limites[0]), float(limites[1])
+        m, pesos, factor = pesos_compuestos(metodo, particiones)
+        nodos = a + (b - a)*np.linspace(0, 1, m + 1)
+
+        self.solucion = np.empty(len(valores))
+        paso = self._renglones(m + 1)
+        for i in range(0, len(valores), paso):
+            matriz = self._evaluar(nodos[None, :], valores[i:i + paso, None])
+            self.solucion[i:i + paso] = factor*(b - a)*(matriz @ pesos)
+
+        self.metodo = 'Familia de ' + str(len(valores)) + ' funciones'
+        self.pasos.append({ 'titulo':'Evaluar la familia en los nodos comunes',
+                            'procedimiento': 'Renglón i: \\( f(x_j, ' + self.parametro + '_i) \\) en los ' + str(m + 1) + ' nodos de [' + str(a) + ', ' + str(b) + '].',
+                            'resultado': 'Se evaluaron ' + str(len(valores)*(m + 1)) + ' puntos para ' + str(len(valores)) + ' integrales.'})
+        return self.solucion
+
+    def acumulada(self, limites, particiones, metodo = '1'):
+        """
+        Integral acumulada en la malla x_k = a + k*h, k = 0, ..., particiones.
+        Regresa (x, F) con F[k] la aproximación de la integral de a a x_k.
+
+        Con '1' se acumula la regla trapezoidal. Con '2' los nodos pares tienen
+        exactamente Simpson 1/3 compuesto y cada nodo impar agrega al par anterior
+        la integral de la parábola por los tres nodos que lo rodean; particiones
+        tiene que ser par.
+        """
+        a, b = float(limites[0]), float(limites[1])
+        x = np.linspace(a, b, particiones + 1)
+        f = self._evaluar(x)
+        h = (b - a)/particiones
+        F = np.zeros(particiones + 1)
+        if metodo == '1':
+            F[1:] = np.cumsum(h/2*(f[:-1] + f[1:]))
+            self.metodo = 'Trapezoidal acumulado'
+        elif metodo == '2':
+            if particiones % 2:
+                raise ValueError('Simpson 1/3 acumulado necesita un número par de particiones')
+            F[2::2] = np.cumsum(h/3*(f[:-2:2] + 4*f[1::2] + f[2::2]))
+            F[1::2] = F[:-1:2] + h/12*(5*f[:-2:2] + 8*f[1::2] - f[2::2])
+            self.metodo = 'Simpson 1/3 acumulado'
+        else:
+            raise ValueError('No existe ese método')
+
+        self.solucion = F
+        self.pasos.append({ 'titulo':'Acumular la integral en la malla',
+                            'procedimiento': '\\( F(x_k) = \\int_{' + str(a) + '}^{x_k} f(x) \\ dx \\), con \\( h = ' + str(h) + ' \\) y ' + str(particiones + 1) + ' nodos evaluados una sola vez.',
+                            'resultado': '\\( F(b) = ' + str(F[-1]) + ' \\)'})
+        return x, F
+
+
+# Tablas de Butcher (c, A, b) de los métodos de Runge-Kutta explícitos.
+_TABLAS_RK = {'euler': ([0], [[]], [1]),
+              'heun': ([0, 1], [[], [1]], [1/2, 1/2]),
+              'rk4': ([0, 1/2, 1/2, 1], [[], [1/2], [0, 1/2], [0, 0, 1]], [1/6, 1/3, 1/3, 1/6])}
+_ORDENES_RK = {'euler': 1, 'heun': 2, 'rk4': 4}
+_NOMBRES_RK = {'euler': 'Euler', 'heun': 'Heun', 'rk4': 'Runge-Kutta 4'}
+
+# Dormand-Prince 5(4): b5 da la solución y b5 - b4 el error local estimado.
+_DOPRI_C = [0, 1/5, 3/10, 4/5, 8/9, 1, 1]
+_DOPRI_A = [[],
+            [1/5],
+            [3/40, 9/40],
+            [44/45, -56/15, 32/9],
+            [19372/6561, -25360/2187, 64448/6561, -212/729],
+            [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+            [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84]]
+_DOPRI_B5 = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0])
+_DOPRI_B4 = np.array([5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40])
+
+
+class ecuacion_diferencial():
+    """
+        Solución numérica del problema de valor inicial y' = f(x, y), y(x0) = y0
+        por los métodos de:
+
+        Euler
+            .euler(pasos)
+        Heun
+            .heun(pasos)
+        Runge-Kutta 4
+            .rk4(pasos)
+        Dormand-Prince 5(4) adaptivo
+            .rk45(tolerancia)
+
+        La función se compila una sola vez y todas las condiciones iniciales (y
+        valores del parámetro) avanzan juntas como un arreglo de numpy. En el
+        método adaptivo el tamaño de paso es común y lo controla la condición con
+        mayor error. Los pasos solo detallan las primeras PASOS_DETALLE
+        iteraciones; el resto se resume.
+
+        Parámetros
+        -----------------------
+        funcion_texto: str
+            f(x, y) escrita con los operadores de Python.
+        intervalo: list
+            [x0, xf].
+        condiciones: float o list
+            Uno o varios valores de y(x0).
+        parametro: str
+            Nombre de un parámetro de f (por ejemplo 'k' en 'k*y'), o None.
+        valores: float o list
+            Valores del parámetro; se combinan con condiciones como en numpy.
+
+        Atributos
+        -----------------------
+        x: numpy.ndarray
+            Nodos x_n, forma (n+1,).
+        y: numpy.ndarray
+            Aproximaciones, forma (n+1, número de condiciones).
+        metodo: str
+            Nombre del método utilizado.
+        estimado: float
+            Error estimado en xf (el máximo entre todas las condiciones).
+        pasos: list
+            Pasos realizados.
+        """
+    PASOS_DETALLE = 5
+    MAX_PASOS = 100000
+
+    def __init__(self, funcion_texto, intervalo, condiciones, parametro = None, valores = None):
+        self.x0 = float(intervalo[0])
+        self.xf = float(intervalo[1])
+        self.exp = parse_expr(funcion_texto)
+        x, y = symbols('x y')
+        if parametro is None:
+            self.y0 = np.atleast_1d(np.asarray(condiciones, dtype = float))
+            self.valores = None
+            f = lambdify((x, y), self.exp, 'numpy')
+            self._f = lambda xn, yn: f(xn, yn)
+        else:
+            self.y0, self.valores = np.broadcast_arrays(np.atleast_1d(np.asarray(condiciones, dtype = float)),
+                                                        np.atleast_1d(np.asarray(valores, dtype = float)))
+            self.y0 = self.y0.copy()
+            f = lambdify((x, y, symbols(parametro)), self.exp, 'numpy')
+            self._f = lambda xn, yn: f(xn, yn, self.valores)
+        self.parametro = parametro
+        self.evaluaciones = 0
+
+        self.x = None
+        self.y = None
+        self.metodo = None
+        self.estimado = None
+        self.pasos = []
+
+    def _evaluar(self, xn, yn):
+        self.evaluaciones += 1
+        return np.broadcast_to(np.asarray(self._f(xn, yn), dtype = float), yn.shape)
+
+    @staticmethod
+    def _texto(arreglo):
+        return np.array2string(np.asarray(arreglo), precision = 8, threshold = 6)
+
+    def _etapas(self, xn, yn, h, c, A, k1 = None):
+        k = [self._evaluar(xn, yn) if k1 is None else k1]
+        for ci, fila in zip(c[1:], A[1:]):
+            k.append(self._evaluar(xn + ci*h, yn + h*sum(a*kj for a, kj in zip(fila, k) if a)))
+        return k
+
+    ####----- PASO FIJO: ------####
+    def _paso_fijo(self, nombre, pasos, detalle = True):
+        c, A, b = _TABLAS_RK[nombre]
+        h = (self.xf - self.x0)/pasos
+        x = self.x0 + h*np.arange(pasos + 1)
+        y = np.empty((pasos + 1, len(self.y0)))
+        y[0] = self.y0
+        if detalle:
+            self.pasos.append({ 'titulo':'Calcular h',
+                                'procedimiento': '\\( h = \\frac{x_f - x_0}{n} \\)',
+                                'resultado': '\\( h = \\frac{' + str(self.xf) + ' - ' + str(self.x0) + '}{' + str(pasos) + '} = ' + str(h) + ' \\)'})
+        for n in range(pasos):
+            k = self._etapas(x[n], y[n], h, c, A)
+            y[n + 1] = y[n] + h*sum(bi*ki for bi, ki in zip(b, k))
+            if detalle and n < self.PASOS_DETALLE:
+                self.pasos.append({ 'titulo':'Paso ' + str(n + 1) + ': \\( x_{' + str(n + 1) + '} = ' + str(x[n + 1]) + ' \\)',
+                                    'procedimiento': '\n'.join('\\( k_' + str(i + 1) + ' = \\)' + self._texto(ki) for i, ki in enumerate(k)),
+                                    'resultado': '\\( y_{' + str(n + 1) + '} = \\)' + self._texto(y[n + 1])})
+        if detalle:
+            if pasos > self.PASOS_DETALLE:
+                self.pasos.append({ 'titulo':'Pasos ' + str(self.PASOS_DETALLE + 1) + ' a ' + str(pasos),
+                                    'procedimiento': 'Se repite el mismo cálculo; ' + str(self.evaluaciones) + ' evaluaciones de f en total para ' + str(len(self.y0)) + ' condición(es).',
+                                    'resultado': '\\( y(' + str(self.xf) + ') \\approx \\)' + self._texto(y[-1])})
+            self.x, self.y = x, y
+            self.metodo = _NOMBRES_RK[nombre]
+        return x, y
+
+    def euler(self, pasos):
+        return self._paso_fijo('euler', pasos)
+
+    def heun(self, pasos):
+        return self._paso_fijo('heun', pasos)
+
+    def rk4(self, pasos):
+        return self._paso_fijo('rk4', pasos)
+
+    ####----- ADAPTIVO: ------####
+    def rk45(self, tolerancia = 1e-6, h = None):
+        """
+        Dormand-Prince 5(4) con control de paso. Un paso se acepta si
+        max |y5 - y4|/(tolerancia*(1 + |y|)) <= 1 en todas las condiciones.
+        """
+        if not self.xf > self.x0:
+            raise ValueError('El método adaptivo necesita xf > x0')
+        x = [self.x0]
+        y = [self.y0.astype(float)]
+        h = (self.xf - self.x0)/100 if h is None else h
+        k1 = None
+        aceptados = rechazados = 0
+        error_total = 0.0
+        while x[-1] < self.xf and aceptados + rechazados < self.MAX_PASOS:
+            h = min(h, self.xf - x[-1])
+            k = self._etapas(x[-1], y[-1], h, _DOPRI_C, _DOPRI_A, k1)
+            nuevo = y[-1] + h*sum(bi*ki for bi, ki in zip(_DOPRI_B5, k) if bi)
+            error = h*np.abs(sum((b5 - b4)*ki for b5, b4, ki in zip(_DOPRI_B5, _DOPRI_B4, k)))
+            norma = float(np.max(error/(tolerancia*(1 + np.abs(nuevo)))))
+            aceptado = norma <= 1
+            if aceptados + rechazados < self.PASOS_DETALLE:
+                self.pasos.append({ 'titulo':'Intento ' + str(aceptados + rechazados + 1) + ': \\( h = ' + str(h) + ' \\) desde \\( x = ' + str(x[-1]) + ' \\)',
+                                    'procedimiento': 'Error local estimado \\( |y^{(5)} - y^{(4)}| = \\)' + self._texto(error) + '. Norma relativa: ' + str(norma) + '.',
+                                    'resultado': ('Se acepta: \\( y = \\)' + self._texto(nuevo)) if aceptado else 'Se rechaza y se reduce h.'})
+            if aceptado:
+                x.append(x[-1] + h)
+                y.append(nuevo)
+                k1 = k[-1]
+                aceptados += 1
+                error_total += float(np.max(error))
+            else:
+                rechazados += 1
+            h = h*min(5, max(0.2, 0.9*(norma if norma > 0 else 1e-10)**(-1/5)))
+
+        if x[-1] < self.xf:
+            raise ValueError('Se alcanzó el máximo de ' + str(self.MAX_PASOS) + ' pasos antes de llegar a ' + str(self.xf))
+
+        self.x = np.array(x)
+        self.y = np.array(y)
+        self.estimado = error_total
+        self.metodo = 'Dormand-Prince 5(4) adaptivo'
+        tamanos = np.diff(self.x)
+        self.pasos.append({ 'titulo':'Resumen del control de paso',
+                            'procedimiento': str(aceptados) + ' pasos aceptados y ' + str(rechazados) + ' rechazados, con ' + str(self.evaluaciones) + ' evaluaciones de f. '
+                                             + '\\( h_{min} = ' + str(tamanos.min()) + ', \\ h_{max} = ' + str(tamanos.max()) + ' \\)',
+                            'resultado': '\\( y(' + str(self.xf) + ') \\approx \\)' + self._texto(self.y[-1])})
+        return self.x, self.y
+
+    ####----- ERRORES: ------####
+    def errores(self):
+        """
+        Error estimado en xf. Para los métodos de paso fijo se estima por
+        extrapolación de Richardson, repitiendo el cálculo con h/2:
+        E_h = 2^p |y_{h/2} - y_h|/(2^p - 1).
+        """
+        nombre = {v: k for k, v in _NOMBRES_RK.items()}.get(self.metodo)
+        if nombre is not None:
+            _, mitad = self._paso_fijo(nombre, 2*(len(self.x) - 1), detalle = False)
+            orden = _ORDENES_RK[nombre]
+            self.estimado = float(np.max(np.abs(mitad[-1] - self.y[-1])))*2**orden/(2**orden - 1)
+        error = {'Estimado': self.estimado}
+        return pd.DataFrame(error.values(),index = error.keys(), columns = ['Valor']).reset_index().rename({'index':'Error'}, axis = 1).set_index('Error')
+
+
+class ecuacion_no_lineal():
+    """
+        Raíces de f(x) = 0 en un intervalo [a, b] por los métodos de:
+
+        Bisección
+            .biseccion(tolerancia)
+        Falsa posición
+            .falsa_posicion(tolerancia)
+        Secante
+            .secante(tolerancia)
+        Newton-Raphson
+            .newton(tolerancia)
+        Brent
+            .brent(tolerancia)
+
+        Primero se evalúa f en MUESTRAS puntos de [a, b] de una sola vez y se
+        toman todos los subintervalos donde cambia el signo (.corchetes()).
+        Después todas las raíces se buscan a la vez: cada iteración trabaja con
+        arreglos de numpy, un elemento por corchete. Brent, que elige entre
+        interpolación y bisección en cada paso, itera corchete por corchete.
+        La derivada para Newton se calcula simbólicamente y se compila una vez.
+
+        Parámetros
+        -----------------------
+        funcion_texto: str
+            Representa la función escrita con los operadores de Python.
+        intervalo: list
+            [a, b].
+
+        Atributos
+        -----------------------
+        raices: numpy.ndarray
+            Raíces encontradas, una por corchete.
+        iteraciones: numpy.ndarray
+            Iteraciones que tomó cada raíz.
+        estimado: numpy.ndarray
+            Último cambio de cada aproximación.
+        metodo: str
+            Nombre del método utilizado.
+        pasos: list
+            Pasos realizados.
+        """
+    MUESTRAS = 1000
+    PASOS_DETALLE = 5
+    MAX_ITERACIONES = 200
+
+    def __init__(self, funcion_texto, intervalo):
+        self.a = float(intervalo[0])
+        self.b = float(intervalo[1])
+        self.exp = parse_expr(funcion_texto)
+        x = symbols('x')
+        self._f = lambdify(x, self.exp, 'numpy')
+        self._df = None
+
+        self.raices = None
+        self.iteraciones = None
+        self.estimado = None
+        self.metodo = None
+        self.pasos = []
+
+    def _evaluar(self, puntos):
+        puntos = np.asarray(puntos, dtype = float)
+        with np.errstate(all = 'ignore'):
+            return np.broadcast_to(np.asarray(self._f(puntos), dtype = float), puntos.shape)
+
+    def _derivada(self, puntos):
+        if self._df is None:
+            self.derivada = diff(self.exp, symbols('x'))
+            self._df = lambdify(symbols('x'), self.derivada, 'numpy')
+        puntos = np.asarray(puntos, dtype = float)
+        with np.errstate(all = 'ignore'):
+            return np.broadcast_to(np.asarray(self._df(puntos), dtype = float), puntos.shape)
+
+    @staticmethod
+    def _texto(arreglo):
+        return np.array2string(np.asarray(arreglo), precision = 10, threshold = 6)
+
+    ####----- CORCHETES: ------####
+    def corchetes(self):
+        """
+        Regresa (izquierdos, derechos): los extremos de cada subintervalo de la
+        malla con MUESTRAS puntos donde f cambia de signo o se anula.
+        """
+        x = np.linspace(self.a, self.b, self.MUESTRAS + 1)
+        f = self._evaluar(x)
+        finitos = np.isfinite(f[:-1]) & np.isfinite(f[1:])
+        cambio = finitos & ((np.sign(f[:-1])*np.sign(f[1:]) < 0) | (f[:-1] == 0))
+        if f[-1] == 0:
+            cambio[-1] = True
+        izquierdos, derechos = x[:-1][cambio], x[1:][cambio]
+        # Un cero exacto en la malla se vuelve un corchete degenerado [x_i, x_i].
+        derechos = np.where(f[:-1][cambio] == 0, izquierdos, derechos)
+        izquierdos = np.where((f[1:][cambio] == 0) & (f[:-1][cambio] != 0), derechos, izquierdos)
+        return izquierdos, derechos
+
+    def _iniciar(self, nombre):
+        izquierdos, derechos = self.corchetes()
+        self._corchetes = (izquierdos, derechos)
+        self.metodo = nombre
+        self.pasos.append({ 'titulo':'Buscar cambios de signo',
+                            'procedimiento': 'Se evalúa f en ' + str(self.MUESTRAS + 1) + ' puntos de [' + str(self.a) + ', ' + str(self.b) + '] y se toman los subintervalos con \\( f(x_i) f(x_{i+1}) \\le 0 \\).',
+                            'resultado': str(len(izquierdos)) + ' corchete(s): ' + self._texto(np.c_[izquierdos, derechos])})
+        return izquierdos, derechos
+
+    def _iterar(self, siguiente, estado, aproximacion, tolerancia):
+        """
+        Aplica siguiente(estado, activos) hasta que el cambio de todas las
+        aproximaciones sea menor que tolerancia. siguiente regresa el nuevo
+        estado y el cambio de cada aproximación.
+        """
+        n = len(aproximacion(estado))
+        iteraciones = np.zeros(n, dtype = int)
+        cambio = np.full(n, np.inf)
+        activos = np.ones(n, dtype = bool)
+        for k in range(self.MAX_ITERACIONES):
+            if not activos.any():
+                break
+            estado, nuevo_cambio = siguiente(estado, activos)
+            cambio = np.where(activos, nuevo_cambio, cambio)
+            iteraciones += activos
+            if k < self.PASOS_DETALLE:
+                self.pasos.append({ 'titulo':'Iteración ' + str(k + 1),
+                                    'procedimiento': 'Aproximaciones: ' + self._texto(aproximacion(estado)),
+                                    'resultado': 'Cambio: ' + self._texto(cambio)})
+            activos &= ~(np.abs(cambio) < tolerancia)
+        return estado, iteraciones, np.abs(cambio)
+
+    def _terminar(self, raices, iteraciones, estimado):
+        # En un "cambio de signo" que no es raíz (un polo, como en tan(x)) |f| crece
+        # en lugar de bajar respecto a los extremos del corchete.
+        izquierdos, derechos = self._corchetes
+        referencia = np.minimum(np.abs(self._evaluar(izquierdos)), np.abs(self._evaluar(derechos)))
+        validas = np.isfinite(raices) & (np.abs(self._evaluar(raices)) <= referencia)
+        # Secante y Newton pueden salir de su corchete y llegar a una raíz repetida.
+        orden = np.argsort(raices)
+        repetidas = np.zeros(len(raices), dtype = bool)
+        ultima = None
+        for i in orden:
+            if not validas[i]:
+                continue
+            if ultima is not None and abs(raices[i] - ultima) <= 1e-8*(1 + abs(ultima)):
+                repetidas[i] = True
+            else:
+                ultima = raices[i]
+        descartadas = int((~validas).sum() + repetidas.sum())
+        validas &= ~repetidas
+
+        self.raices = raices[validas]
+        self.iteraciones = iteraciones[validas]
+        self.estimado = estimado[validas]
+        self.pasos.append({ 'titulo':'Resumen',
+                            'procedimiento': 'Iteraciones por raíz: ' + self._texto(self.iteraciones)
+                                             + ('. Se descartaron ' + str(descartadas) + ' resultado(s) repetidos o en polos.' if descartadas else '.'),
+                            'resultado': 'Raíces: ' + self._texto(self.raices)})
+        return self.raices
+
+    ####----- MÉTODOS: ------####
+    def biseccion(self, tolerancia = 1e-10):
+        izquierdos, derechos = self._iniciar('Bisección')
+        fi = self._evaluar(izquierdos)
+
+        def siguiente(estado, activos):
+            i, d, fi = estado
+            m = (i + d)/2
+            fm = self._evaluar(m)
+            izquierda = np.sign(fi)*np.sign(fm) <= 0
+            nuevo_i = np.where(activos & ~izquierda, m, i)
+            nuevo_d = np.where(activos & izquierda, m, d)
+            return (nuevo_i, nuevo_d, np.where(activos & ~izquierda, fm, fi)), nuevo_d - nuevo_i
+
+        (i, d, _), iteraciones, estimado = self._iterar(siguiente, (izquierdos, derechos, fi), lambda e: (e[0] + e[1])/2, tolerancia)
+        return self._terminar((i + d)/2, iteraciones, estimado)
+
+    def falsa_posicion(self, tolerancia = 1e-10):
+        izquierdos, derechos = self._iniciar('Falsa posición')
+
+        def siguiente(estado, activos):
+            i, d, fi, fd, c = estado
+            with np.errstate(all = 'ignore'):
+                nuevo = np.where(fd != fi, d - fd*(d - i)/(fd - fi), i)
+            fn = self._evaluar(nuevo)
+            izquierda = np.sign(fi)*np.sign(fn) <= 0
+            return (np.where(activos & ~izquierda, nuevo, i), np.where(activos & izquierda, nuevo, d),
+                    np.where(activos & ~izquierda, fn, fi), np.where(activos & izquierda, fn, fd),
+                    np.where(activos, nuevo, c)), nuevo - c
+
+        estado = (izquierdos, derechos, self._evaluar(izquierdos), self._evaluar(derechos), izquierdos)
+        estado, iteraciones, estimado = self._iterar(siguiente, estado, lambda e: e[4], tolerancia)
+        return self._terminar(estado[4], iteraciones, estimado)
+
+    def secante(self, tolerancia = 1e-10):
+        izquierdos, derechos = self._iniciar('Secante')
+
+        def siguiente(estado, activos):
+            anterior, actual, fa, fc = estado
+            with np.errstate(all = 'ignore'):
+                nuevo = np.where(fc != fa, actual - fc*(actual - anterior)/(fc - fa), actual)
+            fn = self._evaluar(nuevo)
+            return (np.where(activos, actual, anterior), np.where(activos, nuevo, actual),
+                    np.where(activos, fc, fa), np.where(activos, fn, fc)), nuevo - actual
+
+        estado = (izquierdos, derechos, self._evaluar(izquierdos), self._evaluar(derechos))
+        estado, iteraciones, estimado = self._iterar(siguiente, estado, lambda e: e[1], tolerancia)
+        return self._terminar(estado[1], iteraciones, estimado)
+
+    def newton(self, tolerancia = 1e-10):
+        izquierdos, derechos = self._iniciar('Newton-Raphson')
+        self._derivada(self.a)
+        self.pasos.append({ 'titulo':'Derivar \\( f(x) \\)',
+                            'procedimiento': '\\( f\'(x) = ' + latex(self.derivada) + ' \\). Se parte del punto medio de cada corchete.',
+                            'resultado': '\\( x_{n+1} = x_n - \\frac{f(x_n)}{f\'(x_n)} \\)'})
+
+        def siguiente(x, activos):
+            with np.errstate(all = 'ignore'):
+                paso = self._evaluar(x)/self._derivada(x)
+            paso = np.where(activos & np.isfinite(paso), paso, 0)
+            return x - paso, paso
+
+        x, iteraciones, estimado = self._iterar(siguiente, (izquierdos + derechos)/2, lambda e: e, tolerancia)
+        return self._terminar(x, iteraciones, estimado)
+
+    def brent(self, tolerancia = 1e-10):
+        izquierdos, derechos = self._iniciar('Brent')
+        raices, iteraciones, estimado = [], [], []
+        for numero, (a, b) in enumerate(zip(izquierdos, derechos)):
+            raiz, k, error = self._brent(a, b, tolerancia, detalle = numero == 0)
+            raices.append(raiz)
+            iteraciones.append(k)
+            estimado.append(error)
+        return self._terminar(np.array(raices, dtype = float), np.array(iteraciones, dtype = int), np.array(estimado, dtype = float))
+
+    def _brent(self, a, b, tolerancia, detalle = False):
+        """
+        Método de Brent en un corchete: interpolación cuadrática inversa o
+        secante cuando avanzan lo suficiente, bisección en otro caso.
+        """
+        fa, fb = float(self._evaluar(a)), float(self._evaluar(b))
+        if fb == 0:
+            return b, 0, 0.0
+        c, fc = a, fa
+        d = e = b - a
+        for k in range(1, self.MAX_ITERACIONES + 1):
+            if np.sign(fb) == np.sign(fc):
+                c, fc = a, fa
+                d = e = b - a
+            if abs(fc) < abs(fb):
+                a, b, c = b, c, b
+                fa, fb, fc = fb, fc, fb
+            tol = 2*np.finfo(float).eps*abs(b) + tolerancia/2
+            m = (c - b)/2
+            if abs(m) <= tol or fb == 0:
+                return b, k - 1, abs(m)
+            paso = 'bisección'
+            if abs(e) >= tol and abs(fa) > abs(fb):
+                s = fb/fa
+                if a == c:
+                    p, q = 2*m*s, 1 - s
+                    tipo = 'secante'
+                else:
+                    q, r = fa/fc, fb/fc
+                    p = s*(2*m*q*(q - r) - (b - a)*(r - 1))
+                    q = (q - 1)*(r - 1)*(s - 1)
+                    tipo = 'interpolación cuadrática inversa'
+                if p > 0:
+                    q = -q
+                p = abs(p)
+                if 2*p < min(3*m*q - abs(tol*q), abs(e*q)):
+                    e, d = d, p/q
+                    paso = tipo
+                else:
+                    d = e = m
+            else:
+                d = e = m
+            a, fa = b, fb
+            b += d if abs(d) > tol else (tol if m > 0 else -tol)
+            fb = float(self._evaluar(b))
+            if detalle and k <= self.PASOS_DETALLE:
+                self.pasos.append({ 'titulo':'Iteración ' + str(k) + ' (primera raíz)',
+                                    'procedimiento': 'Paso por ' + paso + '.',
+                                    'resultado': '\\( x = ' + str(b) + ', \\ f(x) = ' + str(fb) + ' \\)'})
+        return b, self.MAX_ITERACIONES, abs(m)
+
+    ####----- ERRORES: ------####
+    def errores(self):
+        tabla = {'Raíz': self.raices, 'f(raíz)': self._evaluar(self.raices), 'Iteraciones': self.iteraciones, 'Estimado': self.estimado}
+        return pd.DataFrame(tabla)
+
+
+def reducir_lttb(x, y, umbral):
+    """
+    Reduce la serie (x, y) a umbral puntos con Largest-Triangle-Three-Buckets:
+    conserva el primero y el último y, de cada cubeta intermedia, el punto que
+    forma el triángulo más grande con el elegido antes y el promedio de la
+    cubeta siguiente. Mantiene picos y valles, a diferencia de tomar cada
+    k-ésimo punto. Regresa los índices elegidos.
+    """
+    x = np.asarray(x, dtype = float)
+    y = np.asarray(y, dtype = float)
+    n = len(x)
+    if umbral >= n or umbral < 3:
+        return np.arange(n)
+    bordes = np.linspace(1, n - 1, umbral - 1).astype(int)
+    elegidos = np.empty(umbral, dtype = int)
+    elegidos[0], elegidos[-1] = 0, n - 1
+    anterior = 0
+    for i in range(umbral - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        siguiente = slice(fin, bordes[i + 2]) if i + 2 < len(bordes) else slice(n - 1, n)
+        xs, ys = x[siguiente].mean(), y[siguiente].mean()
+        areas = np.abs((x[anterior] - xs)*(y[inicio:fin] - y[anterior]) - (x[anterior] - x[inicio:fin])*(ys - y[anterior]))
+        anterior = inicio + int(np.nanargmax(areas)) if np.isfinite(areas).any() else inicio
+        elegidos[i + 1] = anterior
+    return elegidos
+
+
+def _redondear(valor, cifras = 6):
+    # JSON no admite NaN ni infinitos.
+    return float('%.*g' % (cifras, valor)) if np.isfinite(valor) else None
+
+def serie_grafica(x, y, presupuesto):
+    """
+    Serie [[x, y], ...] reducida con LTTB a presupuesto puntos y con 6 cifras
+    significativas, para mandar a la página pocos KB.
+    """
+    x, y = np.asarray(x, dtype = float), np.asarray(y, dtype = float)
+    with np.errstate(invalid = 'ignore'):
+        elegidos = reducir_lttb(x, y, presupuesto)
+    return [[_redondear(u), _redondear(v)] for u, v in zip(x[elegidos], y[elegidos])]
+
+MUESTRAS_GRAFICA = 4000
+LADO_GRAFICA = 20
+PANELES_GRAFICA = 64
+
+@lru_cache(maxsize = 64)
+def _compilar_xy(funcion):
+    return lambdify(symbols('x y'), sympify(funcion), 'numpy')
+
+def _bezier(valores):
+    # Puntos de control (en y) de la curva de Bézier que coincide con el
+    # polinomio interpolante por nodos equiespaciados: recta, parábola o cúbica.
+    if len(valores) == 2:
+        return list(valores)
+    if len(valores) == 3:
+        p0, p1, p2 = valores
+        return [p0, 2*p1 - (p0 + p2)/2, p2]
+    p0, p1, p2, p3 = valores
+    return [p0, (-5*p0 + 18*p1 - 9*p2 + 2*p3)/6, (2*p0 - 9*p1 + 18*p2 - 5*p3)/6, p3]
+
+def grafica_integral(funcion_texto, limites, metodo = None, particiones = None, intervalo2 = None, presupuesto = 200):
+    """
+    Datos para graficar una integral, de unos cuantos KB sin importar las
+    particiones.
+
+    Integral simple: la función muestreada en MUESTRAS_GRAFICA puntos de [a, b]
+    y reducida con LTTB a presupuesto puntos, y si hay método y particiones (y
+    no son más de PANELES_GRAFICA), un panel por cada aplicación de la regla:
+    sus extremos en x y los puntos de control en y de la curva de Bézier que
+    coincide con la recta (Trapezoidal), parábola (Simpson 1/3) o cúbica
+    (Simpson 3/8) de la regla.
+
+    Integral doble (intervalo2 = [c, d]): f(x, y) en una malla de
+    LADO_GRAFICA x LADO_GRAFICA sobre la región, con None fuera de ella. Si
+    los límites son números la región es [a, b] x [c, d]; si son funciones
+    de x, la región es c <= x <= d, a(x) <= y <= b(x) y se incluyen sus
+    fronteras. También se incluyen las líneas de nodos del método.
+
+    Los puntos donde la función no es finita (una singularidad en un
+    extremo, por ejemplo) quedan como None.
+    """
+    with np.errstate(all = 'ignore'):
+        return _grafica_integral(funcion_texto, limites, metodo, particiones, intervalo2, presupuesto)
+
+def _grafica_integral(funcion_texto, limites, metodo, particiones, intervalo2, presupuesto):
+    if intervalo2 is None:
+        a, b = float(sympify(limites[0])), float(sympify(limites[1]))
+        f = _compilar(funcion_texto)
+        t = np.linspace(a, b, MUESTRAS_GRAFICA)
+        datos = {'tipo': 'simple', 'limites': [a, b], 'funcion': serie_grafica(t, np.broadcast_to(f(t), t.shape), presupuesto)}
+        if metodo in ('1', '2', '3') and particiones and particiones <= PANELES_GRAFICA:
+            m, _, _ = pesos_compuestos(metodo, particiones)
+            paso = int(metodo)
+            nodos = np.linspace(a, b, m + 1)
+            valores = np.broadcast_to(f(nodos), nodos.shape)
+            datos['paneles'] = [{'x': [_redondear(nodos[k]), _redondear(nodos[k + paso])],
+                                 'y': [_redondear(v) for v in _bezier(valores[k:k + paso + 1])]}
+                                for k in range(0, m, paso)]
+        return datos
+
+    f = _compilar_xy(funcion_texto)
+    c, d = float(intervalo2[0]), float(intervalo2[1])
+    m = pesos_compuestos(metodo, particiones)[0] if metodo in ('1', '2', '3') and particiones else None
+    try:
+        a, b = float(limites[0]), float(limites[1])
+    except (TypeError, ValueError):
+        a = b = None
+
+    if a is not None:
+        # Rectángulo: x (integral de adentro) en [a, b], y en [c, d].
+        xs, ys = np.linspace(a, b, LADO_GRAFICA), np.linspace(c, d, LADO_GRAFICA)
+        X, Y = np.meshgrid(xs, ys)
+        Z = np.broadcast_to(f(X, Y), X.shape).astype(float)
+        datos = {'tipo': 'doble', 'region': 'rectangulo'}
+        if m is not None and m <= PANELES_GRAFICA:
+            datos['nodos_x'] = [_redondear(v) for v in np.linspace(a, b, m + 1)]
+            datos['nodos_y'] = [_redondear(v) for v in np.linspace(c, d, m + 1)]
+    else:
+        # Límites variables: x (integral de afuera) en [c, d], a(x) <= y <= b(x).
+        inferior, superior = _compilar(str(limites[0])), _compilar(str(limites[1]))
+        t = np.linspace(c, d, MUESTRAS_GRAFICA)
+        abajo = np.broadcast_to(inferior(t), t.shape).astype(float)
+        arriba = np.broadcast_to(superior(t), t.shape).astype(float)
+        xs = np.linspace(c, d, LADO_GRAFICA)
+        ys = np.linspace(np.nanmin(np.minimum(abajo, arriba)), np.nanmax(np.maximum(abajo, arriba)), LADO_GRAFICA)
+        X, Y = np.meshgrid(xs, ys)
+        Z = np.broadcast_to(f(X, Y), X.shape).astype(float)
+        bajo_x = np.broadcast_to(inferior(xs), xs.shape)
+        alto_x = np.broadcast_to(superior(xs), xs.shape)
+        Z[(Y < np.minimum(bajo_x, alto_x)) | (Y > np.maximum(bajo_x, alto_x))] = np.nan
+        datos = {'tipo': 'doble', 'region': 'variable',
+                 'inferior': serie_grafica(t, abajo, presupuesto//2), 'superior': serie_grafica(t, arriba, presupuesto//2)}
+        if m is not None and m <= PANELES_GRAFICA:
+            nodos = np.linspace(c, d, m + 1)
+            datos['nodos_x'] = [[_redondear(v), _redondear(inferior(v)), _redondear(superior(v))] for v in nodos]
+
+    datos.update({'x': [_redondear(v) for v in xs], 'y': [_redondear(v) for v in ys],
+                  'z': [[_redondear(v, 4) for v in fila] for fila in Z]})
+    return datos
+
+
+def nodos_chebyshev(n, a, b):
+    """n nodos de Chebyshev (ceros de T_n) en [a, b], en orden creciente."""
+    k = np.arange(n)
+    return np.sort((a + b)/2 + (b - a)/2*np.cos((2*k + 1)*np.pi/(2*n)))
+
+
+def _inmutable(arreglo):
+    arreglo.setflags(write = False)
+    return arreglo
+
+@lru_cache(maxsize = 128)
+def _pesos_baricentricos(nodos):
+    # w_j = 1/prod(x_j - x_k). Las diferencias se escalan por 4/(b-a) para que el
+    # producto no se desborde con muchos nodos; la escala se cancela al evaluar.
+    x = np.array(nodos)
+    escala = 4/(x.max() - x.min()) if len(x) > 1 else 1
+    diferencias = escala*(x[:, None] - x[None, :])
+    np.fill_diagonal(diferencias, 1)
+    return _inmutable(1/np.prod(diferencias, axis = 1))
+
+@lru_cache(maxsize = 128)
+def _diferencias_divididas(nodos, valores):
+    x = np.array(nodos)
+    tabla = [np.array(valores)]
+    for orden in range(1, len(x)):
+        tabla.append((tabla[-1][1:] - tabla[-1][:-1])/(x[orden:] - x[:-orden]))
+    return tuple(_inmutable(columna) for columna in tabla)
+
+@lru_cache(maxsize = 128)
+def _segundas_derivadas(nodos, valores):
+    # Spline cúbico natural: sistema tridiagonal para M_i = S''(x_i), M_0 = M_n = 0,
+    # resuelto con el algoritmo de Thomas.
+    x, y = np.array(nodos), np.array(valores)
+    n = len(x) - 1
+    M = np.zeros(n + 1)
+    if n < 2:
+        return _inmutable(M)
+    h = np.diff(x)
+    diagonal = 2*(h[:-1] + h[1:])
+    derecha = 6*((y[2:] - y[1:-1])/h[1:] - (y[1:-1] - y[:-2])/h[:-1])
+    for i in range(1, n - 1):
+        factor = h[i]/diagonal[i - 1]
+        diagonal[i] -= factor*h[i]
+        derecha[i] -= factor*derecha[i - 1]
+    interior = np.zeros(n - 1)
+    interior[-1] = derecha[-1]/diagonal[-1]
+    for i in range(n - 3, -1, -1):
+        interior[i] = (derecha[i] - h[i + 1]*interior[i + 1])/diagonal[i]
+    M[1:-1] = interior
+    return _inmutable(M)
+
+
+class interpolacion():
+    """
+        Interpolación de datos (x_i, y_i) por los métodos de:
+
+        Lagrange (forma baricéntrica)
+            .lagrange(puntos)
+        Polinomio de Newton (diferencias divididas)
+            .newton(puntos)
+        Spline cúbico natural
+            .spline(puntos)
+
+        Los pesos baricéntricos, la tabla de diferencias divididas y las
+        segundas derivadas del spline se calculan una vez por conjunto de nodos
+        y se guardan en un cache, así que evaluar en m puntos cuesta O(n) por
+        punto, con numpy.
+
+        Parámetros
+        -----------------------
+        x: list
+            Nodos, distintos entre sí.
+        y: list
+            Valores en los nodos. Si es None se evalúa funcion_texto en x.
+        funcion_texto: str
+            Función escrita con los operadores de Python (opcional). Si se da,
+            se reporta el error verdadero del interpolante.
+
+        Atributos
+        -----------------------
+        x, y: numpy.ndarray
+            Nodos ordenados y sus valores.
+        solucion: numpy.ndarray
+            Valores del interpolante en los últimos puntos pedidos.
+        metodo: str
+            Nombre del método utilizado.
+        verdadero: float
+            Máximo de |f(x) - p(x)| en MUESTRAS puntos de [x_0, x_n], si hay función.
+        pasos: list
+            Pasos realizados.
+        """
+    PASOS_DETALLE = 8
+    MUESTRAS = 2000
+    TAMANO_BLOQUE = 2**16
+
+    def __init__(self, x, y = None, funcion_texto = None):
+        x = np.asarray(x, dtype = float).ravel()
+        self.exp = parse_expr(funcion_texto) if funcion_texto else None
+        self._f = lambdify(symbols('x'), self.exp, 'numpy') if self.exp is not None else None
+        if y is None:
+            if self._f is None:
+                raise ValueError('Se necesitan los valores y o una función')
+            y = self._evaluar_funcion(x)
+        y = np.asarray(y, dtype = float).ravel()
+        if len(x) != len(y) or len(x) < 2:
+            raise ValueError('Se necesitan al menos dos puntos (x, y)')
+        orden = np.argsort(x, kind = 'stable')
+        self.x, self.y = x[orden], y[orden]
+        if np.any(np.diff(self.x) == 0):
+            raise ValueError('Los nodos x_i tienen que ser distintos')
+
+        self.solucion = None
+        self.metodo = None
+        self.verdadero = None
+        self.pasos = []
+        self._evaluador = None
+
+    def _evaluar_funcion(self, puntos):
+        return np.broadcast_to(np.asarray(self._f(puntos), dtype = float), np.shape(puntos))
+
+    @staticmethod
+    def _texto(arreglo):
+        return np.array2string(np.asarray(arreglo), precision = 8, threshold = 12)
+
+    def _llaves(self):
+        return tuple(self.x.tolist()), tuple(self.y.tolist())
+
+    def _aplicar(self, evaluador, puntos):
+        puntos = np.atleast_1d(np.asarray(puntos, dtype = float))
+        salida = np.empty(puntos.shape)
+        # Por bloques para no formar matrices de m x n demasiado grandes.
+        paso = max(1, self.TAMANO_BLOQUE//len(self.x))
+        for i in range(0, len(puntos), paso):
+            salida[i:i + paso] = evaluador(puntos[i:i + paso])
+        return salida
+
+    def _resultado(self, nombre, evaluador, puntos):
+        self.metodo = nombre
+        self._evaluador = evaluador
+        self.solucion = self._aplicar(evaluador, puntos)
+        self.pasos.append({ 'titulo':'Evaluar el interpolante',
+                            'procedimiento': '\\( x = \\)' + self._texto(puntos),
+                            'resultado': '\\( p(x) = \\)' + self._texto(self.solucion)})
+        return self.solucion
+
+    ####----- MÉTODOS: ------####
+    def lagrange(self, puntos):
+        nodos, _ = self._llaves()
+        w = _pesos_baricentricos(nodos)
+        self.pasos.append({ 'titulo':'Calcular los pesos baricéntricos',
+                            'procedimiento': '\\( w_j = \\frac{1}{\\prod_{k \\ne j}(x_j - x_k)} \\), se calculan una vez por conjunto de nodos (escalados por \\( 4/(x_n - x_0) \\)).',
+                            'resultado': '\\( w = \\)' + self._texto(w)})
+        self.pasos.append({ 'titulo':'Fórmula baricéntrica',
+                            'procedimiento': '\\( p(x) = \\frac{\\sum_j \\frac{w_j}{x - x_j} y_j}{\\sum_j \\frac{w_j}{x - x_j}} \\)',
+                            'resultado': 'Cada evaluación cuesta O(n).'})
+        x, y = self.x, self.y
+
+        def evaluador(t):
+            diferencia = t[:, None] - x[None, :]
+            exactos = diferencia == 0
+            with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                cocientes = w/diferencia
+                valores = (cocientes @ y)/cocientes.sum(axis = 1)
+            fila, columna = np.nonzero(exactos)
+            valores[fila] = y[columna]
+            return valores
+
+        return self._resultado('Lagrange baricéntrico', evaluador, puntos)
+
+    def newton(self, puntos):
+        tabla = _diferencias_divididas(*self._llaves())
+        coeficientes = np.array([columna[0] for columna in tabla])
+        for orden, columna in enumerate(tabla[1:self.PASOS_DETALLE + 1], start = 1):
+            self.pasos.append({ 'titulo':'Diferencias divididas de orden ' + str(orden),
+                                'procedimiento': '\\( f[x_i, ..., x_{i+' + str(orden) + '}] = \\frac{f[x_{i+1}, ..., x_{i+' + str(orden) + '}] - f[x_i, ..., x_{i+' + str(orden - 1) + '}]}{x_{i+' + str(orden) + '} - x_i} \\)',
+                                'resultado': self._texto(columna)})
+        self.pasos.append({ 'titulo':'Coeficientes del polinomio de Newton',
+                            'procedimiento': '\\( p(x) = a_0 + a_1(x - x_0) + \\cdots + a_n(x - x_0)\\cdots(x - x_{n-1}) \\), con \\( a_k = f[x_0, ..., x_k] \\). Se evalúa con el esquema de Horner.',
+                            'resultado': '\\( a = \\)' + self._texto(coeficientes)})
+        x = self.x
+
+        def evaluador(t):
+            valores = np.full(t.shape, coeficientes[-1])
+            for k in range(len(coeficientes) - 2, -1, -1):
+                valores = valores*(t - x[k]) + coeficientes[k]
+            return valores
+
+        return self._resultado('Polinomio de Newton', evaluador, puntos)
+
+    def spline(self, puntos):
+        M = _segundas_derivadas(*self._llaves())
+        self.pasos.append({ 'titulo':'Resolver el sistema tridiagonal',
+                            'procedimiento': '\\( h_{i-1}M_{i-1} + 2(h_{i-1} + h_i)M_i + h_iM_{i+1} = 6\\left(\\frac{y_{i+1} - y_i}{h_i} - \\frac{y_i - y_{i-1}}{h_{i-1}}\\right) \\), con \\( M_0 = M_n = 0 \\) (spline natural).',
+                            'resultado': '\\( M = \\)' + self._texto(M)})
+        x, y = self.x, self.y
+        h = np.diff(x)
+
+        def evaluador(t):
+            i = np.clip(np.searchsorted(x, t) - 1, 0, len(h) - 1)
+            izquierda, derecha = x[i + 1] - t, t - x[i]
+            return (M[i]*izquierda**3 + M[i + 1]*derecha**3)/(6*h[i]) \
+                   + (y[i]/h[i] - M[i]*h[i]/6)*izquierda + (y[i + 1]/h[i] - M[i + 1]*h[i]/6)*derecha
+
+        return self._resultado('Spline cúbico natural', evaluador, puntos)
+
+    ####----- GRÁFICA: ------####
+    def grafica(self, presupuesto = 200):
+        """
+        Datos para graficar el último interpolante: se muestrea en MUESTRAS
+        puntos de [x_0, x_n] y las curvas se reducen con serie_grafica. Los
+        nodos se mandan todos, porque LTTB podría quitar alguno.
+        """
+        t = np.linspace(self.x[0], self.x[-1], self.MUESTRAS)
+        p = self._aplicar(self._evaluador, t)
+        datos = {'interpolante': serie_grafica(t, p, presupuesto),
+                 'nodos': [[_redondear(u), _redondear(v)] for u, v in zip(self.x, self.y)]}
+        if self._f is not None:
+            f = self._evaluar_funcion(t)
+            datos['funcion'] = serie_grafica(t, f, presupuesto)
+            self.verdadero = float(np.max(np.abs(f - p)))
+        return datos
+
+    ####----- ERRORES: ------####
+    def errores(self):
+        if self._f is not None and self.verdadero is None:
+            self.grafica()
+        error = {'Verdadero': self.verdadero}
+        return pd.DataFrame(error.values(),index = error.keys(), columns = ['Valor']).reset_index().rename({'index':'Error'}, axis = 1).set_index('Error')
@@ -0,0 +1,148 @@
+"""
+Perfilado por muestreo de las peticiones lentas.
+
+Cuando una integral tarda mucho no se sabe qué parte de SymPy tiene la culpa
+(un simplify dentro de simpson1_3_compuesto_doble, por ejemplo). Un hilo del
+proceso toma cada PERFIL_INTERVALO segundos la pila de los hilos que están
+atendiendo una petición perfilada (sys._current_frames), así que el costo es
+el de leer unas cuantas pilas por muestra y no el de trazar cada llamada.
+
+Las pilas se guardan en formato "collapsed" (una línea por pila distinta,
+funciones separadas por ';' y el número de muestras al final), que leen
+speedscope, flamegraph.pl e inferno, en PERFIL_DIRECTORIO con el hash de la
+expresión en el nombre del archivo. Se perfila una petición si:
+
+- un usuario staff lo pide con el encabezado X-Perfil: 1 o con ?perfil=1, o
+- PERFIL_LENTO tiene un valor y la petición tardó más de esos segundos; para
+  eso se muestrean todas las peticiones y solo se guardan las lentas.
+"""
+import os
+import sys
+import time
+import hashlib
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _pila(marco):
+    nombres = []
+    while marco is not None:
+        codigo = marco.f_code
+        nombres.append('%s (%s:%d)' % (codigo.co_name, os.path.basename(codigo.co_filename), codigo.co_firstlineno))
+        marco = marco.f_back
+    return ';'.join(reversed(nombres))
+
+
+class Muestreador():
+    """
+        Hilo que toma muestras de las pilas de los hilos registrados. Solo
+        corre mientras hay al menos uno.
+
+        Parámetros
+        -----------------------
+        intervalo: float
+            Segundos entre muestras.
+    """
+    def __init__(self, intervalo = 0.01):
+        self.intervalo = intervalo
+        self._muestras = {}
+        self._candado = threading.Lock()
+        self._hilo = None
+
+    def iniciar(self, hilo = None):
+        """Empieza a muestrear el hilo (por defecto el actual)."""
+        hilo = threading.get_ident() if hilo is None else hilo
+        with self._candado:
+            self._muestras[hilo] = Counter()
+            if self._hilo is None:
+                self._hilo = threading.Thread(target = self._muestrear, name = 'perfil', daemon = True)
+                self._hilo.start()
+
+    def detener(self, hilo = None):
+        """Deja de muestrear el hilo y regresa un Counter {pila: muestras}."""
+        hilo = threading.get_ident() if hilo is None else hilo
+        with self._candado:
+            return self._muestras.pop(hilo, Counter())
+
+    def _muestrear(self):
+        while True:
+            time.sleep(self.intervalo)
+            with self._candado:
+                if not self._muestras:
+                    self._hilo = None
+                    return
+                marcos = sys._current_frames()
+                for hilo, muestras in self._muestras.items():
+                    if hilo in marcos:
+                        muestras[_pila(marcos[hilo])] += 1
+
+
+def guardar(muestras, directorio, etiqueta):
+    """
+        Escribe las muestras en formato collapsed en directorio y regresa la
+        ruta del archivo.
+    """
+    os.makedirs(directorio, exist_ok = True)
+    ahora = time.time()
+    nombre = '%s%03d-%s-%d.txt' % (time.strftime('%Y%m%d-%H%M%S.', time.localtime(ahora)), ahora*1000 % 1000, etiqueta, os.getpid())
+    ruta = os.path.join(directorio, nombre)
+    with open(ruta, 'w') as f:
+        for pila, cuenta in muestras.most_common():
+            f.write('%s %d\n' % (pila, cuenta))
+    return ruta
+
+
+class PerfilMiddleware:
+    """
+        Perfila las peticiones que lo piden (staff con X-Perfil o ?perfil=1)
+        y, si PERFIL_LENTO tiene valor, las que tardan más de PERFIL_LENTO
+        segundos. Debe ir después de AuthenticationMiddleware.
+
+        A las peticiones pedidas se les agrega el encabezado X-Perfil con el
+        nombre del archivo.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.muestreador = Muestreador(settings.PERFIL_INTERVALO)
+        self.lento = settings.PERFIL_LENTO
+
+    def _pedido(self, request):
+        if request.headers.get('X-Perfil') != '1' and request.GET.get('perfil') != '1':
+            return False
+        usuario = getattr(request, 'user', None)
+        return usuario is not None and usuario.is_staff
+
+    def __call__(self, request):
+        pedido = self._pedido(request)
+        if not pedido and not self.lento:
+            return self.get_response(request)
+
+        inicio = time.perf_counter()
+        self.muestreador.iniciar()
+        try:
+            response = self.get_response(request)
+        finally:
+            muestras = self.muestreador.detener()
+        tiempo = time.perf_counter() - inicio
+
+        if not (pedido or tiempo > self.lento) or not muestras:
+            return response
+        # El hash de la expresión (ya convertida de LaTeX) relaciona el perfil
+        # con el problema; después de submit la sesión ya tiene la nueva.
+        expresion = getattr(request, 'session', {}).get('eq') or request.POST.get('eq')
+        etiqueta = hashlib.sha256(expresion.encode()).hexdigest()[:12] if expresion else 'sin-expresion'
+        try:
+            ruta = guardar(muestras, settings.PERFIL_DIRECTORIO, etiqueta)
+        except OSError:
+            logger.exception('No se pudo guardar el perfil de %s', request.path)
+            return response
+        logger.info('%s %s tardó %.2f s: perfil con %d muestras en %s', request.method, request.path,
+                    tiempo, sum(muestras.values()), ruta)
+        if pedido:
+            response['X-Perfil'] = os.path.basename(ruta)
+        return response
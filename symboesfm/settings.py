@@ -38,6 +38,11 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+
+    'integracion',
+    'ecuaciones',
+    'raices',
+    'interpolacion',
 ]
 
 MIDDLEWARE = [
@@ -49,7 +54,9 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 
-    'whitenoise.middleware.WhiteNoiseMiddleware'
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'symboesfm.memoria.MemoriaMiddleware',
+    'symboesfm.perfil.PerfilMiddleware',
 ]
 
 ROOT_URLCONF = 'symboesfm.urls'
@@ -84,6 +91,55 @@ DATABASES = {
 }
 
 
+# Cache
+# Las páginas de resultados se guardan completas (ver integracion.views.view);
+# MAX_BYTES acota la memoria que ocupan en cada proceso.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'symboesfm.cache.CacheLocMemAcotada',
+        'LOCATION': 'symboesfm',
+        'TIMEOUT': 60*60*24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 2000,
+            'MAX_BYTES': 64*2**20,
+        },
+    }
+}
+
+
+# Peticiones simultáneas del mismo problema (ver symboesfm/vuelo.py): los
+# procesos del servidor se coordinan con candados de archivo en
+# VUELO_DIRECTORIO y esperan a lo más VUELO_ESPERA segundos.
+
+VUELO_DIRECTORIO = os.environ.get('VUELO_DIRECTORIO')
+VUELO_ESPERA = float(os.environ.get('VUELO_ESPERA', 120))
+
+
+# Memoria (ver symboesfm/memoria.py)
+# SYMPY_CACHE_SIZE acota cada cache de SymPy y tiene que estar en el entorno
+# antes de importar SymPy. Al terminar una petición el cache se vacía si pasa
+# de SYMPY_CACHE_LIMPIAR entradas en total, y gunicorn recicla el proceso si su
+# RSS pasa de MEMORIA_RSS_MAXIMO bytes (0 lo desactiva). Las peticiones que
+# hacen crecer el RSS más de MEMORIA_AVISO bytes se registran con nivel INFO.
+
+SYMPY_CACHE_SIZE = int(os.environ.get('SYMPY_CACHE_SIZE', 500))
+os.environ['SYMPY_CACHE_SIZE'] = str(SYMPY_CACHE_SIZE)
+SYMPY_CACHE_LIMPIAR = int(os.environ.get('SYMPY_CACHE_LIMPIAR', 20000))
+MEMORIA_RSS_MAXIMO = int(os.environ.get('MEMORIA_RSS_MAXIMO', 400*2**20))
+MEMORIA_AVISO = int(os.environ.get('MEMORIA_AVISO', 20*2**20))
+MEMORIA_TRAZAR = os.environ.get('MEMORIA_TRAZAR', '') == '1'
+
+
+# Perfilado por muestreo (ver symboesfm/perfil.py): staff puede pedirlo con
+# X-Perfil: 1 o ?perfil=1; con PERFIL_LENTO se guardan también las peticiones
+# que tarden más de esos segundos.
+
+PERFIL_DIRECTORIO = os.environ.get('PERFIL_DIRECTORIO', str(BASE_DIR / 'perfiles'))
+PERFIL_INTERVALO = float(os.environ.get('PERFIL_INTERVALO', 0.01))
+PERFIL_LENTO = float(os.environ['PERFIL_LENTO']) if os.environ.get('PERFIL_LENTO') else None
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -137,3 +193,6 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 django_heroku.settings(locals())
+
+# django_heroku define LOGGING sin los loggers del proyecto.
+LOGGING['loggers']['symboesfm'] = {'handlers': ['console'], 'level': os.environ.get('SYMBOESFM_LOG', 'INFO')}
@@ -6,6 +6,9 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 from integracion import views as integracion_views
+from ecuaciones import views as ecuaciones_views
+from raices import views as raices_views
+from interpolacion import views as interpolacion_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -15,10 +18,29 @@ urlpatterns = [
 
     #Integracion
     path('integracion/view/', integracion_views.view, name = 'view'),
+    path('integracion/grafica/', integracion_views.grafica, name = 'grafica'),
     path('integracion/simple/', integracion_views.simple, name =  "simple"),
     path('integracion/doble/', integracion_views.doble, name =  "doble"),
     path('integracion/submit/', integracion_views.submit, name = 'submit'),
     path('integracion/extrapolacion/', integracion_views.extrapolacion, name = 'extrapolacion'),
-    path('integracion/indefinida', integracion_views.indefinida, name = 'indefinida')
+    path('integracion/indefinida', integracion_views.indefinida, name = 'indefinida'),
+    path('integracion/convergencia/', integracion_views.convergencia, name = 'convergencia'),
+    path('integracion/comparacion/', integracion_views.comparacion, name = 'comparacion'),
+    path('integracion/tabular/', integracion_views.tabular, name = 'tabular'),
+
+    #Ecuaciones diferenciales
+    path('ecuaciones/', ecuaciones_views.edo, name = 'edo'),
+    path('ecuaciones/submit/', ecuaciones_views.submit, name = 'edo_submit'),
+    path('ecuaciones/view/', ecuaciones_views.view, name = 'edo_view'),
+
+    #Raices
+    path('raices/', raices_views.raices, name = 'raices'),
+    path('raices/submit/', raices_views.submit, name = 'raices_submit'),
+    path('raices/view/', raices_views.view, name = 'raices_view'),
+
+    #Interpolacion
+    path('interpolacion/', interpolacion_views.interpolacion, name = 'interpolacion'),
+    path('interpolacion/submit/', interpolacion_views.submit, name = 'interpolacion_submit'),
+    path('interpolacion/view/', interpolacion_views.view, name = 'interpolacion_view')
 
 ]+ static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -0,0 +1,138 @@
+"""
+Agrupa peticiones idénticas que llegan al mismo tiempo ("single flight").
+
+En una clase es común que treinta alumnos envíen la misma integral en pocos
+segundos; sin coordinación, cada proceso de gunicorn hace el mismo cálculo
+simbólico. Con VueloUnico.ejecutar(llave, calcular, buscar) solo una petición
+por llave calcula:
+
+- dentro del proceso, las demás esperan a la primera y reciben su resultado;
+- entre procesos del mismo servidor, la primera toma un candado de archivo
+  (fcntl.flock) y las demás, al obtenerlo, vuelven a llamar buscar(), que
+  consulta un almacén compartido (la tabla Resultado) antes de calcular.
+
+Los candados de archivo se reparten en CANDADOS archivos fijos según la
+llave, así no se acumulan archivos; dos problemas distintos que caen en el
+mismo archivo solo se esperan entre sí.
+"""
+import os
+import time
+import logging
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se agrupan peticiones del mismo proceso.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class _Vuelo():
+    def __init__(self):
+        self.listo = threading.Event()
+        self.valor = None
+        self.error = None
+
+
+class VueloUnico():
+    """
+        Parámetros
+        -----------------------
+        directorio: str
+            Carpeta de los candados de archivo (se crea si no existe).
+        espera: float
+            Segundos máximos de espera por el candado de otro proceso; después
+            se calcula de todos modos.
+        candados: int
+            Número de archivos de candado.
+    """
+    def __init__(self, directorio = None, espera = 120, candados = 256):
+        self.directorio = directorio or os.path.join(tempfile.gettempdir(), 'symboesfm-vuelos')
+        self.espera = espera
+        self.candados = candados
+        self._vuelos = {}
+        self._candado = threading.Lock()
+
+    def ejecutar(self, llave, calcular, buscar = None):
+        """
+            Regresa buscar() si ya hay un resultado guardado; si no, el de
+            calcular(), llamado una sola vez por llave aunque lleguen varias
+            peticiones a la vez. Si calcular() lanza una excepción, todas las
+            peticiones que esperaban la reciben.
+
+            llave debe ser un hash hexadecimal (ver hash_problema).
+        """
+        if buscar is not None:
+            valor = buscar()
+            if valor is not None:
+                return valor
+
+        with self._candado:
+            vuelo = self._vuelos.get(llave)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._vuelos[llave] = _Vuelo()
+
+        if not lider:
+            logger.debug('Esperando el cálculo en curso de %s', llave[:12])
+            vuelo.listo.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return dict(vuelo.valor) if isinstance(vuelo.valor, dict) else vuelo.valor
+
+        try:
+            with self._archivo(llave):
+                valor = buscar() if buscar is not None else None
+                if valor is None:
+                    valor = calcular()
+                else:
+                    logger.debug('%s lo calculó otro proceso', llave[:12])
+            vuelo.valor = valor
+            return valor
+        except Exception as e:
+            vuelo.error = e
+            raise
+        finally:
+            with self._candado:
+                del self._vuelos[llave]
+            vuelo.listo.set()
+
+    def _archivo(self, llave):
+        return _CandadoArchivo(os.path.join(self.directorio, 'vuelo-%03d.lock' % (int(llave[:8], 16) % self.candados)),
+                               self.espera)
+
+
+class _CandadoArchivo():
+    def __init__(self, ruta, espera):
+        self.ruta = ruta
+        self.espera = espera
+        self.archivo = None
+
+    def __enter__(self):
+        if fcntl is None:
+            return self
+        try:
+            os.makedirs(os.path.dirname(self.ruta), exist_ok = True)
+            self.archivo = open(self.ruta, 'a')
+        except OSError:
+            logger.exception('No se pudo abrir el candado %s', self.ruta)
+            return self
+        limite = time.monotonic() + self.espera
+        while True:
+            try:
+                fcntl.flock(self.archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return self
+            except BlockingIOError:
+                if time.monotonic() > limite:
+                    logger.warning('Se esperó %s s el candado %s; se calcula sin él', self.espera, self.ruta)
+                    self.archivo.close()
+                    self.archivo = None
+                    return self
+                time.sleep(0.05)
+
+    def __exit__(self, *excepcion):
+        if self.archivo is not None:
+            fcntl.flock(self.archivo, fcntl.LOCK_UN)
+            self.archivo.close()